@@ -0,0 +1,139 @@
+"""Cancellation of superseded question previews.
+
+Each preview runs with a ``CancelToken`` armed for its thread by
+``cancellation_scope``. Backends register how to stop their current work with
+``on_cancel`` (``KILL QUERY`` for MySQL, ``interrupt()`` for SQLite), and
+Python loops call ``check_cancelled()``.
+
+``PreviewRegistry`` keeps the newest preview per ``(user, editor)``: a request
+with a higher sequence id cancels the one still running, and a request that
+arrives after a newer one is rejected right away.
+"""
+
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from .errors import QuestionCancelledError
+
+logger = logging.getLogger(__name__)
+
+SUPERSEDED_MESSAGE = "Preview superseded by a newer request"
+
+_local = threading.local()
+
+
+class CancelToken:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self.cancelled:
+                return
+            self.cancelled = True
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            _run_callback(callback)
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self.cancelled:
+                self._callbacks.append(callback)
+                return
+        _run_callback(callback)
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+
+def _run_callback(callback: Callable[[], None]) -> None:
+    try:
+        callback()
+    except Exception:
+        logger.exception("Cancellation callback failed")
+
+
+@contextmanager
+def cancellation_scope(token: CancelToken | None):
+    """Make ``token`` the current thread's cancel token."""
+    previous = getattr(_local, "token", None)
+    _local.token = token
+    try:
+        yield
+    finally:
+        _local.token = previous
+
+
+def current_token() -> CancelToken | None:
+    return getattr(_local, "token", None)
+
+
+def check_cancelled() -> None:
+    token = current_token()
+    if token is not None and token.cancelled:
+        raise QuestionCancelledError(SUPERSEDED_MESSAGE)
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], None]):
+    """Run ``callback`` if the current token is cancelled while the block runs."""
+    token = current_token()
+    if token is None:
+        yield
+        return
+    token.add_callback(callback)
+    try:
+        yield
+    finally:
+        token.remove_callback(callback)
+
+
+class PreviewRegistry:
+    def __init__(self):
+        self._active: Dict[Hashable, Tuple[int, CancelToken]] = {}
+        self._lock = threading.Lock()
+        self.superseded = 0
+        self.stale = 0
+        self.disconnected = 0
+
+    def begin(self, key: Hashable, sequence: int) -> CancelToken:
+        token = CancelToken()
+        with self._lock:
+            previous = self._active.get(key)
+            if previous is not None and previous[0] > sequence:
+                self.stale += 1
+                raise QuestionCancelledError(SUPERSEDED_MESSAGE)
+            self._active[key] = (sequence, token)
+            if previous is not None:
+                self.superseded += 1
+        if previous is not None:
+            previous[1].cancel()
+        return token
+
+    def finish(self, key: Hashable, token: CancelToken) -> None:
+        with self._lock:
+            current = self._active.get(key)
+            if current is not None and current[1] is token:
+                del self._active[key]
+
+    def record_disconnect(self) -> None:
+        with self._lock:
+            self.disconnected += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "active": len(self._active),
+                "superseded": self.superseded,
+                "stale": self.stale,
+                "disconnected": self.disconnected,
+            }
+
+
+preview_registry = PreviewRegistry()
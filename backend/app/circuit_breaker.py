@@ -0,0 +1,116 @@
+"""Circuit breakers for the external dependencies (MySQL, MongoDB).
+
+A breaker starts ``closed`` and counts consecutive dependency failures. After
+``CIRCUIT_FAILURE_THRESHOLD`` of them it opens: calls fail immediately with
+``CircuitOpenError`` instead of waiting out connect timeouts. Once
+``CIRCUIT_RESET_SECONDS`` have passed it is ``half_open`` and lets a single
+trial call through; success closes it, failure opens it for another period.
+
+Only exceptions in ``failure_types`` count as failures. Any other exception
+means the dependency answered (e.g. a duplicate key) and counts as success.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple, Type
+
+from .errors import DependencyUnavailableError
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_FAILURE_THRESHOLD = max(1, int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "10"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(DependencyUnavailableError):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_types: Tuple[Type[BaseException], ...] = (Exception,),
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.name = name
+        self.failure_types = failure_types
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trial_running = False
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.reset_seconds:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} is temporarily unavailable")
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN:
+                if self._trial_running:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"{self.name} is temporarily unavailable")
+                self._trial_running = True
+
+    def _after_call(self, failed: bool) -> None:
+        with self._lock:
+            self._trial_running = False
+            if not failed:
+                if self._state != CLOSED:
+                    logger.info("Circuit for %s closed", self.name)
+                self._state = CLOSED
+                self.failures = 0
+                return
+
+            self.failures += 1
+            if self._state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning("Circuit for %s opened after %d failures", self.name, self.failures)
+                    self.opened += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        self._before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except self.failure_types:
+            self._after_call(failed=True)
+            raise
+        except BaseException:
+            self._after_call(failed=False)
+            raise
+        self._after_call(failed=False)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+            }
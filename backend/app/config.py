@@ -128,6 +128,7 @@ QUESTION_CONFIG = {
 
     "hungarian_method": {
         "class_path": "app.question_types.hungarian_method.HungarianMethodQuestion",
+        "execution": "process",
         "metadata": {
             "title": "Ungarische Methode",
             "week": 10,
@@ -174,6 +175,7 @@ QUESTION_CONFIG = {
 
     "sql_query": {
         "class_path": "app.question_types.sql_query.SqlQueryQuestion",
+        "uses_sql_pool": True,
         "metadata": {
             "title": "SQL Query",
             "week": 5,
@@ -302,6 +304,8 @@ QUESTION_CONFIG = {
     },
     "ucc_discovery_question": {
         "class_path": "app.question_types.ucc_discovery_question.UCCDiscoveryQuestion",
+        "execution": "process",
+        "precompute_seeds": 1000,
         "metadata": {
             "title": "UCC Discovery",
             "week": 10,
@@ -332,6 +336,12 @@ QUESTION_CONFIG = {
 
     "sigma_rule": {
         "class_path": "app.question_types.sigma_rule.SigmaRule",
+        "cost_policy": {
+            "params": {
+                "num_points": {"min": 5, "max": 20, "on_violation": "reject"},
+                "dimensions": {"min": 1, "max": 2, "on_violation": "clamp"},
+            },
+        },
         "metadata": {
             "title": "Sigma-Regel",
             "week": 10,
@@ -372,6 +382,12 @@ QUESTION_CONFIG = {
 
     "tukey_fences": {
         "class_path": "app.question_types.tukey_fences.TukeyFences",
+        "cost_policy": {
+            "params": {
+                "num_points": {"min": 5, "max": 20, "on_violation": "reject"},
+                "dimensions": {"min": 1, "max": 2, "on_violation": "clamp"},
+            },
+        },
         "metadata": {
             "title": "Tukey-Fences",
             "week": 10,
@@ -438,6 +454,7 @@ QUESTION_CONFIG = {
     },
     "fp_grow": {
         "class_path": "app.question_types.fp_grow.FPGrowthAlgorithmQuestion",
+        "precompute_seeds": 1000,
         "metadata": {
             "title": "FP-Growth",
             "week": 8,
@@ -725,6 +742,11 @@ QUESTION_CONFIG = {
     },
     "tuple_insertion_fd": {
         "class_path": "app.question_types.tuple_insertion_fd.TupleInsertionFDQuestion",
+        "cost_policy": {
+            "params": {
+                "num_tuples": {"min": 1, "max": 10, "on_violation": "clamp"},
+            },
+        },
         "metadata": {
             "title": "Tupel einfügen (FD-Verletzung)",
             "week": 6,
@@ -791,6 +813,7 @@ QUESTION_CONFIG = {
     },
     "synthesis_algorithm": {
         "class_path": "app.question_types.synthesis_algorithm.SynthesisAlgorithmQuestion",
+        "execution": "process",
         "metadata": {
             "title": "Synthesealgorithmus",
             "week": 6,
@@ -819,6 +842,7 @@ QUESTION_CONFIG = {
     },
     "wait_for_graph": {
         "class_path": "app.question_types.wait_for_graph.WaitForGraphQuestion",
+        "precompute_seeds": 1000,
         "metadata": {
             "title": "Wartegraph & Verklemmung",
             "week": 7,
@@ -841,6 +865,7 @@ QUESTION_CONFIG = {
     },
     "schedule_properties": {
         "class_path": "app.question_types.schedule_properties.SchedulePropertiesQuestion",
+        "precompute_seeds": 1000,
         "metadata": {
             "title": "Eigenschaften von Historien",
             "week": 7,
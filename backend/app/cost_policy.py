@@ -0,0 +1,94 @@
+"""Per-request cost limits for question generators.
+
+``QUESTION_CONFIG[type]["cost_policy"]`` bounds the numeric constructor
+parameters a client may pass and optionally overrides the per-call deadline::
+
+    "cost_policy": {
+        "params": {
+            "num_points": {"min": 5, "max": 20, "on_violation": "reject"},
+            "dimensions": {"min": 1, "max": 2, "on_violation": "clamp"},
+        },
+        "deadline_seconds": 5,
+    }
+
+Out-of-range values are clamped or rejected before the constructor runs. The
+deadline is enforced twice: the endpoint stops waiting after it expires, and
+rejection-sampling loops as well as the solution enumerations behind grading
+call ``check_deadline()`` so the abandoned thread or worker process stops
+shortly after as well.
+"""
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+from .config import QUESTION_CONFIG
+from .errors import QuestionCostLimitError, QuestionDeadlineExceededError
+
+QUESTION_DEADLINE_SECONDS = float(os.getenv("QUESTION_DEADLINE_SECONDS", "10"))
+
+_INT_PATTERN = re.compile(r"^[+-]?\d+$")
+_local = threading.local()
+
+
+def _as_int(value: Any) -> int | None:
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and _INT_PATTERN.match(value.strip()):
+        return int(value)
+    return None
+
+
+def apply_cost_policy(type_name: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Return ``kwargs`` with bounded parameters clamped; raise for rejected ones.
+
+    Non-numeric values (``"random"``, ...) are left to the constructor.
+    """
+    params = QUESTION_CONFIG.get(type_name, {}).get("cost_policy", {}).get("params", {})
+    if not params:
+        return kwargs
+
+    bounded = dict(kwargs)
+    for name, rule in params.items():
+        if name not in bounded:
+            continue
+        value = _as_int(bounded[name])
+        if value is None:
+            continue
+
+        low = rule.get("min", value)
+        high = rule.get("max", value)
+        if low <= value <= high:
+            continue
+        if rule.get("on_violation", "reject") == "clamp":
+            bounded[name] = min(max(value, low), high)
+        else:
+            raise QuestionCostLimitError(f"Parameter '{name}' must be between {low} and {high}")
+    return bounded
+
+
+def deadline_seconds(type_name: str) -> float:
+    policy = QUESTION_CONFIG.get(type_name, {}).get("cost_policy", {})
+    return float(policy.get("deadline_seconds", QUESTION_DEADLINE_SECONDS))
+
+
+@contextmanager
+def deadline(seconds: float | None):
+    """Arm ``check_deadline()`` for the current thread."""
+    previous = getattr(_local, "expires_at", None)
+    _local.expires_at = time.monotonic() + seconds if seconds else None
+    try:
+        yield
+    finally:
+        _local.expires_at = previous
+
+
+def check_deadline() -> None:
+    expires_at = getattr(_local, "expires_at", None)
+    if expires_at is not None and time.monotonic() > expires_at:
+        raise QuestionDeadlineExceededError("Question generation took too long, please retry")
@@ -1,2 +1,22 @@
 class DependencyUnavailableError(RuntimeError):
     pass
+
+
+class InvalidQuestionRequestError(ValueError):
+    pass
+
+
+class QuestionCostLimitError(ValueError):
+    pass
+
+
+class QuestionDeadlineExceededError(RuntimeError):
+    pass
+
+
+class QuestionCancelledError(RuntimeError):
+    pass
+
+
+class PasswordHasherSaturatedError(RuntimeError):
+    pass
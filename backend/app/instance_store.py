@@ -0,0 +1,351 @@
+"""Offline pre-generated question instances.
+
+Rejection-sampled generators spend most of their latency searching for an
+"interesting" instance. ``python -m app.instance_store`` enumerates a seed range
+per ``(type, difficulty, mode)`` from ``QUESTION_CONFIG`` and writes the chosen
+instance state into one file per type::
+
+    magic | header length | JSON header | per-section offset tables | blobs
+
+Every section covers a contiguous seed range, so a lookup is two ``uint64`` reads
+from the section's offset table plus one blob decode. Files are opened with
+``mmap`` so all workers share the pages.
+
+Stored state is the instance ``__dict__`` without its random generators; those
+are only drawn from inside ``__init__`` and are re-seeded on load. A store whose
+generator module, or one of the app modules it imports (helpers such as
+``frequent_itemset_helper``), changed since the build is ignored.
+"""
+
+import argparse
+import hashlib
+import inspect
+import itertools
+import json
+import logging
+import mmap
+import os
+import pickle
+import random
+import struct
+import sys
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from importlib import import_module
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from .config import QUESTION_CONFIG
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = Path(__file__).resolve().parent
+INSTANCE_STORE_DIR = Path(os.getenv("INSTANCE_STORE_DIR", str(APP_DIR / "resources" / "instance_store")))
+INSTANCE_STORE_ENABLED = os.getenv("INSTANCE_STORE_ENABLED", "true").lower() == "true"
+
+STORE_MAGIC = b"AQISTOR1"
+STORE_SUFFIX = ".store"
+MODE_SETTING_NAMES = ("mode", "Mode")
+_RESEEDED_KEY = "__reseeded_generators__"
+_OFFSET = struct.Struct("<Q")
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def _load_class(type_name: str):
+    module_path, class_name = QUESTION_CONFIG[type_name]["class_path"].rsplit(".", 1)
+    return getattr(import_module(module_path), class_name)
+
+
+def _generator_sources(cls) -> List[Path]:
+    """Source files of the generator module and the app modules it imports, transitively."""
+    sources: Dict[str, Path] = {}
+    pending = [sys.modules[cls.__module__]]
+    while pending:
+        module = pending.pop()
+        source = getattr(module, "__file__", None)
+        if module.__name__ in sources or source is None or not Path(source).resolve().is_relative_to(APP_DIR):
+            continue
+        sources[module.__name__] = Path(source).resolve()
+        for value in vars(module).values():
+            # Helpers are imported as modules or as names (functions, classes) from a module.
+            referenced = value if inspect.ismodule(value) else sys.modules.get(getattr(value, "__module__", None) or "")
+            if referenced is not None:
+                pending.append(referenced)
+    return [sources[name] for name in sorted(sources)]
+
+
+def _generator_fingerprint(cls) -> str:
+    digest = hashlib.sha256()
+    for source in _generator_sources(cls):
+        digest.update(source.relative_to(APP_DIR).as_posix().encode("utf-8"))
+        digest.update(source.read_bytes())
+    return digest.hexdigest()
+
+
+def _section_key(params: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+    return tuple(sorted(params.items()))
+
+
+def enumerate_parameter_sets(type_name: str) -> List[Dict[str, Any]]:
+    """All ``difficulty``/``mode`` combinations a type offers in ``QUESTION_CONFIG``."""
+    metadata = QUESTION_CONFIG[type_name].get("metadata", {})
+    settings = metadata.get("settings", {})
+
+    dimensions: List[Tuple[str, List[Any]]] = []
+    difficulty = settings.get("difficulty", {}).get("options")
+    if difficulty:
+        dimensions.append(("difficulty", list(difficulty)))
+
+    for name in MODE_SETTING_NAMES:
+        options = settings.get(name, {}).get("options")
+        if options:
+            dimensions.append((name, list(options)))
+            break
+    else:
+        if metadata.get("mode"):
+            dimensions.append(("mode", list(metadata["mode"])))
+
+    names = [name for name, _ in dimensions]
+    return [dict(zip(names, values)) for values in itertools.product(*(opts for _, opts in dimensions))]
+
+
+def _instance_state(instance) -> Dict[str, Any]:
+    state = {}
+    generators = {}
+    for k, v in instance.__dict__.items():
+        if isinstance(v, random.Random):
+            generators[k] = "random"
+        elif isinstance(v, np.random.Generator):
+            generators[k] = "numpy"
+        else:
+            state[k] = v
+    state[_RESEEDED_KEY] = generators
+    return state
+
+
+def _build_blob(type_name: str, params: Dict[str, Any], seed: int) -> bytes:
+    cls = _load_class(type_name)
+    try:
+        instance = cls(seed=seed, **params)
+    except (TypeError, ValueError):
+        # An empty blob means "not precomputed": the request builds it and reports the error.
+        return b""
+    return zlib.compress(pickle.dumps(_instance_state(instance), protocol=pickle.HIGHEST_PROTOCOL), 9)
+
+
+def build_store(type_name: str, out_dir: Path, seed_count: int, first_seed: int = 1, jobs: int = 1) -> Path:
+    cls = _load_class(type_name)
+    parameter_sets = enumerate_parameter_sets(type_name)
+    seeds = range(first_seed, first_seed + seed_count)
+
+    sections = []
+    blobs: List[bytes] = []
+    executor = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    try:
+        for params in parameter_sets:
+            logger.info("Precomputing %s %s for %d seeds", type_name, params, seed_count)
+            if executor is not None:
+                section_blobs = list(
+                    executor.map(_build_blob, itertools.repeat(type_name), itertools.repeat(params), seeds, chunksize=32)
+                )
+            else:
+                section_blobs = [_build_blob(type_name, params, seed) for seed in seeds]
+            sections.append({"params": params, "first_seed": first_seed, "count": seed_count})
+            blobs.extend(section_blobs)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # Table and blob offsets are relative to the end of the header.
+    position = 0
+    for section in sections:
+        section["table_offset"] = position
+        position += (section["count"] + 1) * _OFFSET.size
+
+    header = json.dumps(
+        {
+            "type": type_name,
+            "fingerprint": _generator_fingerprint(cls),
+            "sections": sections,
+        }
+    ).encode("utf-8")
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"{type_name}{STORE_SUFFIX}"
+    tmp_path = out_path.with_suffix(".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(STORE_MAGIC)
+        f.write(_HEADER_LENGTH.pack(len(header)))
+        f.write(header)
+
+        blob_cursor = position
+        blobs_iter = iter(blobs)
+        for section in sections:
+            offsets = [blob_cursor]
+            for _ in range(section["count"]):
+                blob_cursor += len(next(blobs_iter))
+                offsets.append(blob_cursor)
+            f.write(b"".join(_OFFSET.pack(offset) for offset in offsets))
+
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class InstanceStore:
+    def __init__(self, type_name: str, cls, path: Path):
+        self.type_name = type_name
+        self.cls = cls
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mm[: len(STORE_MAGIC)] != STORE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an instance store")
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mm, len(STORE_MAGIC))
+        header_start = len(STORE_MAGIC) + _HEADER_LENGTH.size
+        header = json.loads(self._mm[header_start : header_start + header_length])
+        self._data_start = header_start + header_length
+
+        self.fingerprint = header["fingerprint"]
+        self.sections = {_section_key(s["params"]): s for s in header["sections"]}
+        self.dimensions = {name for s in header["sections"] for name in s["params"]}
+        self.hits = 0
+        self.misses = 0
+
+    def close(self) -> None:
+        self._mm.close()
+        self._file.close()
+
+    def _section_for(self, kwargs: Dict[str, Any]) -> Dict[str, Any] | None:
+        params = {k: v for k, v in kwargs.items() if k != "seed"}
+        if not set(params) <= self.dimensions:
+            return None
+
+        defaults = inspect.signature(self.cls.__init__).parameters
+        for name in self.dimensions:
+            if name not in params and name in defaults:
+                params[name] = defaults[name].default
+        return self.sections.get(_section_key(params))
+
+    def draw_seed(self, kwargs: Dict[str, Any], rng: random.Random = random) -> int | None:
+        section = self._section_for(kwargs)
+        if section is None:
+            return None
+        return rng.randrange(section["first_seed"], section["first_seed"] + section["count"])
+
+    def load(self, kwargs: Dict[str, Any]):
+        seed = kwargs.get("seed")
+        section = self._section_for(kwargs)
+        if not isinstance(seed, int) or section is None:
+            return None
+
+        index = seed - section["first_seed"]
+        if not 0 <= index < section["count"]:
+            self.misses += 1
+            return None
+
+        table_position = self._data_start + section["table_offset"] + index * _OFFSET.size
+        start, end = struct.unpack_from("<QQ", self._mm, table_position)
+        if start == end:
+            self.misses += 1
+            return None
+
+        state = pickle.loads(zlib.decompress(self._mm[self._data_start + start : self._data_start + end]))
+        generators = state.pop(_RESEEDED_KEY, {})
+        instance = self.cls.__new__(self.cls)
+        instance.__dict__.update(state)
+        for name, kind in generators.items():
+            seed = instance.__dict__.get("seed")
+            setattr(instance, name, np.random.default_rng(seed) if kind == "numpy" else random.Random(seed))
+        self.hits += 1
+        return instance
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sections": len(self.sections),
+            "seeds": sum(s["count"] for s in self.sections.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_stores: Dict[str, InstanceStore] = {}
+
+
+def load_instance_stores(question_generators: Dict[str, Dict[str, Any]], store_dir: Path = INSTANCE_STORE_DIR) -> None:
+    for store in _stores.values():
+        store.close()
+    _stores.clear()
+
+    if not INSTANCE_STORE_ENABLED or not store_dir.is_dir():
+        return
+
+    for type_name, generator in question_generators.items():
+        path = store_dir / f"{type_name}{STORE_SUFFIX}"
+        if not path.is_file():
+            continue
+        try:
+            store = InstanceStore(type_name, generator["class"], path)
+        except Exception:
+            logger.exception("Failed to open instance store", extra={"type_name": type_name})
+            continue
+        if store.fingerprint != _generator_fingerprint(generator["class"]):
+            logger.warning("Ignoring stale instance store for %s; rebuild it", type_name)
+            store.close()
+            continue
+        _stores[type_name] = store
+
+
+def assign_precomputed_seed(type_name: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Draw unseeded requests from the precomputed range so they hit the store."""
+    store = _stores.get(type_name)
+    if store is None or kwargs.get("seed") is not None:
+        return kwargs
+    seed = store.draw_seed(kwargs)
+    if seed is None:
+        return kwargs
+    return {**kwargs, "seed": seed}
+
+
+def load_precomputed_instance(type_name: str, kwargs: Dict[str, Any]):
+    store = _stores.get(type_name)
+    if store is None:
+        return None
+    return store.load(kwargs)
+
+
+def instance_store_stats() -> Dict[str, Any]:
+    return {type_name: store.stats() for type_name, store in _stores.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute question instances for rejection-sampled generators")
+    parser.add_argument(
+        "--types",
+        nargs="*",
+        help="Question types to precompute (default: every type with 'precompute_seeds' in QUESTION_CONFIG)",
+    )
+    parser.add_argument("--seeds", type=int, help="Seeds per (difficulty, mode); overrides 'precompute_seeds'")
+    parser.add_argument("--first-seed", type=int, default=1)
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--out", default=str(INSTANCE_STORE_DIR))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    type_names = args.types or [name for name, cfg in QUESTION_CONFIG.items() if cfg.get("precompute_seeds")]
+    for type_name in type_names:
+        if type_name not in QUESTION_CONFIG:
+            parser.error(f"Unknown question type '{type_name}'")
+        seed_count = args.seeds or QUESTION_CONFIG[type_name].get("precompute_seeds") or 1000
+        path = build_store(type_name, Path(args.out), seed_count, first_seed=args.first_seed, jobs=args.jobs)
+        print(f"[+] Wrote {path} ({path.stat().st_size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
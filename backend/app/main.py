@@ -1,6 +1,10 @@
+import asyncio
+import gc
+import math
 import os
 import inspect
 import logging
+import time
 from contextlib import asynccontextmanager
 from datetime import date, datetime
 from json import JSONDecodeError
@@ -11,18 +15,48 @@ from zoneinfo import ZoneInfo
 from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from mongoengine import connect, disconnect
 from mongoengine.connection import get_db
 from pydantic import BaseModel, Field
 
-from app.errors import DependencyUnavailableError
+from app.errors import (
+    DependencyUnavailableError,
+    InvalidQuestionRequestError,
+    QuestionCancelledError,
+    QuestionCostLimitError,
+    QuestionDeadlineExceededError,
+)
 from app.models.bug_report_model import BugReport
-from app.routes.auth import ensure_rate_limit_indexes, require_password_changed, router as auth_router
+from app.routes.auth import (
+    ensure_rate_limit_indexes,
+    ensure_session_indexes,
+    mongo_breaker,
+    rate_limiter,
+    require_admin_token,
+    require_password_changed,
+    router as auth_router,
+    session_cache,
+)
 
+from .cancellation import SUPERSEDED_MESSAGE, CancelToken, preview_registry
+from .circuit_breaker import CIRCUIT_RESET_SECONDS, CircuitOpenError
 from .config import QUESTION_CONFIG, WEEK_CONFIG
+from .cost_policy import apply_cost_policy
 from .generator_loader import load_question_generators
-from .question_types.sql_query_helper import ping_sql_database
+from .instance_store import instance_store_stats, load_instance_stores
+from .password_hashing import password_hasher
+from .question_cache import question_instance_cache
+from .question_execution import question_executor
+from .rate_limit import RATE_LIMIT_FLUSH_SECONDS
+from .question_types.sql_admission import sql_admission
+from .question_types.sql_pool import sql_pool
+from .question_types.sql_query_helper import ping_sql_database, sql_breaker
+from .question_types.relational_algebra_memo import relalg_memo
+from .question_types.relational_algebra_predicate import compile_predicate
+from .question_types.schema_registry import schema_registry
+from .question_types.sql_result_cache import sql_result_cache
 
 
 def _setup_logging() -> None:
@@ -40,6 +74,33 @@ logger = logging.getLogger(__name__)
 APP_DIR = Path(__file__).resolve().parent
 APP_ENV = os.getenv("APP_ENV", "development").lower()
 STRICT_GENERATOR_LOADING = os.getenv("STRICT_GENERATOR_LOADING", "false").lower() == "true"
+PREVIEW_POLL_SECONDS = float(os.getenv("PREVIEW_POLL_SECONDS", "0.25"))
+READY_PROBE_INTERVAL_SECONDS = float(os.getenv("READY_PROBE_INTERVAL_SECONDS", "5"))
+
+# Written by the background probe, read by /ready.
+dependency_status: Dict[str, Any] = {"mongo": False, "sql": False, "checked_at": None}
+
+
+async def _probe_dependencies() -> None:
+    while True:
+        dependency_status.update(
+            mongo=await run_in_threadpool(_mongo_is_ready),
+            sql=await run_in_threadpool(_sql_is_ready),
+            checked_at=time.time(),
+        )
+        await asyncio.sleep(READY_PROBE_INTERVAL_SECONDS)
+
+
+async def _poll_session_versions() -> None:
+    while True:
+        await asyncio.sleep(session_cache.poll_seconds)
+        await run_in_threadpool(session_cache.poll_versions)
+
+
+async def _flush_rate_limits() -> None:
+    while True:
+        await asyncio.sleep(RATE_LIMIT_FLUSH_SECONDS)
+        await run_in_threadpool(rate_limiter.flush)
 
 
 @asynccontextmanager
@@ -49,14 +110,44 @@ async def lifespan(_: FastAPI):
     try:
         connect(host=MONGO_URL)
         ensure_rate_limit_indexes()
+        ensure_session_indexes()
     except Exception:
         logger.exception("Failed to connect to MongoDB during startup")
         if APP_ENV == "production":
             raise
 
     question_generators = load_question_generators(strict=STRICT_GENERATOR_LOADING)
+    load_instance_stores(question_generators)
+    schema_registry.load_all()
+    try:
+        await run_in_threadpool(question_executor.start)
+        await run_in_threadpool(password_hasher.start)
+    except Exception:
+        logger.exception("Failed to start worker processes")
+        if APP_ENV == "production":
+            raise
+    # Everything loaded so far lives for the whole process. Keep it out of the
+    # collector so full collections neither scan it nor dirty its pages in forked children.
+    gc.collect()
+    gc.freeze()
+    background_tasks = [
+        asyncio.create_task(_probe_dependencies()),
+        asyncio.create_task(_poll_session_versions()),
+        asyncio.create_task(_flush_rate_limits()),
+    ]
     yield
 
+    for task in background_tasks:
+        task.cancel()
+
+    await run_in_threadpool(question_executor.shutdown)
+    await run_in_threadpool(password_hasher.shutdown)
+
+    try:
+        rate_limiter.flush()
+    except Exception:
+        logger.exception("Failed to flush rate limit counters")
+
     try:
         disconnect()
     except Exception:
@@ -87,22 +178,53 @@ def health():
     return {"status": "ok"}
 
 
+@app.exception_handler(CircuitOpenError)
+async def circuit_open(_: Request, error: CircuitOpenError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(math.ceil(CIRCUIT_RESET_SECONDS))},
+    )
+
+
 @app.get("/ready")
 def ready():
     details = {
-        "mongo": _mongo_is_ready(),
-        "sql": _sql_is_ready(),
+        "mongo": dependency_status["mongo"],
+        "sql": dependency_status["sql"],
         "generators_loaded": bool(question_generators),
     }
     if not all(details.values()):
-        raise HTTPException(status_code=503, detail={"status": "degraded", "details": details})
-    return {"status": "ok", "details": details}
+        raise HTTPException(
+            status_code=503,
+            detail={"status": "degraded", "details": details, "checked_at": dependency_status["checked_at"]},
+        )
+    return {"status": "ok", "details": details, "checked_at": dependency_status["checked_at"]}
+
+
+@app.get("/metrics")
+def metrics(_: Any = Depends(require_admin_token)):
+    return {
+        "question_cache": question_instance_cache.stats(),
+        "instance_store": instance_store_stats(),
+        "question_execution": question_executor.stats(),
+        "session_cache": session_cache.stats(),
+        "rate_limiter": rate_limiter.stats(),
+        "password_hashing": password_hasher.stats(),
+        "sql_admission": sql_admission.stats(),
+        "sql_result_cache": sql_result_cache.stats(),
+        "schema_registry": schema_registry.stats(),
+        "relalg_memo": relalg_memo.stats(),
+        "relalg_predicate_cache": compile_predicate.cache_info()._asdict(),
+        "sql_pool": sql_pool.stats(),
+        "preview_cancellation": preview_registry.stats(),
+        "circuit_breakers": {"sql": sql_breaker.stats(), "mongo": mongo_breaker.stats()},
+    }
 
 
 def _mongo_is_ready() -> bool:
     try:
-        db = get_db()
-        db.command("ping")
+        mongo_breaker.call(lambda: get_db().command("ping"))
         return True
     except Exception:
         logger.warning("Mongo readiness check failed")
@@ -193,19 +315,11 @@ def filter_kwargs_for_class(cls, kwargs: Dict[str, Any]) -> Dict[str, Any]:
     return {k: v for k, v in kwargs.items() if k in allowed}
 
 
-def serialize(obj):
-    if hasattr(obj, '__dict__'):
-        return {
-            k: serialize(v)
-            for k, v in obj.__dict__.items()
-            if not callable(v) and not k.startswith('_')
-        }
-    elif isinstance(obj, list):
-        return [serialize(i) for i in obj]
-    elif isinstance(obj, dict):
-        return {k: serialize(v) for k, v in obj.items()}
-    else:
-        return obj
+def bounded_question_kwargs(type_name: str, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    try:
+        return apply_cost_policy(type_name, kwargs)
+    except QuestionCostLimitError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 @app.get("/questions")
 def get_questions(_: Any = Depends(require_password_changed)):
@@ -222,7 +336,7 @@ def get_questions(_: Any = Depends(require_password_changed)):
 
 
 @app.get("/question/{type_name}")
-def get_question_by_type(type_name: str, request: Request, _: Any = Depends(require_password_changed)):
+async def get_question_by_type(type_name: str, request: Request, _: Any = Depends(require_password_changed)):
     if type_name not in question_generators:
         raise HTTPException(status_code=404, detail="Question type not found")
 
@@ -232,22 +346,26 @@ def get_question_by_type(type_name: str, request: Request, _: Any = Depends(requ
     QuestionClass = base_config["class"]
 
     raw_kwargs = query_params_to_kwargs(request)
-    kwargs = filter_kwargs_for_class(QuestionClass, raw_kwargs)
-
-    question = _build_question_instance(QuestionClass, kwargs)
-
-    layout = question.generate()
+    kwargs = bounded_question_kwargs(type_name, filter_kwargs_for_class(QuestionClass, raw_kwargs))
 
-    # difficulty may or may not exist; include if present
-    difficulty = getattr(question, "difficulty", None)
+    try:
+        question = await question_executor.run(type_name, QuestionClass, kwargs, "generate")
+    except InvalidQuestionRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuestionDeadlineExceededError as e:
+        logger.warning("Deadline exceeded while generating question", extra={"type_name": type_name})
+        raise HTTPException(status_code=503, detail=str(e))
+    except DependencyUnavailableError as e:
+        logger.exception("Dependency unavailable while generating question", extra={"type_name": type_name})
+        raise HTTPException(status_code=503, detail=str(e))
 
     return {
         "type": type_name,
-        "seed": getattr(question, "seed", None),
-        "difficulty": difficulty,
-        "exercise_name": getattr(question, "exercise", {}).get("name") if hasattr(question, "exercise") else None,
+        "seed": question["seed"],
+        "difficulty": question["difficulty"],
+        "exercise_name": question["exercise_name"],
         "metadata": base_config.get("metadata", {}),
-        "layout": serialize(layout),
+        "layout": question["layout"],
     }
 
 
@@ -267,27 +385,39 @@ async def evaluate_question(type_name: str, request: Request, _: Any = Depends(r
         raise HTTPException(status_code=400, detail="Invalid JSON body")
 
     raw_kwargs = query_params_to_kwargs(request)
-    kwargs = filter_kwargs_for_class(QuestionClass, raw_kwargs)
-
-    q = await run_in_threadpool(_build_question_instance, QuestionClass, kwargs)
+    kwargs = bounded_question_kwargs(type_name, filter_kwargs_for_class(QuestionClass, raw_kwargs))
 
     try:
-        result = await run_in_threadpool(q.evaluate, user_input)
+        return await question_executor.run(type_name, QuestionClass, kwargs, "evaluate", user_input)
+    except QuestionDeadlineExceededError as e:
+        logger.warning("Deadline exceeded while evaluating question", extra={"type_name": type_name})
+        raise HTTPException(status_code=503, detail=str(e))
     except DependencyUnavailableError as e:
         logger.exception("Dependency unavailable while evaluating question", extra={"type_name": type_name})
         raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
-    return {
-        "seed": getattr(q, "seed", None),
-        "difficulty": getattr(q, "difficulty", None),
-        "exercise_name": getattr(q, "exercise", {}).get("name") if hasattr(q, "exercise") else None,
-        "results": result,
-    }
+async def _run_preview(request: Request, token: CancelToken, call) -> Dict[str, Any]:
+    """Await ``call`` but give up as soon as the preview is superseded or the client goes away."""
+    task = asyncio.ensure_future(call)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=PREVIEW_POLL_SECONDS)
+            if done:
+                return task.result()
+            if not token.cancelled and await request.is_disconnected():
+                preview_registry.record_disconnect()
+                token.cancel()
+            if token.cancelled:
+                raise QuestionCancelledError(SUPERSEDED_MESSAGE)
+    finally:
+        if not task.done():
+            task.cancel()
+
 
 @app.post("/question/{type_name}/preview")
-async def preview_question(type_name: str, request: Request, _: Any = Depends(require_password_changed)):
+async def preview_question(type_name: str, request: Request, user: Any = Depends(require_password_changed)):
     if type_name not in question_generators:
         raise HTTPException(status_code=404, detail="Question type not found")
 
@@ -300,21 +430,42 @@ async def preview_question(type_name: str, request: Request, _: Any = Depends(re
         payload = await request.json()
     except (JSONDecodeError, ValueError):
         raise HTTPException(status_code=400, detail="Invalid JSON body")
-    statement = payload.get("statement", "")
+    preview_request = {"statement": payload.get("statement", "")}
+    for name in ("offset", "limit", "sequence"):
+        if payload.get(name) is not None:
+            try:
+                preview_request[name] = int(payload[name])
+            except (TypeError, ValueError):
+                raise HTTPException(status_code=400, detail=f"Invalid {name}")
+    sequence = preview_request.pop("sequence", None)
 
     raw_kwargs = query_params_to_kwargs(request)
-    kwargs = filter_kwargs_for_class(QuestionClass, raw_kwargs)
-
-    q = await run_in_threadpool(_build_question_instance, QuestionClass, kwargs)
+    kwargs = bounded_question_kwargs(type_name, filter_kwargs_for_class(QuestionClass, raw_kwargs))
 
-    if not hasattr(q, "preview"):
-        return {"columns": [], "rows": [], "error": "Preview not supported"}
+    # A newer preview from the same editor supersedes this one; without a sequence id
+    # the preview is only cancelled when the client disconnects.
+    registry_key = (user.username, type_name, str(payload.get("editor") or ""))
+    try:
+        token = preview_registry.begin(registry_key, sequence) if sequence is not None else CancelToken()
+    except QuestionCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
     try:
-        return await run_in_threadpool(q.preview, statement)
+        call = question_executor.run(type_name, QuestionClass, kwargs, "preview", preview_request, cancel_token=token)
+        return await _run_preview(request, token, call)
+    except InvalidQuestionRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except QuestionCancelledError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except QuestionDeadlineExceededError as e:
+        logger.warning("Deadline exceeded while previewing question", extra={"type_name": type_name})
+        raise HTTPException(status_code=503, detail=str(e))
     except DependencyUnavailableError as e:
         logger.exception("Dependency unavailable while previewing question", extra={"type_name": type_name})
         raise HTTPException(status_code=503, detail=str(e))
+    finally:
+        if sequence is not None:
+            preview_registry.finish(registry_key, token)
 
 
 @app.post("/bug-report")
@@ -326,9 +477,3 @@ async def create_bug_report(payload: BugReportRequest, user: Any = Depends(requi
     await run_in_threadpool(_save_bug_report, user.username, text)
     return {"message": "Feedback received"}
 
-
-def _build_question_instance(cls, kwargs: Dict[str, Any]):
-    try:
-        return cls(**kwargs)
-    except (TypeError, ValueError) as e:
-        raise HTTPException(status_code=400, detail=str(e))
@@ -1,8 +1,12 @@
 # backend/manage_users.py
 import csv
 import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
 from mongoengine import connect
+from pymongo.errors import BulkWriteError
 from passlib.context import CryptContext
+from models.session_model import Session
 from models.user_model import User
 
 # --- configuration ---
@@ -32,6 +36,7 @@ def delete_user(username):
     if not user:
         print(f"[!] User '{username}' not found.")
         return
+    Session.objects(user=user).delete()
     user.delete()
     print(f"[-] Deleted user '{username}'.")
 
@@ -46,16 +51,60 @@ def list_users():
     for u in users:
         print(f"{u.username:<20} {u.display_name or '-':<20} {str(u.must_change_password):<12}")
 
-def bulk_add_from_csv(csv_file):
+def bulk_add_from_csv(csv_file, jobs=None):
     """CSV format: username,password,display_name"""
     with open(csv_file, newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            create_user(
-                row["username"],
-                row["password"],
-                row.get("display_name"),
-            )
+        rows = list(csv.DictReader(f))
+
+    skipped = []
+    pending = {}
+    for row in rows:
+        username = (row.get("username") or "").strip()
+        if not username or username in pending:
+            skipped.append((username or "<empty>", "duplicate or empty username in CSV"))
+            continue
+        pending[username] = row
+
+    existing = {
+        doc["username"]
+        for doc in User._get_collection().find({"username": {"$in": list(pending)}}, {"username": 1})
+    }
+    for username in existing:
+        skipped.append((username, "already exists"))
+        del pending[username]
+
+    hashes = []
+    if pending:
+        # bcrypt is deliberately slow; hash the whole roster in parallel.
+        with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+            hashes = list(executor.map(hash_password, [row["password"] for row in pending.values()], chunksize=8))
+
+    docs = []
+    for (username, row), password_hash in zip(pending.items(), hashes):
+        user = User(
+            username=username,
+            password=password_hash,
+            display_name=row.get("display_name") or None,
+            must_change_password=True,
+        )
+        user.validate()
+        docs.append(user.to_mongo())
+
+    created = len(docs)
+    if docs:
+        try:
+            User._get_collection().insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Users created concurrently since the existence check.
+            for error in e.details.get("writeErrors", []):
+                skipped.append((docs[error["index"]]["username"], error.get("errmsg", "write failed")))
+            created -= len(e.details.get("writeErrors", []))
+
+    print(f"[+] Created {created} user(s) (must change password on first login).")
+    if skipped:
+        print(f"[!] Skipped {len(skipped)} user(s):")
+        for username, reason in skipped:
+            print(f"    {username}: {reason}")
 
 def main():
     parser = argparse.ArgumentParser(description="User management for auto-question-tool")
@@ -77,6 +126,7 @@ def main():
     # bulk add
     bulk = sub.add_parser("bulk", help="Bulk add users from CSV")
     bulk.add_argument("--file", required=True)
+    bulk.add_argument("--jobs", type=int, help="Parallel hashing processes (default: CPU count)")
 
     args = parser.parse_args()
 
@@ -89,7 +139,7 @@ def main():
     elif args.cmd == "list":
         list_users()
     elif args.cmd == "bulk":
-        bulk_add_from_csv(args.file)
+        bulk_add_from_csv(args.file, args.jobs)
 
 if __name__ == "__main__":
     main()
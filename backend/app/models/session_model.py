@@ -0,0 +1,27 @@
+from datetime import datetime, timezone
+
+from mongoengine import DateTimeField, Document, ReferenceField, StringField
+
+from .user_model import User
+
+
+def _now_utc() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Session(Document):
+    token_hash = StringField(required=True)
+    user = ReferenceField(User, required=True)
+    created_at = DateTimeField(required=True, default=_now_utc)
+    expires_at = DateTimeField(required=True)
+
+    meta = {
+        "collection": "sessions",
+        "indexes": [
+            {"fields": ["token_hash"], "unique": True},
+            # Mongo's TTL monitor deletes expired sessions.
+            {"fields": ["expires_at"], "expireAfterSeconds": 0},
+            "user",
+        ],
+        "auto_create_index": False,
+    }
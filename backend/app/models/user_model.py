@@ -1,9 +1,12 @@
-from mongoengine import BooleanField, DateTimeField, Document, StringField
+from mongoengine import BooleanField, Document, IntField, StringField
 
 class User(Document):
     username = StringField(required=True, unique=True)
     password = StringField(required=True)
     display_name = StringField()
     must_change_password = BooleanField(default=True)
-    session_token_hash = StringField(required=False, null=True)
-    session_expires_at = DateTimeField(required=False, null=True)
+    # Bumped on every session change so other workers can drop cached sessions.
+    session_version = IntField(default=0)
+
+    # Older documents still carry the session fields that moved to the sessions collection.
+    meta = {"strict": False}
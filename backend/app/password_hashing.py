@@ -0,0 +1,123 @@
+"""bcrypt off the request threadpool.
+
+Password hashing runs in a small dedicated process pool so a login storm
+neither holds the GIL of the web worker nor occupies the AnyIO threads that
+serve questions. At most ``AUTH_HASH_WORKERS + AUTH_HASH_QUEUE_SIZE`` hashes
+are in flight; beyond that callers get ``PasswordHasherSaturatedError`` and
+the endpoint answers 503 with ``Retry-After``.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict
+
+from passlib.context import CryptContext
+
+from .errors import DependencyUnavailableError, PasswordHasherSaturatedError
+
+logger = logging.getLogger(__name__)
+
+AUTH_HASH_WORKERS = max(1, int(os.getenv("AUTH_HASH_WORKERS", "2")))
+AUTH_HASH_QUEUE_SIZE = max(0, int(os.getenv("AUTH_HASH_QUEUE_SIZE", "64")))
+AUTH_HASH_RETRY_AFTER_SECONDS = max(1, int(os.getenv("AUTH_HASH_RETRY_AFTER_SECONDS", "2")))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password(plain: str, hashed: str) -> bool:
+    return pwd_context.verify(plain, hashed)
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        max_workers: int = AUTH_HASH_WORKERS,
+        queue_size: int = AUTH_HASH_QUEUE_SIZE,
+    ):
+        self.max_workers = max_workers
+        self.queue_size = queue_size
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def start(self) -> None:
+        pool = self._get_pool()
+        for future in [pool.submit(os.getpid) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.max_workers + self.queue_size:
+                self.rejected += 1
+                raise PasswordHasherSaturatedError("Too many sign-in requests, please retry")
+            self.in_flight += 1
+
+        pool = self._get_pool()
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+        except BrokenProcessPool as e:
+            logger.exception("Password hashing pool broke")
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise DependencyUnavailableError("Password hashing is temporarily unavailable") from e
+        finally:
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                self.in_flight -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain: str, hashed: str) -> bool:
+        return await self._run(verify_password, plain, hashed)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queue_size": self.queue_size,
+                "in_flight": self.in_flight,
+                "queue_depth": max(0, self.in_flight - self.max_workers),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_latency_ms": (self.total_seconds / self.completed * 1000) if self.completed else 0.0,
+                "max_latency_ms": self.max_seconds * 1000,
+            }
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,169 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+QUESTION_CACHE_ENABLED = os.getenv("QUESTION_CACHE_ENABLED", "true").lower() == "true"
+QUESTION_CACHE_MAX_ENTRIES = max(1, int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", "512")))
+QUESTION_CACHE_MAX_BYTES = max(1, int(os.getenv("QUESTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+QUESTION_CACHE_TTL_SECONDS = max(1, int(os.getenv("QUESTION_CACHE_TTL_SECONDS", "900")))
+# Objects visited when estimating the size of an instance.
+SIZE_ESTIMATE_MAX_OBJECTS = 4096
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate bytes held by an instance and the objects it references.
+
+    A bounded walk over ``sys.getsizeof``: much cheaper than serializing the
+    instance, and large enough to see the tables and trees a question keeps.
+    """
+    size = 0
+    seen = set()
+    pending = [value]
+    while pending and len(seen) < SIZE_ESTIMATE_MAX_OBJECTS:
+        obj = pending.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        size += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+            continue
+        if isinstance(obj, dict):
+            pending.extend(obj.keys())
+            pending.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            pending.extend(obj)
+        if hasattr(obj, "__dict__") and not isinstance(obj, type):
+            pending.append(vars(obj))
+    return size
+
+
+class QuestionInstanceCache:
+    """Bounded LRU/TTL cache for question instances.
+
+    Question instances are a pure function of their type and constructor kwargs
+    once a seed is fixed, and ``generate``/``evaluate``/``preview`` never mutate
+    them, so a single instance can be shared between the GET, preview and
+    evaluate requests of the same question.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = QUESTION_CACHE_MAX_ENTRIES,
+        max_bytes: int = QUESTION_CACHE_MAX_BYTES,
+        ttl_seconds: int = QUESTION_CACHE_TTL_SECONDS,
+        enabled: bool = QUESTION_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(type_name: str, kwargs: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, Any], ...]] | None:
+        # Without a seed the constructor draws a random one, so the instance is not reproducible.
+        if kwargs.get("seed") is None:
+            return None
+        try:
+            items = tuple(sorted(kwargs.items()))
+            hash(items)
+        except TypeError:
+            return None
+        return type_name, items
+
+    def get(self, key: Hashable) -> Any | None:
+        if not self.enabled or key is None:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, _, expires_at = entry
+            if expires_at <= now:
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if not self.enabled or key is None:
+            return
+
+        # Sized before taking the lock so lookups never wait on the estimate.
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_build(self, type_name: str, kwargs: Dict[str, Any], builder: Callable[[], Any]) -> Any:
+        key = self.make_key(type_name, kwargs)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        instance = builder()
+
+        if key is None and "seed" in kwargs:
+            return instance
+        if key is None:
+            # Unseeded requests draw a random seed; cache under that seed so the
+            # follow-up preview/evaluate calls for the returned seed hit.
+            seed = getattr(instance, "seed", None)
+            if seed is None:
+                return instance
+            key = self.make_key(type_name, {**kwargs, "seed": seed})
+
+        self.put(key, instance)
+        return instance
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+question_instance_cache = QuestionInstanceCache()
@@ -0,0 +1,203 @@
+"""Where question generators run.
+
+Every type in ``QUESTION_CONFIG`` may set ``"execution"`` to
+
+* ``"inline"``  - on the event loop, for trivial generators,
+* ``"thread"``  - in the AnyIO threadpool (default),
+* ``"process"`` - in a warm ``ProcessPoolExecutor`` whose workers have the
+  generator modules and instance stores preloaded.
+
+Types with ``"uses_sql_pool": True`` await a ``sql_pool`` reservation before
+preview and evaluate are dispatched on the MySQL backend, so bursts queue on
+the event loop instead of exhausting the database connections. The SQLite
+backend opens a connection per statement and needs no reservation.
+
+Process workers receive only ``(type_name, kwargs, action, payload)`` and send
+back the serialized layout/result, so CPU-bound types scale across cores
+without raising ``WEB_CONCURRENCY`` and duplicating the whole app per worker.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Dict
+
+from anyio import to_thread
+
+from .cancellation import CancelToken
+from .config import QUESTION_CONFIG
+from .cost_policy import deadline_seconds
+from .errors import DependencyUnavailableError, QuestionDeadlineExceededError
+from .question_service import run_question_action
+from .question_types import sql_query_helper
+from .question_types.sql_pool import sql_pool
+
+logger = logging.getLogger(__name__)
+
+EXECUTION_MODES = ("inline", "thread", "process")
+DEFAULT_EXECUTION_MODE = "thread"
+QUESTION_PROCESS_WORKERS = max(0, int(os.getenv("QUESTION_PROCESS_WORKERS", str(min(4, os.cpu_count() or 1)))))
+
+
+def execution_mode(type_name: str) -> str:
+    mode = QUESTION_CONFIG.get(type_name, {}).get("execution", DEFAULT_EXECUTION_MODE)
+    if mode not in EXECUTION_MODES:
+        logger.warning("Unknown execution mode %r for %s; using %s", mode, type_name, DEFAULT_EXECUTION_MODE)
+        return DEFAULT_EXECUTION_MODE
+    if mode == "process" and QUESTION_PROCESS_WORKERS == 0:
+        return DEFAULT_EXECUTION_MODE
+    return mode
+
+
+# --- worker side -------------------------------------------------------------
+
+_worker_generators: Dict[str, Dict[str, Any]] = {}
+
+
+def _init_worker() -> None:
+    global _worker_generators
+
+    from .generator_loader import load_question_generators
+    from .instance_store import load_instance_stores
+
+    type_names = {name for name in QUESTION_CONFIG if execution_mode(name) == "process"}
+    _worker_generators = {
+        name: generator for name, generator in load_question_generators().items() if name in type_names
+    }
+    load_instance_stores(_worker_generators)
+
+
+def _worker_ping() -> int:
+    return os.getpid()
+
+
+def _run_in_worker(
+    type_name: str, kwargs: Dict[str, Any], action: str, payload: Any, timeout: float
+) -> Dict[str, Any]:
+    generator = _worker_generators.get(type_name)
+    if generator is None:
+        raise DependencyUnavailableError(f"Question type '{type_name}' is not available in worker processes")
+    return run_question_action(type_name, generator["class"], kwargs, action, payload, timeout)
+
+
+# --- server side -------------------------------------------------------------
+
+
+class QuestionExecutor:
+    def __init__(self, max_workers: int = QUESTION_PROCESS_WORKERS):
+        self.max_workers = max_workers
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.calls = {mode: 0 for mode in EXECUTION_MODES}
+        self.restarts = 0
+        self.timeouts = 0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+                self.restarts += 1
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def start(self) -> None:
+        """Spawn and initialize all workers up front so the first request is not a cold start."""
+        if self.max_workers == 0 or not any(execution_mode(name) == "process" for name in QUESTION_CONFIG):
+            return
+        pool = self._get_pool()
+        for future in [pool.submit(_worker_ping) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    async def run(
+        self,
+        type_name: str,
+        cls,
+        kwargs: Dict[str, Any],
+        action: str,
+        payload: Any = None,
+        cancel_token: CancelToken | None = None,
+    ) -> Dict[str, Any]:
+        """Run one action; ``cancel_token`` reaches inline and thread calls (tokens cannot cross processes)."""
+        if self._uses_sql_pool(type_name, action):
+            async with sql_pool.reserve():
+                return await self._dispatch(type_name, cls, kwargs, action, payload, cancel_token)
+        return await self._dispatch(type_name, cls, kwargs, action, payload, cancel_token)
+
+    @staticmethod
+    def _uses_sql_pool(type_name: str, action: str) -> bool:
+        return (
+            action != "generate"
+            and sql_query_helper.SQL_BACKEND == "mysql"
+            and bool(QUESTION_CONFIG.get(type_name, {}).get("uses_sql_pool"))
+        )
+
+    async def _dispatch(
+        self,
+        type_name: str,
+        cls,
+        kwargs: Dict[str, Any],
+        action: str,
+        payload: Any,
+        cancel_token: CancelToken | None,
+    ) -> Dict[str, Any]:
+        mode = execution_mode(type_name)
+        timeout = deadline_seconds(type_name)
+        self.calls[mode] += 1
+
+        if mode == "inline":
+            return run_question_action(type_name, cls, kwargs, action, payload, timeout, cancel_token)
+
+        try:
+            if mode == "thread":
+                # Abandon the thread on timeout; check_deadline() ends it shortly after.
+                call = partial(run_question_action, type_name, cls, kwargs, action, payload, timeout, cancel_token)
+                return await asyncio.wait_for(to_thread.run_sync(call, abandon_on_cancel=True), timeout)
+            return await asyncio.wait_for(self._run_in_process(type_name, kwargs, action, payload, timeout), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise QuestionDeadlineExceededError("Question generation took too long, please retry")
+
+    async def _run_in_process(
+        self, type_name: str, kwargs: Dict[str, Any], action: str, payload: Any, timeout: float
+    ) -> Dict[str, Any]:
+        pool = self._get_pool()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(pool, _run_in_worker, type_name, kwargs, action, payload, timeout)
+        except BrokenProcessPool as e:
+            logger.exception("Question worker pool broke", extra={"type_name": type_name})
+            self._discard_pool(pool)
+            raise DependencyUnavailableError("Question worker crashed, please retry") from e
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "process_workers": self.max_workers,
+            "process_pool_running": self._pool is not None,
+            "process_pool_restarts": self.restarts,
+            "calls": dict(self.calls),
+            "timeouts": self.timeouts,
+            "modes": {name: execution_mode(name) for name in QUESTION_CONFIG},
+        }
+
+
+question_executor = QuestionExecutor()
@@ -0,0 +1,100 @@
+import inspect
+from typing import Any, Dict
+
+from .cancellation import CancelToken, cancellation_scope
+from .cost_policy import deadline
+from .errors import InvalidQuestionRequestError
+from .instance_store import assign_precomputed_seed, load_precomputed_instance
+from .question_cache import question_instance_cache
+
+QUESTION_ACTIONS = ("generate", "evaluate", "preview")
+PREVIEW_PAGE_PARAMETERS = ("offset", "limit")
+
+
+def serialize(obj):
+    if hasattr(obj, '__dict__'):
+        return {
+            k: serialize(v)
+            for k, v in obj.__dict__.items()
+            if not callable(v) and not k.startswith('_')
+        }
+    elif isinstance(obj, list):
+        return [serialize(i) for i in obj]
+    elif isinstance(obj, dict):
+        return {k: serialize(v) for k, v in obj.items()}
+    else:
+        return obj
+
+
+def build_question_instance(cls, kwargs: Dict[str, Any]):
+    try:
+        return cls(**kwargs)
+    except (TypeError, ValueError) as e:
+        raise InvalidQuestionRequestError(str(e)) from e
+
+
+def get_question_instance(type_name: str, cls, kwargs: Dict[str, Any]):
+    kwargs = assign_precomputed_seed(type_name, kwargs)
+    return question_instance_cache.get_or_build(
+        type_name,
+        kwargs,
+        lambda: load_precomputed_instance(type_name, kwargs) or build_question_instance(cls, kwargs),
+    )
+
+
+def _question_summary(question) -> Dict[str, Any]:
+    return {
+        "seed": getattr(question, "seed", None),
+        # difficulty may or may not exist; include if present
+        "difficulty": getattr(question, "difficulty", None),
+        "exercise_name": getattr(question, "exercise", {}).get("name") if hasattr(question, "exercise") else None,
+    }
+
+
+def run_question_action(
+    type_name: str,
+    cls,
+    kwargs: Dict[str, Any],
+    action: str,
+    payload: Any = None,
+    deadline_seconds: float | None = None,
+    cancel_token: CancelToken | None = None,
+) -> Dict[str, Any]:
+    """Build (or reuse) the question and run one endpoint action on it.
+
+    Returns plain, picklable data so the same call can run inline, in a thread
+    or in a worker process.
+    """
+    with deadline(deadline_seconds), cancellation_scope(cancel_token):
+        return _run_question_action(type_name, cls, kwargs, action, payload)
+
+
+def _run_question_action(type_name: str, cls, kwargs: Dict[str, Any], action: str, payload: Any) -> Dict[str, Any]:
+    question = get_question_instance(type_name, cls, kwargs)
+
+    if action == "generate":
+        return {**_question_summary(question), "layout": serialize(question.generate())}
+
+    if action == "evaluate":
+        return {**_question_summary(question), "results": question.evaluate(payload)}
+
+    if action == "preview":
+        if not hasattr(question, "preview"):
+            return {"columns": [], "rows": [], "error": "Preview not supported"}
+        return _preview(question, payload)
+
+    raise ValueError(f"Unknown question action '{action}'")
+
+
+def _preview(question, payload: Any) -> Dict[str, Any]:
+    """Call ``preview`` with the statement and, if it accepts them, the page parameters."""
+    if not isinstance(payload, dict):
+        return question.preview(payload)
+
+    accepted = inspect.signature(question.preview).parameters
+    page = {
+        name: payload[name]
+        for name in PREVIEW_PAGE_PARAMETERS
+        if payload.get(name) is not None and name in accepted
+    }
+    return question.preview(payload.get("statement", ""), **page)
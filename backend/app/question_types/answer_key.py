@@ -0,0 +1,34 @@
+"""Lazily computed answer keys.
+
+A question's ``__init__`` only builds the problem instance, i.e. everything
+``generate()`` needs to lay the question out. Data that is only needed for
+grading (enumerated solution paths, reduction state spaces, ...) is built by
+``_build_answer_key()`` on first access to ``answer_key`` and memoized on the
+instance, so a plain ``GET /question/{type}`` never pays for it while repeated
+``evaluate()`` calls on a cached instance compute it once.
+"""
+
+from abc import ABC, abstractmethod
+
+
+class LazyAnswerKey(ABC):
+    @abstractmethod
+    def _build_answer_key(self) -> dict:
+        """Grading data, built on first access to ``answer_key``."""
+
+    @property
+    def answer_key(self) -> dict:
+        key = self.__dict__.get("_answer_key")
+        if key is None:
+            # Building the key is deterministic, so a concurrent duplicate build is harmless.
+            key = self._build_answer_key()
+            self.__dict__["_answer_key"] = key
+        return key
+
+    def _reset_answer_key(self) -> None:
+        self.__dict__.pop("_answer_key", None)
+
+
+def answer_key_field(name: str) -> property:
+    """Expose one answer-key entry as a read-only instance attribute."""
+    return property(lambda self: self.answer_key[name], doc=f"``{name}`` from the lazily built answer key.")
@@ -1,6 +1,7 @@
 import json
 import random
 
+from app.cost_policy import check_deadline
 from app.question_types.frequent_itemset_helper import (
     format_itemset,
     format_probability,
@@ -61,6 +62,7 @@ class AprioriAlgorithmQuestion:
     def _initialize_instance(self):
         chosen = None
         for attempt in range(70):
+            check_deadline()
             local_rng = random.Random(self.seed + attempt)
             base_items, transactions = generate_transaction_dataset(
                 local_rng,
@@ -3,6 +3,7 @@ import random
 import re
 from itertools import combinations
 
+from app.cost_policy import check_deadline
 from app.question_types.frequent_itemset_helper import (
     format_itemset,
     format_probability,
@@ -172,6 +173,7 @@ class AssociationRuleMiningQuestion:
         chosen = None
 
         for attempt in range(160):
+            check_deadline()
             local_rng = random.Random(self.seed + attempt)
             base_items, transactions = generate_transaction_dataset(
                 local_rng,
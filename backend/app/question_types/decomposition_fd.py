@@ -1,4 +1,5 @@
 from app.common import *
+from app.cost_policy import check_deadline
 
 
 # Per-difficulty configuration.
@@ -95,6 +96,7 @@ class DecompositionFDQuestion:
         fallback = None
 
         for _ in range(800):
+            check_deadline()
             fds = self._generate_fds()
             frags = self._generate_decomposition()
             outcome = (self._lossless(frags, fds), self._preserving(frags, fds))
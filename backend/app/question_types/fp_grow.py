@@ -4,6 +4,7 @@ import math
 import random
 import re
 
+from app.cost_policy import check_deadline
 from app.question_types.frequent_itemset_helper import (
     format_itemset,
     format_probability,
@@ -101,6 +102,7 @@ class FPGrowthAlgorithmQuestion:
     def _initialize_instance(self):
         chosen = None
         for attempt in range(120):
+            check_deadline()
             local_rng = random.Random(self.seed + attempt)
             base_items, transactions = generate_transaction_dataset(
                 local_rng,
@@ -4,6 +4,8 @@ import random
 
 import numpy as np
 
+from app.cost_policy import check_deadline
+from app.question_types.answer_key import LazyAnswerKey, answer_key_field
 from app.resources.number_norm_helper import normalize_number
 from app.resources.synonyms import synonym_pairs
 
@@ -15,7 +17,11 @@ DIFFICULTY_SETTINGS = {
 }
 
 
-class HungarianMethodQuestion:
+class HungarianMethodQuestion(LazyAnswerKey):
+    step_routes = answer_key_field("step_routes")
+    valid_assignment_tuples = answer_key_field("valid_assignment_tuples")
+    expected_assignment_tuple = answer_key_field("expected_assignment_tuple")
+
     def __init__(self, seed=None, difficulty="easy", mode="steps"):
         self.difficulty = difficulty.lower()
         config = DIFFICULTY_SETTINGS.get(self.difficulty, DIFFICULTY_SETTINGS["easy"])
@@ -39,9 +45,7 @@ class HungarianMethodQuestion:
         self.numbers = []
         self.step1_matrix = tuple()
         self.step2_matrix = tuple()
-        self.step_routes = []
-        self.valid_assignment_tuples = []
-        self.expected_assignment_tuple = tuple()
+        self.first_route_step4_matrices = []
 
         self._initialize_instance_for_requested_depth()
 
@@ -165,6 +169,7 @@ class HungarianMethodQuestion:
         routes = []
 
         def recurse(current_matrix, chosen_covers, step4_matrices):
+            check_deadline()
             combs, lines = self.step_three(current_matrix, self.matrix_size)
             cover_options = [self._cover_to_tuple(c) for c in combs]
 
@@ -199,11 +204,41 @@ class HungarianMethodQuestion:
         recurse(step2, [], [])
         return step1_tuple, step2_tuple, routes
 
+    def _route_depths_for_numbers(self, numbers):
+        """Depths of all routes plus the step-4 matrices of the first route.
+
+        Enough to pick an instance and lay it out; the routes themselves (with
+        their assignments) are only enumerated for grading.
+        """
+        step1 = self.step_one(self.matrix_size, numbers)
+        step2 = self.step_two(step1)
+
+        depths = set()
+        first_route_step4 = []
+
+        def recurse(current_matrix, step4_matrices):
+            combs, lines = self.step_three(current_matrix, self.matrix_size)
+
+            if lines == self.matrix_size:
+                if combs:
+                    if not depths:
+                        first_route_step4.extend(step4_matrices)
+                    depths.add(len(step4_matrices))
+                return
+
+            for comb in combs:
+                adjusted = self.step_four(comb, np.array(current_matrix, copy=True), self.matrix_size)
+                recurse(adjusted, step4_matrices + [self._matrix_to_tuple(adjusted)])
+
+        recurse(step2, [])
+        return self._matrix_to_tuple(step1), self._matrix_to_tuple(step2), depths, first_route_step4
+
     def _initialize_instance_for_requested_depth(self):
         max_attempts = 350
         first_candidate = None
 
         for attempt in range(max_attempts):
+            check_deadline()
             attempt_seed = self.seed + attempt
             numbers = self.random_numbers(
                 self.matrix_size * self.matrix_size,
@@ -211,25 +246,24 @@ class HungarianMethodQuestion:
                 attempt_seed,
             )
 
-            step1, step2, routes = self._build_routes_for_numbers(numbers)
-            if not routes:
+            step1, step2, depths, first_route_step4 = self._route_depths_for_numbers(numbers)
+            if not depths:
                 continue
 
             candidate = {
                 "numbers": numbers,
                 "step1": step1,
                 "step2": step2,
-                "routes": routes,
+                "first_route_step4": first_route_step4,
             }
             if first_candidate is None:
                 first_candidate = candidate
 
-            depths = {r["depth"] for r in routes}
             if len(depths) == 1 and self.steps in depths:
                 self.numbers = numbers
                 self.step1_matrix = step1
                 self.step2_matrix = step2
-                self.step_routes = routes
+                self.first_route_step4_matrices = first_route_step4
                 break
         else:
             if first_candidate is None:
@@ -237,14 +271,22 @@ class HungarianMethodQuestion:
             self.numbers = first_candidate["numbers"]
             self.step1_matrix = first_candidate["step1"]
             self.step2_matrix = first_candidate["step2"]
-            self.step_routes = first_candidate["routes"]
-            self.steps = self.step_routes[0]["depth"]
+            self.first_route_step4_matrices = first_candidate["first_route_step4"]
+            self.steps = len(self.first_route_step4_matrices)
+
+    def _build_answer_key(self):
+        _, _, routes = self._build_routes_for_numbers(self.numbers)
 
         all_assignments = set()
-        for route in self.step_routes:
+        for route in routes:
             all_assignments.update(route["assignment_tuples"])
-        self.valid_assignment_tuples = sorted(all_assignments)
-        self.expected_assignment_tuple = self.valid_assignment_tuples[0] if self.valid_assignment_tuples else tuple()
+        valid_assignment_tuples = sorted(all_assignments)
+
+        return {
+            "step_routes": routes,
+            "valid_assignment_tuples": valid_assignment_tuples,
+            "expected_assignment_tuple": valid_assignment_tuples[0] if valid_assignment_tuples else tuple(),
+        }
 
     # ------------------------------------------------------------------
     # Layout helpers
@@ -284,16 +326,16 @@ class HungarianMethodQuestion:
             return self._as_values(self.step2_matrix)
 
         source_idx = step_index - 2
-        if self.step_routes and len(self.step_routes[0]["step4_matrices"]) > source_idx:
-            return self._as_values(self.step_routes[0]["step4_matrices"][source_idx])
+        if len(self.first_route_step4_matrices) > source_idx:
+            return self._as_values(self.first_route_step4_matrices[source_idx])
         return None
 
     def _source_values_for_terminal_cover_step(self):
         if self.steps == 0:
             return self._as_values(self.step2_matrix)
 
-        if self.step_routes and self.step_routes[0]["step4_matrices"]:
-            return self._as_values(self.step_routes[0]["step4_matrices"][self.steps - 1])
+        if self.first_route_step4_matrices:
+            return self._as_values(self.first_route_step4_matrices[self.steps - 1])
         return None
 
     def _generate_steps_layout(self):
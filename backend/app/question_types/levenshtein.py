@@ -2,11 +2,17 @@ import json
 import random
 from pathlib import Path
 
+from app.cost_policy import check_deadline
+from app.question_types.answer_key import LazyAnswerKey, answer_key_field
+
 
 RESOURCE_PATH = Path(__file__).resolve().parent.parent / "resources" / "levenshtein" / "word_pairs.json"
 
 
-class LevenshteinQuestion:
+class LevenshteinQuestion(LazyAnswerKey):
+    valid_paths = answer_key_field("valid_paths")
+    valid_paths_sorted = answer_key_field("valid_paths_sorted")
+
     def __init__(self, seed=None, difficulty="easy"):
         self.difficulty = str(difficulty).lower()
         if self.difficulty not in {"easy", "medium", "hard"}:
@@ -24,8 +30,13 @@ class LevenshteinQuestion:
 
         self.word_a, self.word_b = rng.choice(pool)
         self.dp = self._build_dp(self.word_a, self.word_b)
-        self.valid_paths = self._build_all_optimal_paths(self.word_a, self.word_b, self.dp)
-        self.valid_paths_sorted = sorted(self.valid_paths)
+
+    def _build_answer_key(self):
+        valid_paths = self._build_all_optimal_paths(self.word_a, self.word_b, self.dp)
+        return {
+            "valid_paths": valid_paths,
+            "valid_paths_sorted": sorted(valid_paths),
+        }
 
     def _build_dp(self, a, b):
         rows = len(a) + 1
@@ -68,6 +79,7 @@ class LevenshteinQuestion:
             key = (i, j)
             if key in memo:
                 return memo[key]
+            check_deadline()
             if i == m and j == n:
                 memo[key] = {""}
                 return memo[key]
@@ -101,7 +113,6 @@ class LevenshteinQuestion:
         return "".join(ch for ch in text if ch in {"C", "R", "D", "I"})
 
     def generate(self):
-        valid_paths_text = ", ".join(self.valid_paths_sorted)
         return {
             "view1": [
                 {
@@ -1,6 +1,7 @@
 import itertools
 
 from app.common import *
+from app.cost_policy import check_deadline
 
 
 # Per-difficulty configuration.
@@ -109,6 +110,7 @@ class NormalFormsFDQuestion:
     def _first_interesting_fds(self):
         fallback = None
         for _ in range(800):
+            check_deadline()
             fds = self._generate_fds()
             if fallback is None:
                 fallback = fds
@@ -120,6 +122,7 @@ class NormalFormsFDQuestion:
         """Best-effort: find an interesting FD set whose FD-based NF == target."""
         fallback = None
         for _ in range(800):
+            check_deadline()
             fds = self._generate_fds()
             if not self._is_interesting(fds):
                 continue
@@ -3,10 +3,23 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 import json
-from app.question_types.relational_algebra_helper import load_schema, execute_relational_algebra
+from app.errors import QuestionCancelledError
+from app.question_types.relational_algebra_helper import execute_relational_algebra
+from app.question_types.schema_registry import schema_registry
 
 APP_DIR = Path(__file__).resolve().parents[1]
 RESOURCES_DIR = APP_DIR / "resources"
+EXERCISES_DIR = RESOURCES_DIR / "relational_algebra_exercises"
+
+
+def _load_exercises():
+    with open(EXERCISES_DIR / "exercises.json", "r", encoding="utf-8") as f:
+        exercises = json.load(f)["exercises"]
+    results = {ex["result_path"]: pd.read_csv(EXERCISES_DIR / ex["result_path"], index_col=0) for ex in exercises}
+    return exercises, results
+
+
+EXERCISES, EXERCISE_RESULTS = _load_exercises()
 
 DIFFICULTY_SETTINGS = {
     "easy": {"min": 1, "max": 10 },
@@ -25,11 +38,7 @@ class RelationalAlgebra:
         self.np_rng = np.random.default_rng(self.seed)
 
         #Aufgabenauswahl
-        exercises_path = RESOURCES_DIR / "relational_algebra_exercises" / "exercises.json"
-        with open(exercises_path, "r", encoding="utf-8") as f:
-            exercises = json.load(f)["exercises"]
-        
-        filtered = [ex for ex in exercises if ex["difficulty"] == self.difficulty]
+        filtered = [ex for ex in EXERCISES if ex["difficulty"] == self.difficulty]
         if not filtered:
             raise ValueError(f"No relational algebra exercises found for difficulty '{self.difficulty}'.")
 
@@ -43,12 +52,20 @@ class RelationalAlgebra:
         else:
             self.exercise = self.rng.choice(filtered)
 
-        schema_path = RESOURCES_DIR / "schemas" / self.exercise["schema"]
-        _, dfs = load_schema(str(schema_path))
-        self.dfs = dfs
-        result_path = RESOURCES_DIR / "relational_algebra_exercises" / self.exercise["result_path"]
-        df = pd.read_csv(result_path, index_col=0)
-        self.exercise_res = df
+        schema_registry.get(self.exercise["schema"])
+
+    # Shared per process, so they stay out of the instance state that is cached and pickled.
+    @property
+    def schema(self):
+        return schema_registry.get(self.exercise["schema"])
+
+    @property
+    def dfs(self):
+        return self.schema.relations
+
+    @property
+    def exercise_res(self):
+        return EXERCISE_RESULTS[self.exercise["result_path"]]
 
     def generate(self):
         base = {}
@@ -56,14 +73,7 @@ class RelationalAlgebra:
         schema = [
             {
                 "type": "SchemaGrid",
-                "tables": [
-                    {
-                        "title": name,
-                        "columns": [c.split(".", 1)[1] for c in df.columns],
-                        "rows": df.values.tolist()[:2],  # nur erste 2 Zeilen
-                    }
-                    for name, df in self.dfs.items()
-                ],
+                "tables": self.schema.preview(),  # je Relation die ersten 2 Zeilen
             }
         ]
             
@@ -175,7 +185,7 @@ class RelationalAlgebra:
         results = {}
         statement = user_input.get('0')
         try:
-            res_df, execution_string= execute_relational_algebra(self.dfs, statement)
+            res_df, execution_string= execute_relational_algebra(self.dfs, statement, self.exercise["schema"])
         except:
             results['0'] = {"correct": False, "expected": self.exercise['answer']}
             return results
@@ -204,7 +214,7 @@ class RelationalAlgebra:
             }
 
         try:
-            res_df, tree = execute_relational_algebra(self.dfs, statement)
+            res_df, tree = execute_relational_algebra(self.dfs, statement, self.exercise["schema"])
 
             preview_rows = res_df.head(10).values.tolist() if res_df is not None else []
 
@@ -215,6 +225,8 @@ class RelationalAlgebra:
                 "error": None
             }
 
+        except QuestionCancelledError:
+            raise
         except Exception as e:
             return {
                 "columns": [],
@@ -1,15 +1,45 @@
 import os
 import re
 import json
-import ast
 
+import numpy as np
 import pandas as pd
 
+from app.cancellation import check_cancelled
+from app.errors import QuestionCancelledError
+from app.question_types.relational_algebra_plan import (
+    Difference,
+    Filter,
+    Join,
+    Numbered,
+    Product,
+    Projection,
+    Prune,
+    Relation,
+    RenameAttribute,
+    RenameRelation,
+    Selection,
+    parse_plan,
+    plan_tree,
+    walk,
+)
+from app.question_types.relational_algebra_memo import relalg_memo
+from app.question_types.relational_algebra_optimizer import optimize
+from app.question_types.relational_algebra_predicate import (
+    compile_conditions,
+    compile_predicate,
+    invalid_predicate_message,
+    split_equi_join,
+)
 
 RELALG_MAX_RESULT_ROWS = int(os.getenv("RELALG_MAX_RESULT_ROWS", "10000"))
 RELALG_MAX_JOINS = int(os.getenv("RELALG_MAX_JOINS", "5"))
 TOO_MANY_ROWS_MESSAGE = "The result set contains too many rows to preview."
+RELALG_MAX_CROSS_PRODUCT_ROWS = int(os.getenv("RELALG_MAX_CROSS_PRODUCT_ROWS", "5000000"))
 TOO_MANY_JOINS_MESSAGE = f"A maximum of {RELALG_MAX_JOINS} joins is allowed."
+CROSS_PRODUCT_TOO_LARGE_MESSAGE = (
+    "The join condition contains no equality between the two relations and the cross product is too large."
+)
 
 def load_schema(schema_folder: str, prefix_attributes: bool = True):
     schema_path = os.path.join(schema_folder, "schema.json")
@@ -34,23 +64,8 @@ def load_schema(schema_folder: str, prefix_attributes: bool = True):
 
     return config, dataframes
 
-def parse_predicate(predicate):
-    expr = predicate.strip()
-    expr = re.sub(r'\bAND\b', '&', expr, flags=re.IGNORECASE)
-    expr = re.sub(r'\bOR\b',  r'|', expr, flags=re.IGNORECASE)
-    expr = re.sub(r'\bNOT\b', r'~', expr, flags=re.IGNORECASE)
-
-    #'=' zu '==' umwandeln
-    expr = re.sub(r'(?<![<>=!])=(?!=)', '==', expr)
-    return expr
-
-def prepare_predicate(df, predicate):
-    for col in sorted(df.columns, key=len, reverse=True): #col zu df['col']
-        pattern = r'\b' + re.escape(col) + r'\b'
-        predicate = re.sub(pattern, f'df[{col!r}]', predicate)
-    return predicate
-
 def rename_relation(df, new_name):
+    check_cancelled()
     new_name = str(new_name).strip()
     if not new_name:
         raise ValueError(
@@ -64,6 +79,7 @@ def rename_relation(df, new_name):
     return df.rename(columns=new_cols)
 
 def rename_attribute(df, attribute, new_name):
+    check_cancelled()
     if attribute not in df.columns:
         raise ValueError(
             f'Das Attribut "{attribute}" existiert in der Relation nicht und kann daher nicht umbenannt werden.'
@@ -72,21 +88,68 @@ def rename_attribute(df, attribute, new_name):
     return df.rename(columns=new_cols)
 
 def join(df1, df2, predicate):
-    df = df1.merge(df2, how="cross")
-    df = selection(df, predicate)
+    check_cancelled()
+    left, right = tuple(df1.columns), tuple(df2.columns)
+    if set(left) & set(right):
+        # Columns of the cross product, including pandas' suffixes for clashing names.
+        columns = tuple(df1.iloc[:0].merge(df2.iloc[:0], how="cross").columns)
+    else:
+        columns = left + right
+    return _join(df1, df2, compile_predicate(predicate, columns))
+
+def _join(df1, df2, compiled):
+    if compiled is None:
+        if len(df1.index) * len(df2.index) > RELALG_MAX_CROSS_PRODUCT_ROWS:
+            raise ValueError(CROSS_PRODUCT_TOO_LARGE_MESSAGE)
+        return df1.merge(df2, how="cross")
+
+    keys, residual = split_equi_join(compiled, tuple(df1.columns), tuple(df2.columns))
+    hashable = (
+        keys
+        and df1.columns.intersection(df2.columns).empty
+        and all(df1[left].dtype == df2[right].dtype for left, right in keys)
+    )
+    if hashable:
+        df = _hash_join(df1, df2, keys)
+        if residual is None:
+            return df
+        return _filter(df, residual)
+
+    if len(df1.index) * len(df2.index) > RELALG_MAX_CROSS_PRODUCT_ROWS:
+        raise ValueError(CROSS_PRODUCT_TOO_LARGE_MESSAGE)
+    return _filter(df1.merge(df2, how="cross"), compiled)
+
+def _hash_join(df1, df2, keys):
+    """Inner equi-join with the rows, order and index labels the cross product plus filter would give."""
+    names = [f"key{i}" for i in range(len(keys))]
+
+    def positions(df, columns, label):
+        # Missing values never compare equal, but merge would pair them up.
+        present = np.flatnonzero(df[columns].notna().all(axis=1).to_numpy())
+        frame = pd.DataFrame({name: df[column].to_numpy()[present] for name, column in zip(names, columns)})
+        frame[label] = present
+        return frame
+
+    pairs = positions(df1, [left for left, _ in keys], "left").merge(
+        positions(df2, [right for _, right in keys], "right"), on=names, how="inner", sort=False
+    )
+    order = np.lexsort((pairs["right"].to_numpy(), pairs["left"].to_numpy()))
+    left = pairs["left"].to_numpy()[order]
+    right = pairs["right"].to_numpy()[order]
+
+    df = pd.concat([df1.iloc[left].reset_index(drop=True), df2.iloc[right].reset_index(drop=True)], axis=1)
+    df.index = pd.Index(left * len(df2.index) + right, dtype="int64")
     return df
 
 def selection(df, predicate):
-    predicate = parse_predicate(predicate)
-    predicate = prepare_predicate(df, predicate)
+    check_cancelled()
+    return _filter(df, compile_predicate(predicate, tuple(df.columns)))
+
+def _filter(df, compiled):
     try:
-        parsed = ast.parse(predicate, mode="eval")
-        _validate_predicate_ast(parsed)
-        mask = eval(compile(parsed, "<relalg-predicate>", "eval"), {"__builtins__": {}}, {"df": df})
+        mask = compiled.mask(df)
     except Exception as e:
-        raise ValueError(
-            f'Ungültiges Selektionsprädikat: "{predicate}". Bitte prüfen Sie die Schreibweise und die verwendeten Attribute.'
-        ) from e
+        raise ValueError(invalid_predicate_message(compiled.text)) from e
 
     if not isinstance(mask, pd.Series) or mask.dtype != bool:
         raise ValueError(
@@ -96,6 +159,7 @@ def selection(df, predicate):
     return df[mask]
 
 def projection(df, attributes):
+    check_cancelled()
     missing = [a for a in attributes if a not in df.columns]
     if missing:
         raise ValueError(
@@ -104,6 +168,7 @@ def projection(df, attributes):
     return df[attributes].drop_duplicates().copy()
 
 def diff(df1, df2):
+    check_cancelled()
     a1 = [c.split('.',1)[1] for c in df1.columns] #columns without dots
     a2 = [c.split('.',1)[1] for c in df2.columns]
 
@@ -120,373 +185,8 @@ def diff(df1, df2):
     out.columns = df1.columns #restore columns
     return out
 
-def get_matching_close_paren(s):
-    if not s or s[0] != '(':
-        return None
-
-    depth = 0
-    for i, ch in enumerate(s):
-        if ch == '(':
-            depth += 1
-        elif ch == ')':
-            depth -= 1
-            if depth == 0:
-                return s[:i+1]
-
-    return None
-
-def get_matching_open_paren(s):
-    balance = 0
-    for i in range(len(s) - 1, -1, -1):
-        if s[i] == ')':
-            balance += 1
-        elif s[i] == '(':
-            balance -= 1
-        if balance < 0: # stop when more '(' than ')' 
-            return s[i+1:] # ( Vorlesungen --> returns Vorlesungen 
-    return s
-
-def parse_selection(statement):
-    pattern = r'\\selection\{([^}]*)\}\('
-    while True:
-        matches = list(re.finditer(pattern, statement)) #replaces \selection{}() with selection(predicate, df) from right to left
-        if not matches:
-            break
-        m = matches[-1] #begin with last match
-        start, end = m.span()
-        parentheses_block = get_matching_close_paren(statement[end-1:]) #returns parentheses block, e.g. \selection{...}( A (B)) --> ( A (B))
-        if parentheses_block is None:
-            raise ValueError("Fehler bei SELECTION: Die Klammern nach \\selection{...} sind nicht korrekt geschlossen.")
-        predicate = m.group(1)
-        replacement = f'selection({parentheses_block}, "{predicate}")'
-        statement = statement[:start] + replacement + statement[end-1+len(parentheses_block):]
-    return statement
-
-def parse_projection(statement):
-    pattern = r'\\projection\{([^}]*)\}\('
-    while True:
-        matches = list(re.finditer(pattern, statement))
-        if not matches:
-            break
-        m = matches[-1] #begin with last match
-        start, end = m.span()
-        parentheses_block = get_matching_close_paren(statement[end-1:])
-        if parentheses_block is None:
-            raise ValueError("Fehler bei PROJECTION: Die Klammern nach \\projection{...} sind nicht korrekt geschlossen.")
-        predicate = m.group(1)
-        attrs = [f'{x.strip()}' for x in predicate.split(',')]
-        replacement = f'projection({parentheses_block}, {attrs})'
-        statement = statement[:start] + replacement + statement[end-1+len(parentheses_block):]
-    return statement
-
-def parse_relations(statement, relations):
-    elements = "|".join(map(re.escape, relations))
-    pattern = rf'\b({elements})\b(?!\.)'#searches for all occurences without a dot, i.e. Prof but not Prof.
-    def repl(match):
-        relation = match.group(1)
-        return f"dfs['{relation}']"
-
-    statement = re.sub(pattern, repl, statement)
-    return statement
-
-def parse_join(statement):
-    pattern = r'\\join\{([^}]*)\}\('
-    while True:
-            matches = list(re.finditer(pattern, statement))
-            if not matches:
-                break
-            m = matches[-1] #begin with last match
-            start, end = m.span()
-            left = get_matching_open_paren(statement[:start])
-            right = get_matching_close_paren(statement[end-1:])
-            if right is None:
-                raise ValueError("Fehler bei JOIN: Die Klammern nach \\join{...} sind nicht korrekt geschlossen.")
-            predicate = m.group(1)
-            replacement = f'join({left}, {right}, "{predicate}")'
-            statement = statement[:start - len(left)] + replacement + statement[end - 1 + len(right):]
-    return statement
-
-def parse_rename_relation(statement):
-    pattern = r'\\_rename_relation\{([^}]*)\}\('
-    while True:
-        matches = list(re.finditer(pattern, statement))
-        if not matches:
-            break
-        m = matches[-1] #begin with last match
-        start, end = m.span()
-        right = get_matching_close_paren(statement[end-1:])
-        if right is None:
-            raise ValueError("Fehler beim RENAME RELATION: Die Klammern sind nicht korrekt geschlossen.")
-        new_name = m.group(1)
-        if not new_name:
-            raise ValueError("Der Relations-RENAME-Operator erwartet einen neuen Relationsnamen: \\_rename_relation{NeuerName}(Relation).")
-        replacement = f'rename_relation({right}, "{new_name}")'
-        statement = statement[:start] + replacement + statement[end-1+len(right):]
-    return statement
-
-def parse_diff(statement):
-    pattern = r'\\diff\{([^}]*)\}\('
-    while(True):
-        matches = list(re.finditer(pattern, statement))
-        if not matches:
-            break
-        m = matches[-1] #begin with last match
-        start, end = m.span()
-        left = get_matching_open_paren(statement[:start])
-        right = get_matching_close_paren(statement[end-1:])
-        if right is None:
-            raise ValueError("Fehler bei DIFFERENZ: Die Klammern nach \\diff{...} sind nicht korrekt geschlossen.")
-        replacement = f'diff({left}, {right})'
-        statement = statement[:start-len(left)] + replacement + statement[end-1+len(right):]
-    return statement
-
-def parse_rename_attribute(statement):
-    pattern = r'\\_rename_attribute\{([^}]*)\}\('
-    while True:
-        matches = list(re.finditer(pattern, statement))
-        if not matches:
-            break
-        m = matches[-1] #begin with last match
-        start, end = m.span()
-        right = get_matching_close_paren(statement[end-1:])
-        if right is None:
-            raise ValueError("Fehler beim RENAME ATTRIBUTE: Die Klammern sind nicht korrekt geschlossen.")
-        predicate = m.group(1)
-        attributes = [p.strip() for p in predicate.split(",") if p.strip()]
-        if len(attributes) != 2:
-            raise ValueError("Der Attribut-RENAME-Operator erwartet genau zwei Attribute: \\rename_attribute{altesAttribut, neuesAttribut}.")
-        old_name = attributes[0]
-        new_name = attributes[1]
-        replacement = f'rename_attribute({right}, "{old_name}", "{new_name}")'
-        statement = statement[:start] + replacement + statement[end-1+len(right):]
-    return statement
-
-def parse_statement(statement, relations):
-    statement = parse_relations(statement, relations)
-    statement = parse_rename_relation(statement)
-    statement = parse_rename_attribute(statement)
-    statement = parse_selection(statement)
-    statement = parse_projection(statement)
-    statement = parse_join(statement)
-    statement = parse_diff(statement)
-    return statement
-
-RA_FUNCS = {
-    "join",
-    "projection",
-    "selection",
-    "diff",
-    "rename_attribute",
-    "rename_relation",
-}
-
-def _unparse(node: ast.AST) -> str:
-    return ast.unparse(node)
-
-def _const_str(node: ast.AST) -> str:
-    if isinstance(node, ast.Constant) and isinstance(node.value, str):
-        return node.value
-    return _unparse(node)
-
-def _leaf_name(node: ast.AST) -> str:
-    """
-    Pretty-print leaves, especially dfs['hoeren'] -> 'hoeren'.
-    """
-    if (
-        isinstance(node, ast.Subscript)
-        and isinstance(node.value, ast.Name)
-        and node.value.id == "dfs"
-    ):
-        sl = node.slice
-        if isinstance(sl, ast.Constant) and isinstance(sl.value, str):
-            return sl.value
-    return _unparse(node)
-
-
-def build_tree_from_ast(node: ast.AST) -> dict:
-    """
-    Returns dicts like:
-    { "name": "join (cond)", "children": [...] }
-    """
-    if isinstance(node, ast.Call):
-        if isinstance(node.func, ast.Name):
-            func_name = node.func.id
-        else:
-            func_name = _unparse(node.func)
-
-        args = list(node.args)
-
-        if func_name not in RA_FUNCS:
-            return {
-                "name": func_name,
-                "children": [build_tree_from_ast(arg) for arg in args],
-            }
-
-        # --- join(left, right, cond) ---
-        if func_name == "join":
-            left = build_tree_from_ast(args[0]) if len(args) > 0 else {"name": "?"}
-            right = build_tree_from_ast(args[1]) if len(args) > 1 else {"name": "?"}
-
-            if len(args) > 2:
-                cond = _const_str(args[2])
-                name = f"join ({cond})"
-            else:
-                name = "join"
-
-            return {
-                "name": name,
-                "children": [left, right],
-            }
-
-        # --- projection(df, attributes) ---
-        if func_name == "projection":
-            df_node = build_tree_from_ast(args[0]) if len(args) > 0 else {"name": "?"}
-            node_dict = {
-                "name": "projection",
-                "children": [df_node],
-            }
-            if len(args) > 1:
-                attrs_node = args[1]
-                if isinstance(attrs_node, ast.List):
-                    attrs = [_const_str(elt) for elt in attrs_node.elts]
-                else:
-                    attrs = [_const_str(attrs_node)]
-                node_dict["name"] = f"projection ({repr(attrs)})"
-            return node_dict
-
-        # --- selection(df, condition) ---
-        if func_name == "selection":
-            df_node = build_tree_from_ast(args[0]) if len(args) > 0 else {"name": "?"}
-            if len(args) > 1:
-                cond = _const_str(args[1])
-                name = f"selection ({cond})"
-            else:
-                name = "selection"
-            return {
-                "name": name,
-                "children": [df_node],
-            }
-
-        # --- diff(df1, df2) ---
-        if func_name == "diff":
-            left = build_tree_from_ast(args[0]) if len(args) > 0 else {"name": "?"}
-            right = build_tree_from_ast(args[1]) if len(args) > 1 else {"name": "?"}
-            return {
-                "name": "diff",
-                "children": [left, right],
-            }
-
-        # --- rename_attribute(df, old_attr, new_attr) ---
-        if func_name == "rename_attribute":
-            df_node = build_tree_from_ast(args[0]) if len(args) > 0 else {"name": "?"}
-            old_attr = _const_str(args[1]) if len(args) > 1 else "?"
-            new_attr = _const_str(args[2]) if len(args) > 2 else "?"
-            return {
-                "name": f"rename_attribute ({old_attr} -> {new_attr})",
-                "children": [df_node],
-            }
-
-        # --- rename_relation(df, new_name) ---
-        if func_name == "rename_relation":
-            df_node = build_tree_from_ast(args[0]) if len(args) > 0 else {"name": "?"}
-            new_name = _const_str(args[1]) if len(args) > 1 else "?"
-            return {
-                "name": f"rename_relation ({new_name})",
-                "children": [df_node],
-            }
-
-        # Fallback
-        return {
-            "name": func_name,
-            "children": [build_tree_from_ast(arg) for arg in args],
-        }
-
-    # Leaf
-    return {"name": _leaf_name(node)}
-
-
-def build_tree_from_statement(parsed_statement: str) -> dict:
-    expr = ast.parse(parsed_statement, mode="eval").body
-    return build_tree_from_ast(expr)
-
-
-def _validate_predicate_ast(node: ast.AST) -> None:
-    allowed_nodes = (
-        ast.Expression,
-        ast.BinOp,
-        ast.BitAnd,
-        ast.BitOr,
-        ast.UnaryOp,
-        ast.Invert,
-        ast.Compare,
-        ast.Name,
-        ast.Load,
-        ast.Subscript,
-        ast.Constant,
-        ast.Eq,
-        ast.NotEq,
-        ast.Lt,
-        ast.LtE,
-        ast.Gt,
-        ast.GtE,
-    )
-
-    for child in ast.walk(node):
-        if not isinstance(child, allowed_nodes):
-            raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
-
-        if isinstance(child, ast.Name) and child.id != "df":
-            raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
-
-        if isinstance(child, ast.Subscript):
-            if not (isinstance(child.value, ast.Name) and child.value.id == "df"):
-                raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
-            if not (isinstance(child.slice, ast.Constant) and isinstance(child.slice.value, str)):
-                raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
-
-
-def _validate_ra_ast(node: ast.AST, max_nodes: int = 800) -> None:
-    allowed_func_names = RA_FUNCS
-    allowed_name_nodes = set(allowed_func_names) | {"dfs"}
-    allowed_nodes = (
-        ast.Expression,
-        ast.Call,
-        ast.Name,
-        ast.Load,
-        ast.Constant,
-        ast.List,
-        ast.Tuple,
-        ast.Subscript,
-    )
-
-    node_count = 0
-    for child in ast.walk(node):
-        node_count += 1
-        if node_count > max_nodes:
-            raise ValueError("Der Ausdruck ist zu komplex.")
-
-        if not isinstance(child, allowed_nodes):
-            raise ValueError("Ungültiger Ausdruck.")
-
-        if isinstance(child, ast.Call):
-            if not isinstance(child.func, ast.Name) or child.func.id not in allowed_func_names:
-                raise ValueError("Ungültiger Operator im Ausdruck.")
-
-        if isinstance(child, ast.Name) and child.id not in allowed_name_nodes:
-            raise ValueError("Ungültiger Ausdruck.")
-
-        if isinstance(child, ast.Subscript):
-            if not (isinstance(child.value, ast.Name) and child.value.id == "dfs"):
-                raise ValueError("Ungültiger Ausdruck.")
-            if not (isinstance(child.slice, ast.Constant) and isinstance(child.slice.value, str)):
-                raise ValueError("Ungültiger Ausdruck.")
-
-        if isinstance(child, ast.Constant) and not isinstance(child.value, str):
-            raise ValueError("Ungültiger Ausdruck.")
-
 def normalize(s):
     s = restore_ops(s)
-    s = disambiguate_rename(s)
     return re.sub(r"\s+", "", s)
 
 def restore_ops(s):
@@ -498,49 +198,53 @@ def restore_ops(s):
          .replace("ρ", r"\_rename")
     )
 
-def disambiguate_rename(s: str) -> str:
-    pattern = r'\\_rename(\s*)\{([^}]*)\}'
-    def repl(match):
-        space = match.group(1)  
-        inner = match.group(2)   
-        parts = [p.strip() for p in inner.split(",") if p.strip()]
-        if len(parts) == 2:
-            op = r"\_rename_attribute"
-        elif len(parts) ==1:
-            op = r"\_rename_relation"
-        else:
-            raise ValueError("Der RENAME-Operator erwartet entweder ein Argument (Relation umbenennen) oder zwei Argumente (Attribut umbenennen).")
-        return f"{op}{space}{{{inner}}}"
-    
-    return re.sub(pattern, repl, s)
-
-def execute_relational_algebra(dfs, statement):
-    relations = list(dfs.keys())
-
-    env = {
-        "projection": projection,
-        "join": join,
-        "selection": selection,
-        "rename_relation": rename_relation,
-        "diff": diff,
-        "rename_attribute": rename_attribute,
-        "dfs": dfs,
-    }
+def execute_plan(plan, dfs):
+    if isinstance(plan, Relation):
+        return dfs[plan.name]
+    if isinstance(plan, Join):
+        return join(execute_plan(plan.left, dfs), execute_plan(plan.right, dfs), plan.predicate)
+    if isinstance(plan, Difference):
+        return diff(execute_plan(plan.left, dfs), execute_plan(plan.right, dfs))
+    if isinstance(plan, Selection):
+        return selection(execute_plan(plan.child, dfs), plan.predicate)
+    if isinstance(plan, Projection):
+        return projection(execute_plan(plan.child, dfs), list(plan.attributes))
+    if isinstance(plan, RenameAttribute):
+        return rename_attribute(execute_plan(plan.child, dfs), plan.attribute, plan.new_name)
+    if isinstance(plan, RenameRelation):
+        return rename_relation(execute_plan(plan.child, dfs), plan.new_name)
+
+    if isinstance(plan, Product):
+        left, right = execute_plan(plan.left, dfs), execute_plan(plan.right, dfs)
+        check_cancelled()
+        return _join(left, right, compile_conditions(plan.conditions))
+    df = execute_plan(plan.child, dfs)
+    check_cancelled()
+    if isinstance(plan, Filter):
+        return _filter(df, compile_conditions(plan.conditions))
+    if isinstance(plan, Prune):
+        return df[list(plan.columns)]
+    if isinstance(plan, Numbered):
+        return df.assign(**{plan.column: np.arange(len(df.index))})
+    order = np.lexsort([df[column].to_numpy() for column in reversed(plan.order_by)])
+    return df.iloc[order][list(plan.columns)]
+
+def execute_relational_algebra(dfs, statement, schema=None):
     try:
-        statement = normalize(statement)
-        join_count = len(re.findall(r"\\join\{", statement, flags=re.IGNORECASE))
-        if join_count > RELALG_MAX_JOINS:
+        plan = parse_plan(normalize(statement), dfs.keys())
+        if sum(isinstance(node, Join) for node in walk(plan)) > RELALG_MAX_JOINS:
             raise ValueError(TOO_MANY_JOINS_MESSAGE)
-        statement = parse_statement(statement, relations)
-        expression_ast = ast.parse(statement, mode="eval")
-        _validate_ra_ast(expression_ast)
-        tree = build_tree_from_statement(statement)
-        compiled = compile(expression_ast, "<relalg-expression>", "eval")
-        result = eval(compiled, {"__builtins__": {}}, env)
+        tree = plan_tree(plan)
+        key = None
+        if schema is not None and relalg_memo.enabled:
+            plan, dfs, key = relalg_memo.reuse(plan, dfs, schema)
+        result = execute_plan(optimize(plan, dfs), dfs)
         if len(result.index) > RELALG_MAX_RESULT_ROWS:
             raise ValueError(TOO_MANY_ROWS_MESSAGE)
-    except ValueError:
-        raise # schon "schöne" Fehler, einfach durchreichen
+        if key is not None:
+            relalg_memo.put(key, result)
+    except (ValueError, QuestionCancelledError):
+        raise # schon "schöne" Fehler bzw. Abbruch, einfach durchreichen
     except Exception as e:
         raise ValueError("Bei der Auswertung des relationalen Algebra-Ausdrucks ist ein Fehler aufgetreten. Bitte prüfen Sie die Eingabe.") from e
 
@@ -0,0 +1,116 @@
+"""Memoized results of relational algebra expressions.
+
+The live preview re-runs the whole expression on every edit, although
+usually only a small part of it changed. Results are kept in a byte-bounded
+LRU keyed by the canonical digest of the parsed plan (see
+``relational_algebra_plan.plan_digests``). Before a plan is optimized,
+``reuse`` replaces every subtree whose result is memoized by a relation
+holding that result. A join previewed on its own, say
+``hoeren\\join{...}(Studierende)``, is then not recomputed while a selection
+around it is edited, and students working on the same exercise share
+results.
+
+Only plans over registered schemas are memoized: their relations never
+change, and the digest of a relation includes the schema name. Cached frames
+are shared between requests and must not be modified in place, just like
+the schema's relations.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Mapping, Optional, Tuple
+
+import pandas as pd
+
+from app.question_types.relational_algebra_plan import Plan, Relation, plan_digests
+
+RELALG_MEMO_ENABLED = os.getenv("RELALG_MEMO_ENABLED", "true").lower() == "true"
+RELALG_MEMO_MAX_BYTES = max(1, int(os.getenv("RELALG_MEMO_MAX_BYTES", str(64 * 1024 * 1024))))
+
+
+def _estimate_size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+class PlanMemo:
+    def __init__(self, max_bytes: int = RELALG_MEMO_MAX_BYTES, enabled: bool = RELALG_MEMO_ENABLED):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._entries: "OrderedDict[Hashable, Tuple[pd.DataFrame, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> None:
+        size = _estimate_size(df)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def reuse(
+        self, plan: Plan, relations: Mapping[str, pd.DataFrame], schema: str
+    ) -> Tuple[Plan, Mapping[str, pd.DataFrame], bytes]:
+        """``plan`` with memoized subtrees replaced, the relations it runs on and the digest to store its result under."""
+        digests = plan_digests(plan, schema)
+        memoized: Dict[str, pd.DataFrame] = {}
+
+        def visit(node: Plan) -> Plan:
+            if isinstance(node, Relation):
+                return node
+            digest = digests[id(node)]
+            df = self.get(digest)
+            if df is not None:
+                name = f"#{digest.hex()}"  # never a relation name of a schema
+                memoized[name] = df
+                return Relation(name)
+            fields = {f: visit(getattr(node, f)) for f in ("child", "left", "right") if f in node._fields}
+            return node._replace(**fields)
+
+        reused = visit(plan)
+        if memoized:
+            relations = {**relations, **memoized}
+        return reused, relations, digests[id(plan)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+relalg_memo = PlanMemo()
@@ -0,0 +1,317 @@
+"""Rule-based optimizer for relational algebra plans.
+
+Students write expressions in textbook order, e.g. a selection on top of a
+chain of joins. ``optimize`` rewrites the parsed plan before it is executed;
+the operator tree shown in the frontend is still rendered from the plan as
+written.
+
+Joins and selections are flattened into chains: the leaves in written order
+and the conjuncts of all join and selection predicates. Then
+
+* conjuncts that only use the columns of one leaf are applied to that leaf
+  (selection pushdown),
+* every leaf keeps only the columns that are used above it (projection
+  pushdown; duplicates are kept, so row counts do not change),
+* chains of three or more leaves are joined smallest first, preferring leaves
+  connected to the joined ones by a conjunct, and every conjunct is applied at
+  the first join that has its columns.
+
+The cross product guard of the operators counts the rows of both join inputs,
+so a chain is only reordered (or a nested join flattened) if every join in the
+new order is a hash join. Otherwise the leaves are joined in written order,
+where no intermediate result is larger than in the plan as written, and nested
+joins are left as written.
+
+The result has the columns and the row order of the plan as written. If the
+leaves are joined in a different order, their row positions are carried
+along and the rows are sorted back afterwards.
+
+Plans the optimizer cannot type statically (unknown or clashing columns,
+invalid predicates, ...) are returned unchanged, so their errors come from
+the operators as before.
+"""
+
+import ast
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.question_types.relational_algebra_plan import (
+    Difference,
+    Filter,
+    Join,
+    Numbered,
+    Plan,
+    Product,
+    Projection,
+    Prune,
+    Relation,
+    RenameAttribute,
+    RenameRelation,
+    Restore,
+    Selection,
+)
+from app.question_types.relational_algebra_predicate import column_name, compile_predicate, conjuncts
+
+# Share of rows assumed to pass a condition when estimating leaf sizes.
+SELECTIVITY = 0.5
+POSITION_COLUMN = "#{}"
+
+
+class _Unsupported(Exception):
+    pass
+
+
+class Condition(NamedTuple):
+    expression: str
+    columns: FrozenSet[str]
+    equality: Optional[Tuple[str, str]]  # the two columns of a ``a = b`` conjunct
+
+
+class _Optimizer:
+    def __init__(self, relations: Mapping[str, pd.DataFrame]):
+        self.relations = relations
+        self._schemas: Dict[Plan, Tuple[Tuple[str, np.dtype], ...]] = {}
+
+    def schema(self, plan: Plan) -> Tuple[Tuple[str, np.dtype], ...]:
+        """``(column, dtype)`` for the output of a parsed plan, as the operators would produce it."""
+        if plan not in self._schemas:
+            schema = self._infer_schema(plan)
+            if len({column for column, _ in schema}) != len(schema):
+                raise _Unsupported
+            self._schemas[plan] = schema
+        return self._schemas[plan]
+
+    def columns(self, plan: Plan) -> Tuple[str, ...]:
+        return tuple(column for column, _ in self.schema(plan))
+
+    def _infer_schema(self, plan: Plan) -> Tuple[Tuple[str, np.dtype], ...]:
+        if isinstance(plan, Relation):
+            df = self.relations[plan.name]
+            return tuple((column, df[column].dtype) for column in df.columns)
+        if isinstance(plan, Join):
+            left, right = self.schema(plan.left), self.schema(plan.right)
+            if set(self.columns(plan.left)) & set(self.columns(plan.right)):
+                raise _Unsupported  # pandas would add suffixes
+            return left + right
+        if isinstance(plan, Difference):
+            left = self.schema(plan.left)
+            attributes = {c.split(".", 1)[-1]: dtype for c, dtype in left}
+            if len(attributes) != len(left) or attributes != {c.split(".", 1)[-1]: d for c, d in self.schema(plan.right)}:
+                raise _Unsupported
+            return left
+        if isinstance(plan, Selection):
+            return self.schema(plan.child)
+        if isinstance(plan, Projection):
+            child = dict(self.schema(plan.child))
+            if not set(plan.attributes) <= set(child):
+                raise _Unsupported
+            return tuple((column, child[column]) for column in plan.attributes)
+        if isinstance(plan, RenameAttribute):
+            child = self.schema(plan.child)
+            if plan.attribute not in dict(child):
+                raise _Unsupported
+            return tuple((plan.new_name if c == plan.attribute else c, dtype) for c, dtype in child)
+        return tuple((_renamed(c, plan.new_name), dtype) for c, dtype in self.schema(plan.child))
+
+    def conditions(self, predicate: str, schema: Sequence[Tuple[str, np.dtype]]) -> List[Condition]:
+        """The conjuncts of ``predicate``, prepared against the columns of ``schema``."""
+        numeric = {column: pd.api.types.is_numeric_dtype(dtype) for column, dtype in schema}
+        try:
+            parsed = compile_predicate(predicate, tuple(numeric)).parsed
+        except ValueError:
+            raise _Unsupported
+        conditions = []
+        for conjunct in conjuncts(parsed.body):
+            columns = frozenset(column_name(node) for node in ast.walk(conjunct) if isinstance(node, ast.Subscript))
+            if not columns:
+                raise _Unsupported  # a constant is only a valid mask next to a column condition
+            if _mixed_ordering(conjunct, numeric):
+                raise _Unsupported  # raises or not depending on which rows reach it
+            conditions.append(Condition(ast.unparse(conjunct), columns, _equality(conjunct)))
+        return conditions
+
+    def estimate(self, plan: Plan) -> float:
+        if isinstance(plan, Relation):
+            return len(self.relations[plan.name].index)
+        if isinstance(plan, Join):
+            return self.estimate(plan.left) * self.estimate(plan.right)
+        if isinstance(plan, Difference):
+            return self.estimate(plan.left)
+        if isinstance(plan, Selection):
+            return self.estimate(plan.child) * SELECTIVITY
+        return self.estimate(plan.child)
+
+    def optimize(self, plan: Plan, required: Optional[FrozenSet[str]]) -> Plan:
+        """Physical plan for ``plan`` that produces at least the ``required`` columns (all if ``None``)."""
+        if isinstance(plan, (Join, Selection)):
+            return self.optimize_chain(plan, required)
+        if isinstance(plan, Projection):
+            return plan._replace(child=self.optimize(plan.child, frozenset(plan.attributes)))
+        if isinstance(plan, Difference):
+            return plan._replace(left=self.optimize(plan.left, None), right=self.optimize(plan.right, None))
+        if isinstance(plan, (RenameAttribute, RenameRelation)):
+            child = self.columns(plan.child)
+            if required is not None:
+                renamed = dict(zip(child, self.columns(plan)))
+                required = frozenset(c for c in child if renamed[c] in required)
+            return plan._replace(child=self.optimize(plan.child, required))
+        return plan
+
+    def optimize_chain(self, plan: Plan, required: Optional[FrozenSet[str]]) -> Plan:
+        leaves: List[Plan] = []
+        conditions: List[Condition] = []
+        left_deep = self.flatten(plan, leaves, conditions)
+        columns = [self.columns(leaf) for leaf in leaves]
+        order = self.join_order(leaves, columns, conditions)
+        if not self.hash_joins(leaves, order, conditions):
+            order = list(range(len(leaves)))
+            if not left_deep and not self.hash_joins(leaves, order, conditions):
+                return self.as_written(plan)
+        reordered = order != sorted(order)
+
+        output = set(self.columns(plan)) if required is None else set(required)
+        positions = [POSITION_COLUMN.format(i) for i in range(len(leaves))]
+        if reordered and set(positions) & set().union(*columns):
+            raise _Unsupported
+
+        pending = list(conditions)
+        available: set = set()
+        result: Optional[Plan] = None
+        for i in order:
+            local = [c for c in pending if c.columns <= set(columns[i])]
+            pending = [c for c in pending if c not in local]
+            above = output.union(*(c.columns for c in pending))
+            leaf = self.optimize(leaves[i], frozenset(above.union(*(c.columns for c in local))) & set(columns[i]))
+            if local:
+                leaf = Filter(leaf, tuple(c.expression for c in local))
+            kept = tuple(c for c in columns[i] if c in above)
+            if len(leaves) > 1 and kept != columns[i]:
+                leaf = Prune(leaf, kept)
+            if reordered:
+                leaf = Numbered(leaf, positions[i])
+
+            if result is None:
+                result, available = leaf, set(columns[i])
+                continue
+            available |= set(columns[i])
+            step = [c for c in pending if c.columns <= available]
+            pending = [c for c in pending if c not in step]
+            result = Product(result, leaf, tuple(c.expression for c in step))
+
+        if reordered:
+            kept = tuple(c for leaf_columns in columns for c in leaf_columns if c in output)
+            result = Restore(result, tuple(positions), kept)
+        return result
+
+    def flatten(self, plan: Plan, leaves: List[Plan], conditions: List[Condition]) -> bool:
+        """Collect the leaves and conditions of a chain; whether every join has a single leaf on its right."""
+        if isinstance(plan, Join):
+            left_deep = self.flatten(plan.left, leaves, conditions)
+            first = len(leaves)
+            self.flatten(plan.right, leaves, conditions)
+            conditions.extend(self.conditions(plan.predicate, self.schema(plan)))
+            return left_deep and len(leaves) == first + 1
+        if isinstance(plan, Selection):
+            left_deep = self.flatten(plan.child, leaves, conditions)
+            conditions.extend(self.conditions(plan.predicate, self.schema(plan.child)))
+            return left_deep
+        leaves.append(plan)
+        return True
+
+    def as_written(self, plan: Plan) -> Plan:
+        """The chain ``plan`` in its written shape, with only its leaves optimized."""
+        if isinstance(plan, Join):
+            return plan._replace(left=self.as_written(plan.left), right=self.as_written(plan.right))
+        if isinstance(plan, Selection):
+            return plan._replace(child=self.as_written(plan.child))
+        return self.optimize(plan, None)
+
+    def hash_joins(self, leaves: Sequence[Plan], order: Sequence[int], conditions: Sequence[Condition]) -> bool:
+        """Whether every join of ``leaves`` in ``order`` gets an equality on columns of the same dtype."""
+        schemas = [dict(self.schema(leaf)) for leaf in leaves]
+        pending = list(conditions)
+        available: Dict[str, np.dtype] = {}
+        for i in order:
+            pending = [c for c in pending if not c.columns <= set(schemas[i])]
+            if available:
+                step = [c for c in pending if c.columns <= available.keys() | schemas[i].keys()]
+                pending = [c for c in pending if c not in step]
+                keys = [c.equality if c.equality[0] in available else c.equality[::-1] for c in step if c.equality]
+                keys = [(a, b) for a, b in keys if a in available and b in schemas[i]]
+                if not keys or any(available[a] != schemas[i][b] for a, b in keys):
+                    return False
+            available.update(schemas[i])
+        return True
+
+    def join_order(
+        self, leaves: Sequence[Plan], columns: Sequence[Tuple[str, ...]], conditions: Sequence[Condition]
+    ) -> List[int]:
+        if len(leaves) < 3:
+            return list(range(len(leaves)))  # no intermediate result to keep small
+
+        sizes = []
+        for leaf, leaf_columns in zip(leaves, columns):
+            local = sum(1 for c in conditions if c.columns <= set(leaf_columns))
+            sizes.append(self.estimate(leaf) * SELECTIVITY**local)
+
+        remaining = list(range(len(leaves)))
+        order: List[int] = []
+        available: set = set()
+        while remaining:
+            connected = [
+                i
+                for i in remaining
+                if any(
+                    c.columns & available and c.columns & set(columns[i]) and c.columns <= available | set(columns[i])
+                    for c in conditions
+                )
+            ]
+            i = min(connected or remaining, key=lambda i: (sizes[i], i))
+            order.append(i)
+            remaining.remove(i)
+            available |= set(columns[i])
+        return order
+
+
+def _mixed_ordering(node: ast.AST, numeric: Mapping[str, bool]) -> bool:
+    """Whether ``node`` orders a number against a string (``<``, ``<=``, ``>``, ``>=``)."""
+
+    def kind(operand):
+        if isinstance(operand, ast.Constant):
+            return isinstance(operand.value, (int, float))
+        return numeric.get(column_name(operand))
+
+    for compare in ast.walk(node):
+        if not isinstance(compare, ast.Compare):
+            continue
+        operands = [compare.left, *compare.comparators]
+        for op, left, right in zip(compare.ops, operands, operands[1:]):
+            if isinstance(op, (ast.Lt, ast.LtE, ast.Gt, ast.GtE)) and kind(left) != kind(right):
+                return True
+    return False
+
+
+def _equality(node: ast.AST) -> Optional[Tuple[str, str]]:
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(node.ops[0], ast.Eq):
+        a, b = column_name(node.left), column_name(node.comparators[0])
+        if a is not None and b is not None:
+            return a, b
+    return None
+
+
+def _renamed(column: str, new_name: str) -> str:
+    if "." not in column:
+        return column
+    return f"{new_name.strip()}.{column.split('.', 1)[1]}"
+
+
+def optimize(plan: Plan, relations: Mapping[str, pd.DataFrame]) -> Plan:
+    """Execution plan for ``plan``, or ``plan`` itself if it cannot be optimized."""
+    optimizer = _Optimizer(relations)
+    try:
+        optimizer.schema(plan)
+        return optimizer.optimize(plan, None)
+    except _Unsupported:
+        return plan
@@ -0,0 +1,324 @@
+"""Logical plan for relational algebra expressions.
+
+``parse_plan`` reads a normalized statement (operators in backslash notation,
+whitespace removed) in one left-to-right pass and returns a tree of plan
+nodes. Grammar::
+
+    expression := term (("\\join" | "\\diff") "{" text "}" "(" expression ")")*
+    term       := "(" expression ")"
+                | ("\\selection" | "\\projection" | "\\_rename" | "\\_rename_relation"
+                   | "\\_rename_attribute") "{" text "}" "(" expression ")"
+                | relation
+
+Prefix operators bind to their parenthesized operand. ``\\join`` and
+``\\diff`` share one precedence level and associate to the left, and their
+right operand is always parenthesized. Operator arguments run to the first
+``}``.
+
+Plan nodes are immutable and hashable. ``plan_tree`` renders the operator tree
+shown in the frontend.
+
+``Filter``, ``Prune``, ``Product``, ``Numbered`` and ``Restore`` are never
+produced by the parser; the optimizer uses them to describe how a plan is
+executed. Their conditions are prepared predicate expressions (``df['R.a'] == 1``).
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Iterator, NamedTuple, Tuple, Union
+
+RELALG_MAX_PLAN_NODES = 200
+RELALG_MAX_PLAN_DEPTH = 64
+
+INVALID_EXPRESSION_MESSAGE = "Ungültiger Ausdruck."
+TOO_COMPLEX_MESSAGE = "Der Ausdruck ist zu komplex."
+RENAME_ARGUMENTS_MESSAGE = (
+    "Der RENAME-Operator erwartet entweder ein Argument (Relation umbenennen) "
+    "oder zwei Argumente (Attribut umbenennen)."
+)
+RENAME_RELATION_MESSAGE = (
+    "Der Relations-RENAME-Operator erwartet einen neuen Relationsnamen: \\_rename_relation{NeuerName}(Relation)."
+)
+RENAME_ATTRIBUTE_MESSAGE = (
+    "Der Attribut-RENAME-Operator erwartet genau zwei Attribute: \\rename_attribute{altesAttribut, neuesAttribut}."
+)
+_UNCLOSED_MESSAGES = {
+    "selection": "Fehler bei SELECTION: Die Klammern nach \\selection{...} sind nicht korrekt geschlossen.",
+    "projection": "Fehler bei PROJECTION: Die Klammern nach \\projection{...} sind nicht korrekt geschlossen.",
+    "join": "Fehler bei JOIN: Die Klammern nach \\join{...} sind nicht korrekt geschlossen.",
+    "diff": "Fehler bei DIFFERENZ: Die Klammern nach \\diff{...} sind nicht korrekt geschlossen.",
+    "_rename_relation": "Fehler beim RENAME RELATION: Die Klammern sind nicht korrekt geschlossen.",
+    "_rename_attribute": "Fehler beim RENAME ATTRIBUTE: Die Klammern sind nicht korrekt geschlossen.",
+}
+
+_OPERATOR_NAME = re.compile(r"[A-Za-z_]+")
+_RELATION_NAME = re.compile(r"\w+")
+
+
+class Relation(NamedTuple):
+    name: str
+
+
+class Selection(NamedTuple):
+    child: "Plan"
+    predicate: str
+
+
+class Projection(NamedTuple):
+    child: "Plan"
+    attributes: Tuple[str, ...]
+
+
+class RenameRelation(NamedTuple):
+    child: "Plan"
+    new_name: str
+
+
+class RenameAttribute(NamedTuple):
+    child: "Plan"
+    attribute: str
+    new_name: str
+
+
+class Join(NamedTuple):
+    left: "Plan"
+    right: "Plan"
+    predicate: str
+
+
+class Difference(NamedTuple):
+    left: "Plan"
+    right: "Plan"
+
+
+class Filter(NamedTuple):
+    child: "Plan"
+    conditions: Tuple[str, ...]
+
+
+class Prune(NamedTuple):
+    """Keeps ``columns`` without removing duplicate rows."""
+
+    child: "Plan"
+    columns: Tuple[str, ...]
+
+
+class Product(NamedTuple):
+    """Join on prepared ``conditions``; a cross product if there are none."""
+
+    left: "Plan"
+    right: "Plan"
+    conditions: Tuple[str, ...]
+
+
+class Numbered(NamedTuple):
+    """Adds the row positions of ``child`` as ``column``."""
+
+    child: "Plan"
+    column: str
+
+
+class Restore(NamedTuple):
+    """Sorts by the ``order_by`` position columns and keeps ``columns``."""
+
+    child: "Plan"
+    order_by: Tuple[str, ...]
+    columns: Tuple[str, ...]
+
+
+Plan = Union[
+    Relation,
+    Selection,
+    Projection,
+    RenameRelation,
+    RenameAttribute,
+    Join,
+    Difference,
+    Filter,
+    Prune,
+    Product,
+    Numbered,
+    Restore,
+]
+
+_INFIX = {"join", "diff"}
+_PREFIX = {"selection", "projection", "_rename", "_rename_relation", "_rename_attribute"}
+
+
+class _Parser:
+    def __init__(self, text: str, relations: Iterable[str]):
+        self.text = text
+        self.pos = 0
+        self.relations = set(relations)
+        self.nodes = 0
+        self.depth = 0
+
+    def parse(self) -> Plan:
+        plan = self.expression()
+        if self.pos != len(self.text):
+            raise ValueError(INVALID_EXPRESSION_MESSAGE)
+        return plan
+
+    def expression(self) -> Plan:
+        self.depth += 1
+        if self.depth > RELALG_MAX_PLAN_DEPTH:
+            raise ValueError(TOO_COMPLEX_MESSAGE)
+
+        plan = self.term()
+        while self.text.startswith("\\", self.pos):
+            start = self.pos
+            operator = self.operator()
+            if operator not in _INFIX:
+                self.pos = start
+                break
+            argument = self.argument()
+            right = self.operand(operator)
+            if operator == "join":
+                plan = self.node(Join(plan, right, argument))
+            else:
+                plan = self.node(Difference(plan, right))
+
+        self.depth -= 1
+        return plan
+
+    def term(self) -> Plan:
+        if self.text.startswith("(", self.pos):
+            return self.operand(None)
+        if self.text.startswith("\\", self.pos):
+            operator = self.operator()
+            if operator not in _PREFIX:
+                raise ValueError(INVALID_EXPRESSION_MESSAGE)
+            argument = self.argument()
+            return self.node(self.prefix(operator, argument))
+        return self.node(self.relation())
+
+    def prefix(self, operator: str, argument: str) -> Plan:
+        if operator == "selection":
+            return Selection(self.operand(operator), argument)
+        if operator == "projection":
+            return Projection(self.operand(operator), tuple(x.strip() for x in argument.split(",")))
+
+        if operator == "_rename":
+            parts = [p.strip() for p in argument.split(",") if p.strip()]
+            if len(parts) not in (1, 2):
+                raise ValueError(RENAME_ARGUMENTS_MESSAGE)
+            operator = "_rename_relation" if len(parts) == 1 else "_rename_attribute"
+
+        if operator == "_rename_relation":
+            if not argument:
+                raise ValueError(RENAME_RELATION_MESSAGE)
+            return RenameRelation(self.operand(operator), argument)
+
+        attributes = [p.strip() for p in argument.split(",") if p.strip()]
+        if len(attributes) != 2:
+            raise ValueError(RENAME_ATTRIBUTE_MESSAGE)
+        return RenameAttribute(self.operand(operator), attributes[0], attributes[1])
+
+    def operator(self) -> str:
+        match = _OPERATOR_NAME.match(self.text, self.pos + 1)
+        if match is None:
+            raise ValueError(INVALID_EXPRESSION_MESSAGE)
+        name = match.group()
+        if name not in _INFIX and name not in _PREFIX:
+            raise ValueError("Ungültiger Operator im Ausdruck.")
+        self.pos = match.end()
+        return name
+
+    def argument(self) -> str:
+        end = self.text.find("}", self.pos)
+        if not self.text.startswith("{", self.pos) or end < 0:
+            raise ValueError(INVALID_EXPRESSION_MESSAGE)
+        argument = self.text[self.pos + 1 : end]
+        self.pos = end + 1
+        return argument
+
+    def operand(self, operator: str | None) -> Plan:
+        if not self.text.startswith("(", self.pos):
+            raise ValueError(INVALID_EXPRESSION_MESSAGE)
+        self.pos += 1
+        plan = self.expression()
+        if not self.text.startswith(")", self.pos):
+            if self.pos >= len(self.text) and operator in _UNCLOSED_MESSAGES:
+                raise ValueError(_UNCLOSED_MESSAGES[operator])
+            raise ValueError(INVALID_EXPRESSION_MESSAGE)
+        self.pos += 1
+        return plan
+
+    def relation(self) -> Relation:
+        match = _RELATION_NAME.match(self.text, self.pos)
+        if match is None or self.text.startswith(".", match.end()):
+            raise ValueError(INVALID_EXPRESSION_MESSAGE)
+        name = match.group()
+        if name not in self.relations:
+            raise ValueError(f'Die Relation "{name}" existiert nicht.')
+        self.pos = match.end()
+        return Relation(name)
+
+    def node(self, plan: Plan) -> Plan:
+        self.nodes += 1
+        if self.nodes > RELALG_MAX_PLAN_NODES:
+            raise ValueError(TOO_COMPLEX_MESSAGE)
+        return plan
+
+
+def parse_plan(statement: str, relations: Iterable[str]) -> Plan:
+    """Parse a normalized statement into a plan over ``relations``."""
+    return _Parser(statement, relations).parse()
+
+
+def children(plan: Plan) -> Tuple[Plan, ...]:
+    if isinstance(plan, Relation):
+        return ()
+    if isinstance(plan, (Join, Difference, Product)):
+        return plan.left, plan.right
+    return (plan.child,)
+
+
+def walk(plan: Plan) -> Iterator[Plan]:
+    """All nodes of ``plan``, parents before children."""
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(reversed(children(node)))
+
+
+def plan_digests(plan: Plan, schema: str) -> Dict[int, bytes]:
+    """Canonical digest of every subtree of ``plan`` over ``schema``, by ``id`` of the subtree's root node.
+
+    A digest covers the operator, its (normalized) arguments and the digests of
+    its children, so equal subtrees get equal digests across statements.
+    """
+    digests: Dict[int, bytes] = {}
+
+    def visit(node: Plan) -> bytes:
+        if id(node) not in digests:
+            parts = [type(node).__name__]
+            if isinstance(node, Relation):
+                parts.append(schema)
+            for field, value in zip(node._fields, node):
+                parts.append(visit(value).hex() if field in ("child", "left", "right") else repr(value))
+            digests[id(node)] = hashlib.blake2b("\x1f".join(parts).encode(), digest_size=16).digest()
+        return digests[id(node)]
+
+    visit(plan)
+    return digests
+
+
+def plan_tree(plan: Plan) -> Dict[str, Any]:
+    """Operator tree for the frontend, e.g. ``{"name": "join (cond)", "children": [...]}``."""
+    if isinstance(plan, Relation):
+        return {"name": plan.name}
+    if isinstance(plan, Join):
+        return {"name": f"join ({plan.predicate})", "children": [plan_tree(plan.left), plan_tree(plan.right)]}
+    if isinstance(plan, Difference):
+        return {"name": "diff", "children": [plan_tree(plan.left), plan_tree(plan.right)]}
+    if isinstance(plan, Selection):
+        name = f"selection ({plan.predicate})"
+    elif isinstance(plan, Projection):
+        name = f"projection ({list(plan.attributes)!r})"
+    elif isinstance(plan, RenameAttribute):
+        name = f"rename_attribute ({plan.attribute} -> {plan.new_name})"
+    else:
+        name = f"rename_relation ({plan.new_name})"
+    return {"name": name, "children": [plan_tree(plan.child)]}
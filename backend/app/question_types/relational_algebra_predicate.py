@@ -0,0 +1,155 @@
+"""Selection and join predicates of relational algebra expressions.
+
+``compile_predicate`` rewrites a predicate as written (``R.a=1 AND R.b!='x'``)
+into a pandas expression over ``df``, validates it and compiles it into a mask
+function. Used by the operators in ``relational_algebra_helper``, which split
+join predicates into hash join keys and a residual (``split_equi_join``), and
+by the optimizer, which splits predicates into conjuncts.
+"""
+
+import ast
+import os
+import re
+from functools import lru_cache, reduce
+from typing import Callable, NamedTuple
+
+import pandas as pd
+
+RELALG_PREDICATE_CACHE_SIZE = max(1, int(os.getenv("RELALG_PREDICATE_CACHE_SIZE", "4096")))
+
+
+def parse_predicate(predicate):
+    expr = predicate.strip()
+    expr = re.sub(r'\bAND\b', '&', expr, flags=re.IGNORECASE)
+    expr = re.sub(r'\bOR\b',  r'|', expr, flags=re.IGNORECASE)
+    expr = re.sub(r'\bNOT\b', r'~', expr, flags=re.IGNORECASE)
+
+    #'=' zu '==' umwandeln
+    expr = re.sub(r'(?<![<>=!])=(?!=)', '==', expr)
+    return expr
+
+def prepare_predicate(columns, predicate):
+    for col in sorted(columns, key=len, reverse=True): #col zu df['col']
+        pattern = r'\b' + re.escape(col) + r'\b'
+        predicate = re.sub(pattern, f'df[{col!r}]', predicate)
+    return predicate
+
+class CompiledPredicate(NamedTuple):
+    text: str  # prepared expression, shown in error messages
+    parsed: ast.Expression  # shared between callers, never modify
+    mask: Callable[[pd.DataFrame], pd.Series]
+
+@lru_cache(maxsize=RELALG_PREDICATE_CACHE_SIZE)
+def compile_predicate(predicate, columns):
+    """Compile a predicate over ``columns`` (a tuple) into a vectorized mask function.
+
+    Compiled predicates are cached, so repeated evaluations over the same
+    columns skip the rewriting, parsing and validation.
+    """
+    predicate = parse_predicate(predicate)
+    predicate = prepare_predicate(columns, predicate)
+    try:
+        parsed = ast.parse(predicate, mode="eval")
+        _validate_predicate_ast(parsed)
+    except Exception as e:
+        raise ValueError(invalid_predicate_message(predicate)) from e
+    return _compile_expression(predicate, parsed)
+
+@lru_cache(maxsize=RELALG_PREDICATE_CACHE_SIZE)
+def compile_conditions(conditions):
+    """Compiled conjunction of prepared conditions (a tuple), ``None`` if there are none."""
+    if not conditions:
+        return None
+    parsed = ast.Expression(body=_conjunction([ast.parse(c, mode="eval").body for c in conditions]))
+    return _compile_expression(ast.unparse(parsed), parsed)
+
+@lru_cache(maxsize=RELALG_PREDICATE_CACHE_SIZE)
+def split_equi_join(compiled, left_columns, right_columns):
+    """Hash join keys of a compiled join predicate and the predicate for the remaining conjuncts."""
+    keys, residual = _equi_join_keys(compiled.parsed.body, set(left_columns), set(right_columns))
+    if not residual:
+        return tuple(keys), None
+    return tuple(keys), _compile_expression(compiled.text, ast.Expression(body=_conjunction(residual)))
+
+def _equi_join_keys(node, left_columns, right_columns):
+    """Split a predicate into ``(left, right)`` key pairs of ``=`` conjuncts and the remaining conjuncts."""
+    keys, residual = [], []
+    for conjunct in conjuncts(node):
+        pair = None
+        if (
+            isinstance(conjunct, ast.Compare)
+            and len(conjunct.ops) == 1
+            and isinstance(conjunct.ops[0], ast.Eq)
+        ):
+            a, b = column_name(conjunct.left), column_name(conjunct.comparators[0])
+            if a in left_columns and b in right_columns:
+                pair = (a, b)
+            elif b in left_columns and a in right_columns:
+                pair = (b, a)
+        if pair is None:
+            residual.append(conjunct)
+        else:
+            keys.append(pair)
+    return keys, residual
+
+def _compile_expression(text, parsed):
+    arguments = ast.arguments(posonlyargs=[], args=[ast.arg(arg="df")], kwonlyargs=[], kw_defaults=[], defaults=[])
+    function = ast.fix_missing_locations(ast.Expression(body=ast.Lambda(args=arguments, body=parsed.body)))
+    mask = eval(compile(function, "<relalg-predicate>", "eval"), {"__builtins__": {}})
+    return CompiledPredicate(text, parsed, mask)
+
+def invalid_predicate_message(predicate):
+    return f'Ungültiges Selektionsprädikat: "{predicate}". Bitte prüfen Sie die Schreibweise und die verwendeten Attribute.'
+
+def _validate_predicate_ast(node: ast.AST) -> None:
+    allowed_nodes = (
+        ast.Expression,
+        ast.BinOp,
+        ast.BitAnd,
+        ast.BitOr,
+        ast.UnaryOp,
+        ast.Invert,
+        ast.Compare,
+        ast.Name,
+        ast.Load,
+        ast.Subscript,
+        ast.Constant,
+        ast.Eq,
+        ast.NotEq,
+        ast.Lt,
+        ast.LtE,
+        ast.Gt,
+        ast.GtE,
+    )
+
+    for child in ast.walk(node):
+        if not isinstance(child, allowed_nodes):
+            raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
+
+        if isinstance(child, ast.Name) and child.id != "df":
+            raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
+
+        if isinstance(child, ast.Subscript):
+            if not (isinstance(child.value, ast.Name) and child.value.id == "df"):
+                raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
+            if not (isinstance(child.slice, ast.Constant) and isinstance(child.slice.value, str)):
+                raise ValueError("Ungültige Selektionsausdrücke sind nicht erlaubt.")
+
+def conjuncts(node):
+    found = []
+    stack = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, ast.BinOp) and isinstance(current.op, ast.BitAnd):
+            stack.extend([current.right, current.left])
+        else:
+            found.append(current)
+    return found
+
+def column_name(node):
+    if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+        return node.slice.value
+    return None
+
+def _conjunction(nodes):
+    return reduce(lambda left, right: ast.BinOp(left=left, op=ast.BitAnd(), right=right), nodes)
@@ -1,6 +1,7 @@
 import re
 
 from app.common import *
+from app.cost_policy import check_deadline
 
 
 # --------------------------------------------------------------------------- #
@@ -377,6 +378,7 @@ class SchedulePropertiesQuestion:
 
         on_target, off_target, seen = [], [], set()
         for _ in range(SEARCH_TRIES):
+            check_deadline()
             ops = self._random_schedule(all_commit)
             edges, nodes = self._conflict_edges(ops)
             if not edges:
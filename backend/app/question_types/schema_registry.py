@@ -0,0 +1,84 @@
+"""Relational algebra schemas, loaded once per process.
+
+``RelationalAlgebra`` used to re-read ``schema.json`` and every CSV of its
+schema on each request. The registry loads each folder below
+``resources/schemas`` once (all of them at startup via ``load_all``) and hands
+out the same frames to every request. The frames are shared and must not be
+modified in place; the relational algebra operators always build new frames,
+and pandas' copy-on-write keeps derived frames from writing through.
+
+The schema grid shown in the question layout (two sample rows per relation)
+is computed at load time as well.
+"""
+
+import copy
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, NamedTuple, Tuple
+
+import pandas as pd
+
+from app.question_types.relational_algebra_helper import load_schema
+
+SCHEMAS_DIR = Path(__file__).resolve().parents[1] / "resources" / "schemas"
+PREVIEW_ROWS = 2
+
+
+class Schema(NamedTuple):
+    config: Mapping[str, Any]
+    relations: Mapping[str, pd.DataFrame]
+    preview_tables: Tuple[Dict[str, Any], ...]
+
+    def preview(self) -> List[Dict[str, Any]]:
+        """A fresh copy of the schema grid tables for one layout."""
+        return copy.deepcopy(list(self.preview_tables))
+
+
+def _preview_tables(relations: Mapping[str, pd.DataFrame]) -> Tuple[Dict[str, Any], ...]:
+    return tuple(
+        {
+            "title": name,
+            "columns": [c.split(".", 1)[1] for c in df.columns],
+            "rows": df.head(PREVIEW_ROWS).values.tolist(),
+        }
+        for name, df in relations.items()
+    )
+
+
+class SchemaRegistry:
+    def __init__(self, root: Path = SCHEMAS_DIR):
+        self.root = root
+        self._schemas: Dict[str, Schema] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Schema:
+        schema = self._schemas.get(name)
+        if schema is not None:
+            return schema
+        with self._lock:
+            schema = self._schemas.get(name)
+            if schema is None:
+                config, dataframes = load_schema(str(self.root / name))
+                relations = MappingProxyType(dataframes)
+                schema = Schema(MappingProxyType(config), relations, _preview_tables(relations))
+                self._schemas[name] = schema
+            return schema
+
+    def load_all(self) -> None:
+        for folder in sorted(self.root.iterdir()):
+            if (folder / "schema.json").is_file():
+                self.get(folder.name)
+
+    def stats(self) -> Dict[str, Any]:
+        schemas = list(self._schemas.values())
+        return {
+            "schemas": len(schemas),
+            "relations": sum(len(schema.relations) for schema in schemas),
+            "bytes": int(
+                sum(df.memory_usage(deep=True).sum() for schema in schemas for df in schema.relations.values())
+            ),
+        }
+
+
+schema_registry = SchemaRegistry()
@@ -0,0 +1,139 @@
+"""Plan-cost admission control for SQL previews.
+
+Before a statement runs, the backend's optimizer is asked for a plan
+(``EXPLAIN FORMAT=JSON`` on MySQL, ``EXPLAIN QUERY PLAN`` on SQLite) and the
+statement is rejected when the estimated rows examined or the plan cost exceed
+the configured budget. Estimates are cached by normalized statement text, so
+repeated previews of the same query skip the ``EXPLAIN`` round trip.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, NamedTuple
+
+from app.question_types.sql_lexer import normalize_statement
+
+SQL_ADMISSION_ENABLED = os.getenv("SQL_ADMISSION_ENABLED", "true").lower() == "true"
+SQL_ADMISSION_MAX_ROWS = float(os.getenv("SQL_ADMISSION_MAX_ROWS", "5000000"))
+SQL_ADMISSION_MAX_COST = float(os.getenv("SQL_ADMISSION_MAX_COST", "1000000"))
+SQL_PLAN_CACHE_SIZE = max(1, int(os.getenv("SQL_PLAN_CACHE_SIZE", "1024")))
+QUERY_TOO_EXPENSIVE_MESSAGE = (
+    "The query is estimated to be too expensive to run. "
+    "Please add join conditions or filters to restrict it."
+)
+
+_EXPLAINABLE = re.compile(r"^\s*(\(\s*)*(select|with)\b", re.IGNORECASE)
+
+
+class PlanEstimate(NamedTuple):
+    rows: float
+    cost: float | None = None
+
+
+def _mysql_rows_examined(node: Any) -> float:
+    if isinstance(node, list):
+        return sum(_mysql_rows_examined(entry) for entry in node)
+    if not isinstance(node, dict):
+        return 0.0
+
+    total = 0.0
+    for key, value in node.items():
+        if key == "nested_loop":
+            # Each table is scanned once per row produced by the join prefix before it.
+            prefix = 1.0
+            for entry in value:
+                table = entry.get("table", {})
+                total += prefix * float(table.get("rows_examined_per_scan", 0))
+                prefix = float(table.get("rows_produced_per_join", prefix))
+                total += _mysql_rows_examined(table)
+        elif key == "table":
+            total += float(value.get("rows_examined_per_scan", 0))
+            total += _mysql_rows_examined(value)
+        else:
+            total += _mysql_rows_examined(value)
+    return total
+
+
+def _mysql_query_cost(node: Any) -> float:
+    if isinstance(node, list):
+        return max((_mysql_query_cost(entry) for entry in node), default=0.0)
+    if not isinstance(node, dict):
+        return 0.0
+    own = float(node.get("cost_info", {}).get("query_cost", 0) or 0)
+    return max([own] + [_mysql_query_cost(value) for value in node.values()])
+
+
+def mysql_plan_estimate(plan: Dict[str, Any]) -> PlanEstimate:
+    """Estimate rows examined and total cost from ``EXPLAIN FORMAT=JSON`` output."""
+    return PlanEstimate(rows=_mysql_rows_examined(plan), cost=_mysql_query_cost(plan))
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        enabled: bool = SQL_ADMISSION_ENABLED,
+        max_rows: float = SQL_ADMISSION_MAX_ROWS,
+        max_cost: float = SQL_ADMISSION_MAX_COST,
+        cache_size: int = SQL_PLAN_CACHE_SIZE,
+    ):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+        self.cache_size = cache_size
+        self._plans: "OrderedDict[tuple, PlanEstimate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+
+    def estimate(self, backend: str, sql: str, explain: Callable[[], PlanEstimate]) -> PlanEstimate:
+        key = (backend, normalize_statement(sql))
+        with self._lock:
+            cached = self._plans.get(key)
+            if cached is not None:
+                self._plans.move_to_end(key)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        estimate = explain()
+        with self._lock:
+            self._plans[key] = estimate
+            while len(self._plans) > self.cache_size:
+                self._plans.popitem(last=False)
+        return estimate
+
+    def admit(self, backend: str, sql: str, explain: Callable[[], PlanEstimate]) -> None:
+        """Raise ``ValueError`` if the plan for ``sql`` exceeds the budget."""
+        if not self.enabled or not _EXPLAINABLE.match(sql):
+            return
+
+        estimate = self.estimate(backend, sql, explain)
+        too_costly = estimate.cost is not None and estimate.cost > self.max_cost
+        if estimate.rows > self.max_rows or too_costly:
+            with self._lock:
+                self.rejected += 1
+            raise ValueError(QUERY_TOO_EXPENSIVE_MESSAGE)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._plans.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "max_rows": self.max_rows,
+                "max_cost": self.max_cost,
+                "cached_plans": len(self._plans),
+                "hits": self.hits,
+                "misses": self.misses,
+                "rejected": self.rejected,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+sql_admission = AdmissionController()
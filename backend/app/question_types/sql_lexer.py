@@ -0,0 +1,69 @@
+"""Single-pass SQL tokenizer shared by validation, admission and translation.
+
+``tokenize`` walks the statement once with one compiled pattern and returns
+every token, whitespace and comments included, so callers can rebuild the
+statement text from the stream. Unterminated strings and comments run to the
+end of the input instead of failing; the database reports the syntax error.
+As in MySQL, ``--`` only starts a comment if whitespace or the end of the
+input follows (``1--1`` is ``1 - -1``).
+"""
+
+import re
+from typing import Iterable, List, NamedTuple
+
+_TOKEN_PATTERN = re.compile(
+    r"""
+    (?P<comment>--(?=\s|\Z)[^\n]*|\#[^\n]*|/\*.*?(?:\*/|$))
+  | (?P<string>'(?:''|\\.|[^'\\])*'?|"(?:""|\\.|[^"\\])*"?)
+  | (?P<identifier>`(?:``|[^`])*`?)
+  | (?P<word>[A-Za-z_][A-Za-z_0-9$]*)
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+(?:[eE][+-]?\d+)?)
+  | (?P<space>\s+)
+  | (?P<symbol>.)
+    """,
+    re.VERBOSE | re.DOTALL,
+)
+
+TRIVIA = frozenset({"space", "comment"})
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+
+    @property
+    def keyword(self) -> str | None:
+        """Lowercased text of a bare word, ``None`` for every other token."""
+        return self.text.lower() if self.kind == "word" else None
+
+
+def tokenize(sql: str) -> List[Token]:
+    return [Token(match.lastgroup, match.group()) for match in _TOKEN_PATTERN.finditer(sql)]
+
+
+def significant(tokens: Iterable[Token]) -> List[Token]:
+    """Drop whitespace and comments."""
+    return [token for token in tokens if token.kind not in TRIVIA]
+
+
+def normalize_statement(sql: str) -> str:
+    """Drop comments and collapse whitespace; lowercase everything but literals.
+
+    Strings and quoted identifiers are kept exactly as written, spaces included.
+    """
+    parts: List[str] = []
+    separated = False
+    for token in tokenize(sql):
+        if token.kind in TRIVIA:
+            separated = bool(parts)
+            continue
+        if separated:
+            parts.append(" ")
+            separated = False
+        if token.kind in {"string", "identifier"}:
+            parts.append(token.text)
+        else:
+            parts.append(token.text.lower())
+    while parts and parts[-1] in {" ", ";"}:
+        parts.pop()
+    return "".join(parts)
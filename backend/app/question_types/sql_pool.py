@@ -0,0 +1,176 @@
+"""Bounded access to the exercise database connections.
+
+mysql-connector's pool raises as soon as every connection is checked out. Two
+layers sit in front of it instead:
+
+* ``reserve()`` is awaited by the question executor before a SQL action is
+  handed to a thread. At most ``SQL_POOL_SIZE`` actions hold a reservation;
+  the rest wait in a FIFO queue on the event loop without occupying a thread.
+* ``connection()`` checks out a connection in the worker thread and waits
+  (instead of failing) while all of them are in use.
+
+Both queues are bounded by ``SQL_POOL_MAX_WAITERS`` and both waits by
+``SQL_POOL_ACQUIRE_TIMEOUT``; beyond that callers get ``SqlPoolExhaustedError``.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, Callable, Deque, Dict
+
+from app.errors import DependencyUnavailableError
+
+SQL_POOL_SIZE = max(1, int(os.getenv("SQL_POOL_SIZE", "5")))
+SQL_POOL_MAX_WAITERS = max(0, int(os.getenv("SQL_POOL_MAX_WAITERS", "64")))
+SQL_POOL_ACQUIRE_TIMEOUT = float(os.getenv("SQL_POOL_ACQUIRE_TIMEOUT", "5"))
+POOL_EXHAUSTED_MESSAGE = "The SQL database is busy, please retry"
+
+
+class SqlPoolExhaustedError(DependencyUnavailableError):
+    pass
+
+
+def _grant(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class SqlPool:
+    def __init__(
+        self,
+        size: int = SQL_POOL_SIZE,
+        max_waiters: int = SQL_POOL_MAX_WAITERS,
+        acquire_timeout: float = SQL_POOL_ACQUIRE_TIMEOUT,
+    ):
+        self.size = size
+        self.max_waiters = max_waiters
+        self.acquire_timeout = acquire_timeout
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+        self._queue: Deque[asyncio.Future] = deque()
+        self.reserved = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.peak_waiters = 0
+        self.acquired = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _record_wait(self, started: float) -> None:
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.acquired += 1
+            self.total_wait_seconds += elapsed
+            self.max_wait_seconds = max(self.max_wait_seconds, elapsed)
+
+    def _reject_if_full(self, waiters: int) -> None:
+        if waiters >= self.max_waiters:
+            self.rejected += 1
+            raise SqlPoolExhaustedError(POOL_EXHAUSTED_MESSAGE)
+        self.peak_waiters = max(self.peak_waiters, waiters + 1)
+
+    @asynccontextmanager
+    async def reserve(self):
+        """Hold one of ``size`` SQL action slots, waiting on the event loop if necessary."""
+        started = time.perf_counter()
+        waiter = None
+        with self._lock:
+            if self.reserved < self.size and not self._queue:
+                self.reserved += 1
+            else:
+                self._reject_if_full(len(self._queue))
+                waiter = asyncio.get_running_loop().create_future()
+                self._queue.append(waiter)
+
+        if waiter is not None:
+            try:
+                await asyncio.wait_for(waiter, self.acquire_timeout)
+            except BaseException as error:
+                # Whoever removed the waiter from the queue handed it the slot.
+                with self._lock:
+                    granted = waiter not in self._queue
+                    if not granted:
+                        self._queue.remove(waiter)
+                        if isinstance(error, asyncio.TimeoutError):
+                            self.timeouts += 1
+                if granted:
+                    self._release_reservation()
+                if isinstance(error, asyncio.TimeoutError):
+                    raise SqlPoolExhaustedError(POOL_EXHAUSTED_MESSAGE) from error
+                raise
+
+        self._record_wait(started)
+        try:
+            yield
+        finally:
+            self._release_reservation()
+
+    def _release_reservation(self) -> None:
+        with self._lock:
+            if self._queue:
+                # Hand the slot straight to the next waiter; ``reserved`` stays the same.
+                waiter = self._queue.popleft()
+                waiter.get_loop().call_soon_threadsafe(_grant, waiter)
+            else:
+                self.reserved -= 1
+
+    @contextmanager
+    def connection(self, connect: Callable[[], Any]):
+        """Check out ``connect()`` for the block, waiting while all ``size`` connections are in use."""
+        started = time.perf_counter()
+        with self._returned:
+            if self.in_use >= self.size:
+                self._reject_if_full(self.waiting)
+                self.waiting += 1
+                try:
+                    available = self._returned.wait_for(lambda: self.in_use < self.size, self.acquire_timeout)
+                finally:
+                    self.waiting -= 1
+                if not available:
+                    self.timeouts += 1
+                    raise SqlPoolExhaustedError(POOL_EXHAUSTED_MESSAGE)
+            self.in_use += 1
+
+        try:
+            conn = connect()
+        except BaseException:
+            self._return_connection()
+            raise
+        self._record_wait(started)
+        try:
+            yield conn
+        finally:
+            try:
+                conn.close()
+            finally:
+                self._return_connection()
+
+    def _return_connection(self) -> None:
+        with self._returned:
+            self.in_use -= 1
+            self._returned.notify()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": self.size,
+                "max_waiters": self.max_waiters,
+                "reserved": self.reserved,
+                "queued": len(self._queue),
+                "in_use": self.in_use,
+                "waiting": self.waiting,
+                "peak_waiters": self.peak_waiters,
+                "acquired": self.acquired,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+                "avg_acquire_ms": (self.total_wait_seconds / self.acquired * 1000) if self.acquired else 0.0,
+                "max_acquire_ms": self.max_wait_seconds * 1000,
+            }
+
+
+sql_pool = SqlPool()
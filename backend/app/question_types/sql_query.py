@@ -2,13 +2,16 @@ import csv
 import json
 import random
 import re
+from hashlib import blake2b
 from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
 
-from app.errors import DependencyUnavailableError
+from app.errors import DependencyUnavailableError, QuestionCancelledError
 from app.question_types.sql_query_helper import (
-    execute_for_compare,
-    execute_read_only_query,
+    execute_preview_page,
+    SQL_PREVIEW_PAGE_SIZE,
     SqlDependencyUnavailableError,
+    stream_for_compare,
 )
 
 
@@ -16,6 +19,102 @@ RESOURCES_DIR = Path(__file__).resolve().parents[1] / "resources" / "sql"
 EXERCISES_PATH = RESOURCES_DIR / "exercises.json"
 EXERCISE_RESULTS_DIR = RESOURCES_DIR
 
+_DIGEST_SIZE = 16
+_DIGEST_MODULUS = 1 << (8 * _DIGEST_SIZE)
+
+
+class ExpectedResult(NamedTuple):
+    """Precompiled expected result of an exercise.
+
+    Ordered results keep one digest per row (concatenated) so the first wrong
+    row ends the comparison; unordered results keep the sum of the row digests,
+    which does not depend on row order.
+    """
+
+    column_count: int
+    row_count: int
+    ordered: bool
+    fingerprint: bytes
+
+
+def _row_digest(row: Sequence[Any]) -> bytes:
+    hasher = blake2b(digest_size=_DIGEST_SIZE)
+    for value in row:
+        encoded = ("" if value is None else str(value)).encode("utf-8")
+        hasher.update(len(encoded).to_bytes(4, "big"))
+        hasher.update(encoded)
+    return hasher.digest()
+
+
+def _requires_order_by(answer_sql: str) -> bool:
+    return bool(re.search(r"\border\s+by\b", str(answer_sql), flags=re.IGNORECASE))
+
+
+def _fingerprint(rows: Iterable[Sequence[Any]], ordered: bool) -> Tuple[int, bytes]:
+    count = 0
+    if ordered:
+        digests = []
+        for row in rows:
+            digests.append(_row_digest(row))
+            count += 1
+        return count, b"".join(digests)
+
+    total = 0
+    for row in rows:
+        total = (total + int.from_bytes(_row_digest(row), "big")) % _DIGEST_MODULUS
+        count += 1
+    return count, total.to_bytes(_DIGEST_SIZE, "big")
+
+
+def _compile_expected_result(result_path: str, ordered: bool) -> ExpectedResult:
+    with open(EXERCISE_RESULTS_DIR / result_path, "r", encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return ExpectedResult(0, 0, ordered, _fingerprint([], ordered)[1])
+        row_count, fingerprint = _fingerprint(reader, ordered)
+    return ExpectedResult(len(header), row_count, ordered, fingerprint)
+
+
+def matches_expected(columns: Sequence[str], rows: Iterable[Sequence[Any]], expected: ExpectedResult) -> bool:
+    """Compare a streamed result with ``expected``; stops at the first detectable mismatch."""
+    if len(columns) != expected.column_count:
+        return False
+
+    count = 0
+    total = 0
+    for row in rows:
+        if count == expected.row_count:
+            return False
+        digest = _row_digest(row)
+        if expected.ordered:
+            offset = count * _DIGEST_SIZE
+            if digest != expected.fingerprint[offset : offset + _DIGEST_SIZE]:
+                return False
+        else:
+            total = (total + int.from_bytes(digest, "big")) % _DIGEST_MODULUS
+        count += 1
+
+    if count != expected.row_count:
+        return False
+    return expected.ordered or total.to_bytes(_DIGEST_SIZE, "big") == expected.fingerprint
+
+
+def _load_exercise_catalog() -> Tuple[List[Dict[str, Any]], Dict[str, ExpectedResult]]:
+    with open(EXERCISES_PATH, "r", encoding="utf-8") as f:
+        exercises = json.load(f).get("exercises", [])
+    expected = {
+        exercise["result_path"]: _compile_expected_result(
+            exercise["result_path"], _requires_order_by(exercise.get("answer", ""))
+        )
+        for exercise in exercises
+    }
+    return exercises, expected
+
+
+# Loaded once per process when the question types are imported at startup.
+EXERCISES, EXPECTED_RESULTS = _load_exercise_catalog()
+
 
 class SqlQueryQuestion:
     def __init__(self, seed=None, difficulty="easy", exercise_name=None):
@@ -24,10 +123,7 @@ class SqlQueryQuestion:
         self.exercise_name = str(exercise_name) if exercise_name is not None else None
         self.rng = random.Random(self.seed)
 
-        with open(EXERCISES_PATH, "r", encoding="utf-8") as f:
-            exercises = json.load(f).get("exercises", [])
-
-        filtered = [e for e in exercises if str(e.get("difficulty", "easy")).lower() == self.difficulty]
+        filtered = [e for e in EXERCISES if str(e.get("difficulty", "easy")).lower() == self.difficulty]
 
         if not filtered:
             raise ValueError(f"No SQL exercises found for difficulty '{self.difficulty}'.")
@@ -42,29 +138,8 @@ class SqlQueryQuestion:
         else:
             self.exercise = self.rng.choice(filtered)
 
-        self.requires_order_by = self._requires_order_by(self.exercise.get("answer", ""))
-        self.expected_column_count, self.expected_rows = self._load_expected_result(
-            self.exercise["result_path"],
-            keep_order=self.requires_order_by,
-        )
-
-    def _requires_order_by(self, answer_sql: str) -> bool:
-        return bool(re.search(r"\border\s+by\b", str(answer_sql), flags=re.IGNORECASE))
-
-    def _load_expected_result(self, result_path: str, keep_order: bool = False):
-        csv_path = EXERCISE_RESULTS_DIR / result_path
-        with open(csv_path, "r", encoding="utf-8", newline="") as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-
-        if not rows:
-            return 0, []
-
-        header = rows[0]
-        data_rows = [tuple(row) for row in rows[1:]]
-        if not keep_order:
-            data_rows.sort()
-        return len(header), data_rows
+        self.expected = EXPECTED_RESULTS[self.exercise["result_path"]]
+        self.requires_order_by = self.expected.ordered
 
     def generate(self):
         return {
@@ -112,18 +187,8 @@ class SqlQueryQuestion:
     def evaluate(self, user_input):
         statement = (user_input or {}).get("0", "")
         try:
-            user_cols, user_rows = execute_for_compare(statement)
-            normalized_user_rows = [
-                tuple("" if value is None else str(value) for value in row)
-                for row in user_rows
-            ]
-            if not self.requires_order_by:
-                normalized_user_rows.sort()
-
-            correct = (
-                len(user_cols) == self.expected_column_count
-                and normalized_user_rows == self.expected_rows
-            )
+            with stream_for_compare(statement) as (user_cols, user_rows):
+                correct = matches_expected(user_cols, user_rows, self.expected)
         except SqlDependencyUnavailableError as e:
             raise DependencyUnavailableError("SQL backend unavailable") from e
         except ValueError:
@@ -136,7 +201,7 @@ class SqlQueryQuestion:
             }
         }
 
-    def preview(self, statement: str):
+    def preview(self, statement: str, offset: int = 0, limit: int = SQL_PREVIEW_PAGE_SIZE):
         statement = (statement or "").strip()
         if not statement:
             return {
@@ -146,15 +211,12 @@ class SqlQueryQuestion:
             }
 
         try:
-            result = execute_read_only_query(statement)
-            return {
-                "columns": result["columns"],
-                "rows": result["rows"],
-                "total_rows": result.get("total_rows", len(result["rows"])),
-                "error": None,
-            }
+            result = execute_preview_page(statement, offset=offset, limit=limit)
+            return {**result, "error": None}
         except SqlDependencyUnavailableError as e:
             raise DependencyUnavailableError("SQL backend unavailable") from e
+        except QuestionCancelledError:
+            raise
         except Exception as e:
             return {
                 "columns": [],
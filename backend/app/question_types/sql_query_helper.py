@@ -1,16 +1,33 @@
+import json
+import logging
 import os
-import re
 import threading
-from typing import Any, Dict, List, Tuple
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Dict, Iterator, List, Tuple
 
 import mysql.connector
 from mysql.connector import Error
 from mysql.connector.pooling import MySQLConnectionPool
 
+from app.cancellation import check_cancelled, on_cancel
+from app.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.question_types import sql_sqlite_helper
+from app.question_types.sql_admission import PlanEstimate, mysql_plan_estimate, sql_admission
+from app.question_types.sql_pool import SQL_POOL_SIZE, SqlPoolExhaustedError, sql_pool
+from app.question_types.sql_lexer import TRIVIA, Token, significant, tokenize
+from app.question_types.sql_result_cache import sql_result_cache
+
+logger = logging.getLogger(__name__)
+
+SQL_BACKEND = os.getenv("SQL_BACKEND", "mysql").lower()
 SQL_MAX_RESULT_ROWS = int(os.getenv("SQL_MAX_RESULT_ROWS", "10000"))
 SQL_MAX_JOINS = int(os.getenv("SQL_MAX_JOINS", "5"))
 SQL_READ_TIMEOUT = int(os.getenv("SQL_READ_TIMEOUT_SECONDS", "8"))
 SQL_CONNECT_TIMEOUT = int(os.getenv("SQL_CONNECT_TIMEOUT_SECONDS", "5"))
+SQL_STREAM_FETCH_SIZE = 256
+SQL_PREVIEW_PAGE_SIZE = max(1, int(os.getenv("SQL_PREVIEW_PAGE_SIZE", "100")))
+SQL_PREVIEW_MAX_PAGE_SIZE = max(SQL_PREVIEW_PAGE_SIZE, int(os.getenv("SQL_PREVIEW_MAX_PAGE_SIZE", "500")))
 APP_ENV = os.getenv("APP_ENV", "development").lower()
 TOO_MANY_ROWS_MESSAGE = "The result set contains too many rows to preview."
 TOO_MANY_JOINS_MESSAGE = f"A maximum of {SQL_MAX_JOINS} joins is allowed."
@@ -19,6 +36,10 @@ FROM_COMMA_NOT_ALLOWED_MESSAGE = (
     "Please use explicit JOIN syntax."
 )
 
+_FROM_CLAUSE_END = {"where", "group", "order", "limit", "having", "union", "intersect", "except"}
+# Top-level clauses after which an appended LIMIT would be invalid or change the meaning.
+_NO_LIMIT_PUSHDOWN = {"limit", "into", "for", "lock", "procedure"}
+
 _sql_pool: MySQLConnectionPool | None = None
 _sql_pool_lock = threading.Lock()
 
@@ -27,59 +48,38 @@ class SqlDependencyUnavailableError(RuntimeError):
     pass
 
 
-def _strip_sql_comments_and_strings(sql: str) -> str:
-    sql = re.sub(r"--.*?$", " ", sql, flags=re.MULTILINE)
-    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.DOTALL)
-    sql = re.sub(r"'(?:''|[^'])*'", "''", sql)
-    sql = re.sub(r'"(?:""|[^"])*"', '""', sql)
-    return sql
+sql_breaker = CircuitBreaker("SQL backend", failure_types=(SqlDependencyUnavailableError,))
 
 
 def _validate_sql_limits(sql: str) -> None:
-    cleaned = _strip_sql_comments_and_strings(sql)
-    join_count = len(re.findall(r"\bjoin\b", cleaned, flags=re.IGNORECASE))
+    tokens = significant(tokenize(sql))
+    join_count = sum(1 for token in tokens if token.keyword == "join")
     if join_count > SQL_MAX_JOINS:
         raise ValueError(TOO_MANY_JOINS_MESSAGE)
-    if _has_comma_separated_from_relations(cleaned):
+    # With plan-cost admission, comma joins are judged by their estimated cost instead.
+    if not sql_admission.enabled and _has_comma_separated_from_relations(tokens):
         raise ValueError(FROM_COMMA_NOT_ALLOWED_MESSAGE)
 
 
-def _has_comma_separated_from_relations(sql: str) -> bool:
-    lowered = sql.lower()
-    match = re.search(r"\bfrom\b", lowered)
-    if not match:
-        return False
-
-    i = match.end()
-    depth = 0
-    from_segment_chars = []
-
-    while i < len(lowered):
-        ch = lowered[i]
-        if ch == "(":
-            depth += 1
-        elif ch == ")" and depth > 0:
-            depth -= 1
-
-        if depth == 0 and re.match(
-            r"\b(where|group\s+by|order\s+by|limit|having|union|intersect|except)\b",
-            lowered[i:],
-        ):
-            break
-
-        from_segment_chars.append(ch)
-        i += 1
-
-    from_segment = "".join(from_segment_chars)
+def _has_comma_separated_from_relations(tokens: List[Token]) -> bool:
+    """Whether any ``FROM`` clause lists relations separated by top-level commas."""
+    open_from_depths: List[int] = []
     depth = 0
-    for ch in from_segment:
-        if ch == "(":
+    for token in tokens:
+        if token.text == "(":
             depth += 1
-        elif ch == ")" and depth > 0:
-            depth -= 1
-        elif ch == "," and depth == 0:
+        elif token.text in {")", ";"}:
+            # Closes every FROM clause opened inside the parenthesis (or statement).
+            while open_from_depths and open_from_depths[-1] >= depth:
+                open_from_depths.pop()
+            depth = max(depth - 1, 0) if token.text == ")" else 0
+        elif token.keyword == "from":
+            open_from_depths.append(depth)
+        elif token.keyword in _FROM_CLAUSE_END:
+            while open_from_depths and open_from_depths[-1] >= depth:
+                open_from_depths.pop()
+        elif token.text == "," and open_from_depths and open_from_depths[-1] == depth:
             return True
-
     return False
 
 
@@ -90,7 +90,7 @@ def _sql_settings() -> Dict[str, Any]:
 
     return {
         "pool_name": "sql_read_pool",
-        "pool_size": int(os.getenv("SQL_POOL_SIZE", "5")),
+        "pool_size": SQL_POOL_SIZE,
         "host": os.getenv("SQL_HOST", "localhost"),
         "port": int(os.getenv("SQL_PORT", "3306")),
         "database": os.getenv("SQL_DB", "exercise_db"),
@@ -99,6 +99,8 @@ def _sql_settings() -> Dict[str, Any]:
         "connection_timeout": SQL_CONNECT_TIMEOUT,
         "read_timeout": SQL_READ_TIMEOUT,
         "write_timeout": SQL_READ_TIMEOUT,
+        # Streamed comparisons may stop early; drain the rest when the cursor closes.
+        "consume_results": True,
     }
 
 
@@ -119,7 +121,7 @@ def _format_sql_error(error: Error) -> str:
     return str(error)
 
 
-def _sql_connection():
+def _pooled_connection():
     global _sql_pool
     if _sql_pool is None:
         with _sql_pool_lock:
@@ -137,83 +139,261 @@ def _sql_connection():
         raise SqlDependencyUnavailableError("SQL backend unavailable") from error
 
 
+@contextmanager
+def _sql_connection():
+    try:
+        with sql_pool.connection(partial(sql_breaker.call, _pooled_connection)) as conn:
+            yield conn
+    except (SqlPoolExhaustedError, CircuitOpenError) as error:
+        raise SqlDependencyUnavailableError(str(error)) from error
+
+
 def ping_sql_database() -> bool:
-    conn = None
-    cursor = None
+    if SQL_BACKEND == "sqlite":
+        try:
+            sql_sqlite_helper.load_database()
+            return True
+        except Exception:
+            return False
+
     try:
-        conn = _sql_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        row = cursor.fetchone()
+        with _sql_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT 1")
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
         return bool(row and row[0] == 1)
     except SqlDependencyUnavailableError:
         return False
     except Error:
         return False
+
+
+def _explain_mysql(cursor, sql: str) -> PlanEstimate:
+    cursor.execute(f"EXPLAIN FORMAT=JSON {sql}")
+    row = cursor.fetchone()
+    return mysql_plan_estimate(json.loads(row[0]))
+
+
+def _kill_query(connection_id: int) -> None:
+    settings = {k: v for k, v in _sql_settings().items() if k not in {"pool_name", "pool_size"}}
+    conn = None
+    try:
+        conn = mysql.connector.connect(**settings)
+        cursor = conn.cursor()
+        cursor.execute(f"KILL QUERY {int(connection_id)}")
+        cursor.close()
+    except Error:
+        logger.warning("Failed to kill superseded SQL query", exc_info=True)
     finally:
-        if cursor is not None:
-            cursor.close()
         if conn is not None:
             conn.close()
 
 
-def execute_read_only_query(statement: str) -> Dict[str, Any]:
-    sql = (statement or "").strip()
-    if not sql:
-        raise ValueError("Bitte SQL eingeben.")
+@contextmanager
+def _kill_on_cancel(connection_id: int) -> Iterator[None]:
+    """Send ``KILL QUERY`` for ``connection_id`` if the request is cancelled during the block.
 
-    _validate_sql_limits(sql)
+    Cancellation callbacks run on the event loop, so the kill connects from a
+    helper thread. Leaving the block disarms it and waits for a kill already
+    under way: afterwards the pooled connection may run another request's query.
+    """
+    lock = threading.Lock()
+    threads: List[threading.Thread] = []
+    armed = True
+
+    def kill() -> None:
+        with lock:
+            if armed:
+                thread = threading.Thread(target=_kill_query, args=(connection_id,), daemon=True)
+                thread.start()
+                threads.append(thread)
 
-    conn = _sql_connection()
-    cursor = None
     try:
-        cursor = conn.cursor(buffered=True)
-        cursor.execute(sql)
-        fetched = cursor.fetchmany(SQL_MAX_RESULT_ROWS + 1)
-        if len(fetched) > SQL_MAX_RESULT_ROWS:
-            raise ValueError(TOO_MANY_ROWS_MESSAGE)
-        rows = fetched
-        columns = [c[0] for c in cursor.description] if cursor.description else []
-        return {
-            "columns": columns,
-            "rows": [list(row) for row in rows],
-            "total_rows": len(rows),
-        }
-    except Error as error:
-        raise ValueError(_format_sql_error(error))
+        with on_cancel(kill):
+            yield
     finally:
-        if cursor is not None:
-            cursor.close()
-        conn.close()
+        with lock:
+            armed = False
+        for thread in threads:
+            thread.join()
+
+
+def _execute_mysql(sql: str) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    check_cancelled()
+    with _sql_connection() as conn:
+        cursor = None
+        try:
+            cursor = conn.cursor(buffered=True)
+            sql_admission.admit("mysql", sql, lambda: _explain_mysql(cursor, sql))
+            with _kill_on_cancel(conn.connection_id):
+                cursor.execute(sql)
+                fetched = cursor.fetchmany(SQL_MAX_RESULT_ROWS + 1)
+            columns = [c[0] for c in cursor.description] if cursor.description else []
+            return columns, fetched
+        except Error as error:
+            check_cancelled()
+            raise ValueError(_format_sql_error(error))
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+
+def _execute_sqlite(sql: str) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    try:
+        sql_admission.admit("sqlite", sql, lambda: sql_sqlite_helper.explain(sql))
+        return sql_sqlite_helper.execute(sql, SQL_MAX_RESULT_ROWS, SQL_READ_TIMEOUT)
+    except OSError as error:
+        raise SqlDependencyUnavailableError("SQL backend unavailable") from error
 
 
-def execute_for_compare(statement: str) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+def _prepare(statement: str) -> str:
     sql = (statement or "").strip()
     if not sql:
         raise ValueError("Bitte SQL eingeben.")
 
     _validate_sql_limits(sql)
+    return sql
 
-    conn = _sql_connection()
-    cursor = None
-    try:
-        cursor = conn.cursor(buffered=True)
-        cursor.execute(sql)
-        fetched = cursor.fetchmany(SQL_MAX_RESULT_ROWS + 1)
-        if len(fetched) > SQL_MAX_RESULT_ROWS:
+
+def _cache_key(sql: str) -> Tuple[str, str]:
+    # As typed: MySQL names unaliased columns after the original text, spacing included.
+    return SQL_BACKEND, sql
+
+
+def _execute(statement: str) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    sql = _prepare(statement)
+
+    def run() -> Tuple[List[str], List[Tuple[Any, ...]]]:
+        columns, rows = _execute_sqlite(sql) if SQL_BACKEND == "sqlite" else _execute_mysql(sql)
+        if len(rows) > SQL_MAX_RESULT_ROWS:
             raise ValueError(TOO_MANY_ROWS_MESSAGE)
-        rows = fetched
-        columns = [c[0] for c in cursor.description] if cursor.description else []
         return columns, rows
-    except Error as error:
-        raise ValueError(_format_sql_error(error))
-    finally:
-        if cursor is not None:
-            cursor.close()
-        conn.close()
 
+    return sql_result_cache.get_or_execute(_cache_key(sql), run)
+
+
+@contextmanager
+def _stream_mysql(sql: str) -> Iterator[Tuple[List[str], Iterator[Tuple[Any, ...]]]]:
+    check_cancelled()
+    with _sql_connection() as conn:
+        cursor = None
+        try:
+            cursor = conn.cursor()
+            sql_admission.admit("mysql", sql, lambda: _explain_mysql(cursor, sql))
+            with _kill_on_cancel(conn.connection_id):
+                cursor.execute(sql)
+                columns = [c[0] for c in cursor.description] if cursor.description else []
+
+                def rows() -> Iterator[Tuple[Any, ...]]:
+                    try:
+                        while batch := cursor.fetchmany(SQL_STREAM_FETCH_SIZE):
+                            yield from batch
+                    except Error as error:
+                        check_cancelled()
+                        raise ValueError(_format_sql_error(error))
+
+                yield columns, rows()
+        except Error as error:
+            check_cancelled()
+            raise ValueError(_format_sql_error(error))
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+
+@contextmanager
+def _stream_sqlite(sql: str) -> Iterator[Tuple[List[str], Iterator[Tuple[Any, ...]]]]:
+    try:
+        sql_admission.admit("sqlite", sql, lambda: sql_sqlite_helper.explain(sql))
+        stream = sql_sqlite_helper.stream(sql, SQL_READ_TIMEOUT)
+    except OSError as error:
+        raise SqlDependencyUnavailableError("SQL backend unavailable") from error
+    with stream as result:
+        yield result
+
+
+@contextmanager
+def stream_for_compare(statement: str) -> Iterator[Tuple[List[str], Iterator[Tuple[Any, ...]]]]:
+    """Yield ``(columns, rows)`` with rows read lazily, so callers can stop early.
+
+    A cached result (e.g. from the preview of the same statement) is replayed;
+    otherwise the cursor is streamed unbuffered and nothing is cached.
+    """
+    sql = _prepare(statement)
+    cached = sql_result_cache.get(_cache_key(sql))
+    if cached is not None:
+        yield cached[0], iter(cached[1])
+        return
+
+    with _stream_sqlite(sql) if SQL_BACKEND == "sqlite" else _stream_mysql(sql) as result:
+        yield result
+
+
+def _statement_body(sql: str) -> str | None:
+    """The statement up to its last token if it is a single plain query, else ``None``."""
+    tokens = tokenize(sql)
+    significant_positions = [i for i, token in enumerate(tokens) if token.kind not in TRIVIA]
+    while significant_positions and tokens[significant_positions[-1]].text == ";":
+        significant_positions.pop()
+    if not significant_positions or tokens[significant_positions[0]].keyword not in {"select", "with"}:
+        return None
 
-def normalize_result_set(columns: List[str], rows: List[Tuple[Any, ...]]) -> Tuple[List[str], List[Tuple[str, ...]]]:
-    normalized_rows = [tuple("" if value is None else str(value) for value in row) for row in rows]
-    normalized_rows.sort()
-    return list(columns), normalized_rows
+    depth = 0
+    for position in significant_positions:
+        token = tokens[position]
+        if token.text == "(":
+            depth += 1
+        elif token.text == ")":
+            depth = max(depth - 1, 0)
+        elif token.text == ";" or (depth == 0 and token.keyword in _NO_LIMIT_PUSHDOWN):
+            return None
+    return "".join(token.text for token in tokens[: significant_positions[-1] + 1])
+
+
+def _count_rows(body: str) -> int | None:
+    try:
+        _, rows = _execute(f"SELECT COUNT(*) FROM ({body}) AS preview_count")
+    except ValueError:
+        # e.g. duplicate column names, which MySQL rejects in derived tables
+        return None
+    return int(rows[0][0])
+
+
+def execute_preview_page(statement: str, offset: int = 0, limit: int = SQL_PREVIEW_PAGE_SIZE) -> Dict[str, Any]:
+    """One page of a statement's result.
+
+    When the statement allows it, ``LIMIT``/``OFFSET`` are appended so only the
+    page (plus one row to detect more) is produced. ``total_rows`` is exact when
+    the page reaches the end or the count query succeeds, otherwise it is a
+    lower bound and ``total_rows_exact`` is false.
+    """
+    sql = _prepare(statement)
+    offset = max(0, int(offset))
+    limit = min(max(1, int(limit)), SQL_PREVIEW_MAX_PAGE_SIZE)
+
+    body = _statement_body(sql)
+    cached = sql_result_cache.get(_cache_key(sql))
+    if cached is not None or body is None:
+        columns, rows = cached if cached is not None else _execute(sql)
+        page = rows[offset : offset + limit]
+        total, exact = len(rows), True
+    else:
+        columns, rows = _execute(f"{body} LIMIT {limit + 1} OFFSET {offset}")
+        page = rows[:limit]
+        total, exact = offset + len(rows), True
+        if len(rows) > limit or (offset and not rows):
+            counted = _count_rows(body)
+            total, exact = (counted, True) if counted is not None else (offset + len(rows), False)
+
+    end = offset + len(page)
+    return {
+        "columns": columns,
+        "rows": [list(row) for row in page],
+        "total_rows": total,
+        "total_rows_exact": exact,
+        "offset": offset,
+        "next_offset": end if page and (end < total or not exact) else None,
+    }
@@ -0,0 +1,178 @@
+"""Result cache for SQL exercise statements.
+
+The exercise database is read-only, so a statement's result never changes.
+Results are kept in a byte-bounded LRU keyed by backend and statement text
+as typed (MySQL names unaliased columns after it).
+Concurrent callers with the same key share one execution (single flight):
+the first runs the statement, the others wait for its result or error. A
+waiting caller still honours its own cancellation and deadline, and after
+``SQL_RESULT_CACHE_WAIT_SECONDS`` runs the statement itself.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+from app.cancellation import check_cancelled
+from app.cost_policy import check_deadline
+from app.errors import QuestionCancelledError
+
+SQL_RESULT_CACHE_ENABLED = os.getenv("SQL_RESULT_CACHE_ENABLED", "true").lower() == "true"
+SQL_RESULT_CACHE_MAX_BYTES = max(1, int(os.getenv("SQL_RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+SQL_RESULT_CACHE_WAIT_SECONDS = max(0.0, float(os.getenv("SQL_RESULT_CACHE_WAIT_SECONDS", "30")))
+# How often a waiting caller checks its cancellation and deadline.
+WAIT_POLL_SECONDS = 0.1
+# Rows measured to extrapolate the size of a result.
+SIZE_SAMPLE_ROWS = 64
+
+Result = Tuple[List[str], List[Tuple[Any, ...]]]
+
+
+def _estimate_size(columns: Tuple[str, ...], rows: Tuple[Tuple[Any, ...], ...]) -> int:
+    """Approximate bytes held by a result, extrapolated from its first rows."""
+    size = sys.getsizeof(rows) + sum(sys.getsizeof(column) for column in columns)
+    sample = rows[:SIZE_SAMPLE_ROWS]
+    if sample:
+        sampled = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in sample)
+        size += sampled * len(rows) // len(sample)
+    return size
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Result | None = None
+        self.error: BaseException | None = None
+
+
+class SqlResultCache:
+    def __init__(
+        self,
+        max_bytes: int = SQL_RESULT_CACHE_MAX_BYTES,
+        enabled: bool = SQL_RESULT_CACHE_ENABLED,
+        wait_seconds: float = SQL_RESULT_CACHE_WAIT_SECONDS,
+    ):
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.wait_seconds = wait_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[str, ...], Tuple[Tuple[Any, ...], ...], int]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.wait_timeouts = 0
+
+    def get(self, key: Hashable) -> Result | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[0]), list(entry[1])
+
+    def get_or_execute(self, key: Hashable, execute: Callable[[], Result]) -> Result:
+        """Return the cached result for ``key`` or run ``execute`` once for all concurrent callers."""
+        if not self.enabled:
+            return execute()
+
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[0]), list(entry[1])
+
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+                    self.misses += 1
+                else:
+                    self.coalesced += 1
+
+            if leader:
+                break
+            if not self._wait(flight):
+                # The leader is stuck; do not tie this request to it any longer.
+                with self._lock:
+                    self.wait_timeouts += 1
+                return execute()
+            if isinstance(flight.error, QuestionCancelledError):
+                # The leader's preview was superseded, not this one: run it ourselves.
+                continue
+            if flight.error is not None:
+                raise flight.error
+            columns, rows = flight.result
+            return list(columns), list(rows)
+
+        size = 0
+        try:
+            columns, rows = execute()
+            flight.result = (tuple(columns), tuple(rows))
+            size = _estimate_size(*flight.result)
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+                if flight.result is not None:
+                    self._put(key, *flight.result, size)
+            flight.done.set()
+        return list(columns), list(rows)
+
+    def _wait(self, flight: _Flight) -> bool:
+        """Wait for the leader's flight; ``False`` if it took longer than ``wait_seconds``."""
+        deadline = time.monotonic() + self.wait_seconds
+        while not flight.done.wait(WAIT_POLL_SECONDS):
+            check_cancelled()
+            check_deadline()
+            if time.monotonic() >= deadline:
+                return False
+        return True
+
+    def _put(self, key: Hashable, columns: Tuple[str, ...], rows: Tuple[Tuple[Any, ...], ...], size: int) -> None:
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (columns, rows, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self._bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "evictions": self.evictions,
+                "wait_timeouts": self.wait_timeouts,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+                "shared_ratio": ((self.hits + self.coalesced) / lookups) if lookups else 0.0,
+            }
+
+
+sql_result_cache = SqlResultCache()
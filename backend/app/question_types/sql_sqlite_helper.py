@@ -0,0 +1,471 @@
+"""In-memory SQLite stand-in for the MySQL exercise database.
+
+The Mondial dump in ``resources/sql`` is loaded once per process into an
+in-memory database, serialized, and deserialized into one private connection
+per thread, so previews never touch the network or wait for a pool slot.
+
+Statements are adapted to behave like MySQL where the exercises depend on it:
+
+* ``VARCHAR`` columns use ``NOCASE`` collation (MySQL's default collation is
+  case-insensitive),
+* ``/`` is a decimal division and ``DIV`` an integer division; columns built
+  from ``/`` or ``AVG`` are rounded to four decimals like MySQL's
+  ``div_precision_increment``,
+* common MySQL functions (``CONCAT``, ``IF``, ``LEFT``, ``YEAR``, ...) are
+  registered as SQLite functions.
+
+The connection is ``query_only`` and an authorizer rejects everything but
+reads, mirroring the ``SELECT``-only MySQL account.
+"""
+
+import math
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Tuple
+
+from app.cancellation import check_cancelled, on_cancel
+from app.question_types.sql_admission import PlanEstimate
+from app.question_types.sql_lexer import significant, tokenize
+
+RESOURCES_DIR = Path(__file__).resolve().parents[1] / "resources" / "sql"
+PROGRESS_HANDLER_STEPS = 10000
+READ_ONLY_MESSAGE = "Nur Leseoperationen sind erlaubt."
+TIMEOUT_MESSAGE = "Die Abfrage hat zu lange gedauert. Bitte passen Sie die SQL-Abfrage an."
+
+_DECIMAL_SCALE = Decimal("0.0001")
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+_SELECT_LIST_END = {"from", "union", "intersect", "except", "order", "limit", "where", "group", "having", "into"}
+
+_ALIAS_STOP_WORDS = {
+    "where", "join", "inner", "left", "right", "full", "outer", "cross", "natural", "straight_join",
+    "on", "using", "group", "order", "limit", "having", "union", "intersect", "except", "window",
+}
+_SEARCH_PATTERN = re.compile(
+    r"^SEARCH (?P<name>\S+)(?: USING (?:COVERING )?(?:INDEX (?P<index>\S+)|(?P<integer>INTEGER )?PRIMARY KEY))?"
+    r"(?: \((?P<constraints>.*)\))?"
+)
+
+_image: bytes | None = None
+_plan_statistics: Tuple[Dict[str, int], Dict[str, List[int]]] | None = None
+_image_lock = threading.Lock()
+_local = threading.local()
+
+
+# --- MySQL compatible functions ------------------------------------------------
+
+
+def _null_safe(fn):
+    def wrapper(*args):
+        if any(arg is None for arg in args):
+            return None
+        return fn(*args)
+
+    return wrapper
+
+
+def _as_text(value: Any) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _date_part(index: int):
+    def extract(value):
+        try:
+            return date.fromisoformat(str(value)[:10]).timetuple()[index]
+        except ValueError:
+            return None
+
+    return _null_safe(extract)
+
+
+def _mysql_round(value, digits=0):
+    try:
+        quantum = Decimal(1).scaleb(-int(digits))
+        rounded = Decimal(repr(value) if isinstance(value, float) else str(value)).quantize(quantum, ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        return None
+    if int(digits) <= 0:
+        return int(rounded)
+    return float(rounded) if isinstance(value, float) else str(rounded)
+
+
+def _mysql_truncate(value, digits):
+    factor = 10 ** int(digits)
+    truncated = math.trunc(value * factor) / factor
+    return int(truncated) if int(digits) <= 0 else truncated
+
+
+def _mysql_mod(a, b):
+    if b == 0:
+        return None
+    if isinstance(a, int) and isinstance(b, int):
+        return int(math.fmod(a, b))
+    return math.fmod(a, b)
+
+
+def _mysql_regexp(pattern, value):
+    if pattern is None or value is None:
+        return None
+    return 1 if re.search(str(pattern), str(value), flags=re.IGNORECASE) else 0
+
+
+def _mysql_locate(substring, string, position=1):
+    return str(string).lower().find(str(substring).lower(), max(int(position), 1) - 1) + 1
+
+
+_FUNCTIONS = [
+    ("concat", -1, _null_safe(lambda *args: "".join(_as_text(arg) for arg in args))),
+    ("concat_ws", -1, lambda sep, *args: None if sep is None else str(sep).join(_as_text(a) for a in args if a is not None)),
+    ("if", 3, lambda condition, a, b: a if condition not in (None, 0, "", "0") else b),
+    ("left", 2, _null_safe(lambda s, n: str(s)[: max(int(n), 0)])),
+    ("right", 2, _null_safe(lambda s, n: str(s)[-int(n):] if int(n) > 0 else "")),
+    ("ucase", 1, _null_safe(lambda s: str(s).upper())),
+    ("lcase", 1, _null_safe(lambda s: str(s).lower())),
+    ("char_length", 1, _null_safe(lambda s: len(str(s)))),
+    ("character_length", 1, _null_safe(lambda s: len(str(s)))),
+    ("locate", 2, _null_safe(_mysql_locate)),
+    ("locate", 3, _null_safe(_mysql_locate)),
+    ("year", 1, _date_part(0)),
+    ("month", 1, _date_part(1)),
+    ("day", 1, _date_part(2)),
+    ("dayofmonth", 1, _date_part(2)),
+    ("floor", 1, _null_safe(lambda x: math.floor(x))),
+    ("ceil", 1, _null_safe(lambda x: math.ceil(x))),
+    ("ceiling", 1, _null_safe(lambda x: math.ceil(x))),
+    ("round", 1, _null_safe(_mysql_round)),
+    ("round", 2, _null_safe(_mysql_round)),
+    ("truncate", 2, _null_safe(_mysql_truncate)),
+    ("mod", 2, _null_safe(_mysql_mod)),
+    ("greatest", -1, _null_safe(lambda *args: max(args))),
+    ("least", -1, _null_safe(lambda *args: min(args))),
+    ("regexp", 2, _mysql_regexp),
+]
+
+
+# --- statement translation -----------------------------------------------------
+
+
+class SelectItem(NamedTuple):
+    original: str
+    rewritten: str
+    decimal: bool
+    star: bool
+
+
+def translate_statement(sql: str) -> Tuple[str, List[SelectItem]]:
+    """Rewrite MySQL operators for SQLite.
+
+    Also returns the top-level items of the first ``SELECT`` list: whether each
+    needs MySQL's decimal scaling, and its original text, because SQLite names
+    unaliased columns after the rewritten text.
+    """
+    out: List[str] = []
+    items: List[SelectItem] = []
+    state = "before"  # before -> select_list -> after
+    depth = 0
+    original: List[str] = []
+    rewritten_item: List[str] = []
+    decimal = False
+
+    def close_item():
+        text = "".join(original).strip()
+        items.append(
+            SelectItem(text, "".join(rewritten_item).strip(), decimal, text == "*" or text.endswith(".*"))
+        )
+
+    for kind, text in tokenize(sql):
+        lowered = text.lower() if kind == "word" else text
+        rewritten = " " if kind == "comment" else text
+        if kind == "symbol" and text == "/":
+            rewritten = "* 1.0 /"
+        elif kind == "symbol" and text == "-" and out and out[-1].endswith("-"):
+            rewritten = " -"  # SQLite would read "--" as a comment
+        elif kind == "word" and lowered == "div":
+            rewritten = "/"
+
+        if state == "select_list" and depth == 0:
+            ends_list = (kind == "word" and lowered in _SELECT_LIST_END) or (kind == "symbol" and text in {";", ")"})
+            if ends_list:
+                close_item()
+                state = "after"
+            elif kind == "symbol" and text == ",":
+                close_item()
+                original, rewritten_item, decimal = [], [], False
+                out.append(rewritten)
+                continue
+
+        if state == "select_list":
+            leading_modifier = kind == "word" and lowered in {"distinct", "all"} and not "".join(original).strip()
+            if not leading_modifier:
+                original.append(rewritten if kind == "comment" else text)
+                rewritten_item.append(rewritten)
+                decimal = decimal or (kind == "symbol" and text == "/") or (kind == "word" and lowered == "avg")
+
+        if kind == "symbol" and text == "(":
+            depth += 1
+        elif kind == "symbol" and text == ")":
+            depth = max(depth - 1, 0)
+        elif state == "before" and depth == 0 and kind == "word" and lowered == "select":
+            state = "select_list"
+
+        out.append(rewritten)
+
+    if state == "select_list":
+        close_item()
+    return "".join(out), items
+
+
+def _column_items(items: List[SelectItem], column_count: int) -> List[SelectItem | None]:
+    """Align select items with result columns; ``*`` may expand to several columns."""
+    stars = [i for i, item in enumerate(items) if item.star]
+    if len(items) == column_count and not stars:
+        return list(items)
+    if len(stars) != 1:
+        return [None] * column_count
+    star = stars[0]
+    width = column_count - (len(items) - 1)
+    if width < 0:
+        return [None] * column_count
+    return items[:star] + [None] * width + items[star + 1 :]
+
+
+def _to_mysql_decimal(value: Any) -> Any:
+    if isinstance(value, float) and math.isfinite(value):
+        return Decimal(repr(value)).quantize(_DECIMAL_SCALE, ROUND_HALF_UP)
+    return value
+
+
+# --- connections ---------------------------------------------------------------
+
+
+def _translate_schema(schema_sql: str) -> str:
+    schema_sql = re.sub(r"(VARCHAR\s*\(\s*\d+\s*\))", r"\1 COLLATE NOCASE", schema_sql, flags=re.IGNORECASE)
+    # InnoDB clusters rows by primary key, so scans (and ORDER BY ties) follow key order.
+    return re.sub(
+        r"(PRIMARY\s+KEY\s*\([^)]*\)\s*\))\s*;",
+        r"\1 WITHOUT ROWID;",
+        schema_sql,
+        flags=re.IGNORECASE,
+    )
+
+
+def _coerce_integer_columns(conn: sqlite3.Connection) -> None:
+    """Round fractional values in ``INT`` columns, as MySQL does on insert."""
+    tables = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+    for table in tables:
+        for column in conn.execute(f'PRAGMA table_info("{table}")'):
+            name, declared_type = column[1], column[2].upper()
+            if "INT" in declared_type:
+                conn.execute(
+                    f'UPDATE "{table}" SET "{name}" = CAST(ROUND("{name}") AS INTEGER) WHERE typeof("{name}") = \'real\''
+                )
+
+
+def _build_image() -> bytes:
+    conn = sqlite3.connect(":memory:")
+    try:
+        schema = (RESOURCES_DIR / "schema.sql").read_text(encoding="utf-8")
+        data = (RESOURCES_DIR / "data.sql").read_text(encoding="utf-8")
+        conn.executescript(_translate_schema(schema))
+        # The MySQL dump commits in batches; load it as a single transaction instead.
+        data = re.sub(r"^\s*COMMIT\s*;\s*$", "", data, flags=re.IGNORECASE | re.MULTILINE)
+        conn.executescript(f"BEGIN;\n{data}\nCOMMIT;")
+        with conn:
+            _coerce_integer_columns(conn)
+        conn.execute("ANALYZE")
+        return conn.serialize()
+    finally:
+        conn.close()
+
+
+def _database_image() -> bytes:
+    global _image
+    if _image is None:
+        with _image_lock:
+            if _image is None:
+                _image = _build_image()
+    return _image
+
+
+def _authorize(action, *_):
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+def _thread_connection() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(":memory:", check_same_thread=False)
+        conn.deserialize(_database_image())
+        conn.execute("PRAGMA query_only = ON")
+        for name, arity, fn in _FUNCTIONS:
+            conn.create_function(name, arity, fn, deterministic=True)
+        conn.set_authorizer(_authorize)
+        _local.conn = conn
+    return conn
+
+
+def load_database() -> None:
+    """Build the shared database image ahead of the first query."""
+    _database_image()
+
+
+def _format_sqlite_error(error: sqlite3.Error) -> str:
+    message = str(error)
+    if "interrupted" in message.lower():
+        return TIMEOUT_MESSAGE
+    if "not authorized" in message.lower() or "readonly" in message.lower():
+        return READ_ONLY_MESSAGE
+    return message
+
+
+@contextmanager
+def stream(statement: str, timeout_seconds: float) -> Iterator[Tuple[List[str], Iterator[Tuple[Any, ...]]]]:
+    """Run ``statement`` and yield ``(columns, rows)`` with ``rows`` read lazily from the cursor."""
+    check_cancelled()
+    sql, items = translate_statement(statement)
+    conn = _thread_connection()
+    deadline = time.monotonic() + timeout_seconds
+    conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_HANDLER_STEPS)
+    cursor = conn.cursor()
+    try:
+        with on_cancel(conn.interrupt):
+            try:
+                cursor.execute(sql)
+            except sqlite3.Error as error:
+                check_cancelled()
+                raise ValueError(_format_sqlite_error(error)) from error
+            columns = [c[0] for c in cursor.description] if cursor.description else []
+
+            column_items = _column_items(items, len(columns))
+            for position, item in enumerate(column_items):
+                if item is not None and columns[position] == item.rewritten:
+                    columns[position] = item.original
+            decimal_columns = [item is not None and item.decimal for item in column_items]
+
+            def rows() -> Iterator[Tuple[Any, ...]]:
+                try:
+                    for row in cursor:
+                        if any(decimal_columns):
+                            row = tuple(_to_mysql_decimal(v) if decimal_columns[i] else v for i, v in enumerate(row))
+                        yield row
+                except sqlite3.Error as error:
+                    check_cancelled()
+                    raise ValueError(_format_sqlite_error(error)) from error
+
+            yield columns, rows()
+    finally:
+        cursor.close()
+        conn.set_progress_handler(None, 0)
+
+
+def execute(statement: str, max_rows: int, timeout_seconds: float) -> Tuple[List[str], List[Tuple[Any, ...]]]:
+    """Run ``statement`` and return ``(columns, rows)``; ``rows`` holds at most ``max_rows + 1`` rows."""
+    with stream(statement, timeout_seconds) as (columns, rows):
+        return columns, list(islice(rows, max_rows + 1))
+
+
+# --- plan estimates ------------------------------------------------------------
+
+
+def _statistics(conn: sqlite3.Connection) -> Tuple[Dict[str, int], Dict[str, List[int]]]:
+    """``(table -> rows, index -> [rows, rows per 1..n equal key columns])`` from ``ANALYZE``."""
+    global _plan_statistics
+    if _plan_statistics is None:
+        table_rows: Dict[str, int] = {}
+        index_rows: Dict[str, List[int]] = {}
+        for table, index, stat in conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1"):
+            numbers = [int(part) for part in stat.split() if part.isdigit()]
+            table_rows[table.lower()] = max(table_rows.get(table.lower(), 0), numbers[0])
+            if index is not None:
+                index_rows[index.lower()] = numbers
+        _plan_statistics = (table_rows, index_rows)
+    return _plan_statistics
+
+
+def _relation_aliases(sql: str) -> Dict[str, str]:
+    """Map aliases in ``FROM``/``JOIN`` clauses to the relation they name."""
+    words = [(kind, text.lower()) for kind, text in significant(tokenize(sql))]
+    aliases: Dict[str, str] = {}
+    for i in range(1, len(words)):
+        kind, name = words[i]
+        if kind not in {"word", "identifier"} or words[i - 1][1] not in {"from", "join", ","}:
+            continue
+        name = name.strip("`")
+        aliases.setdefault(name, name)
+        following = words[i + 1 : i + 3]
+        if following and following[0][1] == "as":
+            following = following[1:]
+        if following and following[0][0] in {"word", "identifier"} and following[0][1] not in _ALIAS_STOP_WORDS:
+            aliases[following[0][1].strip("`")] = name
+    return aliases
+
+
+def _loop_rows(detail: str, aliases: Dict[str, str], table_rows: Dict[str, int], index_rows: Dict[str, List[int]]) -> float:
+    """Rows visited by one iteration of a ``SCAN``/``SEARCH`` plan step."""
+    name = detail.split(" ", 2)[1].lower()
+    table = aliases.get(name, name)
+    # Unknown relations are CTEs or derived tables; assume the largest table.
+    rows = table_rows.get(table, max(table_rows.values(), default=1))
+    match = _SEARCH_PATTERN.match(detail) if detail.startswith("SEARCH ") else None
+    if match is None:
+        return float(rows)
+    if match.group("integer"):
+        return 1.0
+
+    constraints = match.group("constraints") or ""
+    equalities = constraints.count("=?")
+    index = (match.group("index") or table).lower()
+    stats = index_rows.get(index)
+    if equalities and stats and len(stats) > equalities:
+        return float(stats[equalities])
+    if constraints:
+        # Range or partial lookup, SQLite's own default guess.
+        return max(1.0, rows / 4)
+    return float(rows)
+
+
+def _plan_rows(children: Dict[int, List[Tuple[int, str]]], parent: int, estimate_loop) -> float:
+    examined = 0.0
+    outer_rows = 1.0
+    for node, detail in children.get(parent, []):
+        if detail.startswith(("SCAN ", "SEARCH ")) and detail != "SCAN CONSTANT ROW":
+            loop_rows = estimate_loop(detail)
+            examined += outer_rows * loop_rows
+            outer_rows *= loop_rows
+        elif detail.startswith("CORRELATED "):
+            examined += outer_rows * _plan_rows(children, node, estimate_loop)
+        else:
+            examined += _plan_rows(children, node, estimate_loop)
+    return examined
+
+
+def explain(statement: str) -> PlanEstimate:
+    """Estimate the rows ``statement`` examines from ``EXPLAIN QUERY PLAN``.
+
+    SQLite reports no costs, so nested loops are multiplied out using the
+    ``sqlite_stat1`` row counts and index selectivities.
+    """
+    sql, _ = translate_statement(statement)
+    conn = _thread_connection()
+    try:
+        plan = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    except sqlite3.Error as error:
+        raise ValueError(_format_sqlite_error(error)) from error
+
+    children: Dict[int, List[Tuple[int, str]]] = {}
+    for node, parent, _, detail in plan:
+        children.setdefault(parent, []).append((node, detail))
+
+    table_rows, index_rows = _statistics(conn)
+    aliases = _relation_aliases(sql)
+    rows = _plan_rows(children, 0, lambda detail: _loop_rows(detail, aliases, table_rows, index_rows))
+    return PlanEstimate(rows=rows)
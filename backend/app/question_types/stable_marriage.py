@@ -1,6 +1,7 @@
 import random
 import re
 
+from app.cost_policy import check_deadline
 from app.resources.synonyms import synonym_pairs
 
 
@@ -55,6 +56,7 @@ class StableMarriageQuestion:
         first_candidate = None
 
         for attempt in range(max_attempts):
+            check_deadline()
             attempt_rng = random.Random(self.seed + attempt)
             n = attempt_rng.choice(self.n_choices)
 
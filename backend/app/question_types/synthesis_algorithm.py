@@ -1,6 +1,8 @@
 import itertools
 
 from app.common import *
+from app.cost_policy import check_deadline
+from app.question_types.answer_key import LazyAnswerKey, answer_key_field
 
 
 # Per-difficulty configuration.
@@ -18,7 +20,7 @@ DIFFICULTY_SETTINGS = {
 }
 
 
-class SynthesisAlgorithmQuestion:
+class SynthesisAlgorithmQuestion(LazyAnswerKey):
     """Work through the 3NF synthesis algorithm step by step.
 
     Given a relation schema R and a set F of functional dependencies, the
@@ -57,6 +59,20 @@ class SynthesisAlgorithmQuestion:
     ]
     FD_STEPS = {"step_left", "step_right", "step_empty", "step_union"}
 
+    # The canonical-cover/synthesis chain is only needed for grading and is
+    # computed on first access (see ``_build_answer_key``).
+    f1 = answer_key_field("f1")
+    f2 = answer_key_field("f2")
+    f3 = answer_key_field("f3")
+    cover = answer_key_field("cover")
+    schemas = answer_key_field("schemas")
+    keys = answer_key_field("keys")
+    key_contained = answer_key_field("key_contained")
+    chosen_key = answer_key_field("chosen_key")
+    schemas_with_key = answer_key_field("schemas_with_key")
+    final_schemas = answer_key_field("final_schemas")
+    removed_schemas = answer_key_field("removed_schemas")
+
     def __init__(self, seed=None, difficulty="easy", mode="steps", **kwargs):
         self.difficulty = str(difficulty).lower()
         if self.difficulty not in DIFFICULTY_SETTINGS:
@@ -79,7 +95,7 @@ class SynthesisAlgorithmQuestion:
         self.all_attrs = frozenset(self.attributes)
 
         self.fds = self._build()
-        self._compute_chain()
+        self.f0 = self._dedup(self.fds)
 
     # ------------------------------------------------------------------ #
     # Core FD logic (pure helpers — operate on the arguments, not on self)
@@ -158,6 +174,7 @@ class SynthesisAlgorithmQuestion:
         all_attrs = set(all_attrs)
         keys = []
         for size in range(1, len(all_attrs) + 1):
+            check_deadline()
             for comb in itertools.combinations(sorted(all_attrs), size):
                 cand = set(comb)
                 if any(set(k) <= cand for k in keys):  # superset of a key -> not minimal
@@ -197,6 +214,7 @@ class SynthesisAlgorithmQuestion:
             if state in seen:
                 continue
             seen.add(state)
+            check_deadline()
             work = [(set(lhs), set(rhs)) for lhs, rhs in state]
             moves = []
             for i, (lhs, rhs) in enumerate(work):
@@ -226,6 +244,7 @@ class SynthesisAlgorithmQuestion:
             if state in seen:
                 continue
             seen.add(state)
+            check_deadline()
             work = [(set(lhs), set(rhs)) for lhs, rhs in state]
             moves = []
             for i, (lhs, rhs) in enumerate(work):
@@ -247,25 +266,58 @@ class SynthesisAlgorithmQuestion:
     # Deterministic computation of the whole chain
     # ------------------------------------------------------------------ #
     def _compute_chain(self):
+        """Recompute ``f0`` from ``fds`` and eagerly rebuild the answer key."""
         self.f0 = self._dedup(self.fds)
-        self.f1 = self._left_reduce(self.f0)
-        self.f2 = self._right_reduce(self.f1)
-        self.f3 = self._remove_empty(self.f2)
-        self.cover = self._union_same_lhs(self.f3)  # F_c
-
-        self.schemas = self._schemas_from_cover(self.cover)  # S5
-        self.keys = self._candidate_keys(self.all_attrs, self.f0)
-        self.key_contained = any(
-            set(k) <= s for s in self.schemas for k in self.keys
+        self._reset_answer_key()
+        return self.answer_key
+
+    def _build_answer_key(self):
+        f1 = self._left_reduce(self.f0)
+        f2 = self._right_reduce(f1)
+        f3 = self._remove_empty(f2)
+        cover = self._union_same_lhs(f3)  # F_c
+
+        schemas = self._schemas_from_cover(cover)  # S5
+        keys = self._candidate_keys(self.all_attrs, self.f0)
+        key_contained = any(
+            set(k) <= s for s in schemas for k in keys
         )
-        self.chosen_key = min(self.keys, key=lambda k: (len(k), sorted(k))) if self.keys else None
+        chosen_key = min(keys, key=lambda k: (len(k), sorted(k))) if keys else None
+
+        schemas_with_key = set(schemas)
+        if not key_contained and chosen_key is not None:
+            schemas_with_key.add(frozenset(chosen_key))  # S6
+
+        final_schemas = self._drop_contained(schemas_with_key)  # S7
+        return {
+            "f1": f1,
+            "f2": f2,
+            "f3": f3,
+            "cover": cover,
+            "schemas": schemas,
+            "keys": keys,
+            "key_contained": key_contained,
+            "chosen_key": chosen_key,
+            "schemas_with_key": schemas_with_key,
+            "final_schemas": final_schemas,
+            "removed_schemas": schemas_with_key - final_schemas,
+            # Reduction state spaces, filled on first use: the left reductions of
+            # f0 and the right reductions per selected left-reduction branch.
+            "left_options": None,
+            "right_options": {},
+        }
 
-        self.schemas_with_key = set(self.schemas)
-        if not self.key_contained and self.chosen_key is not None:
-            self.schemas_with_key.add(frozenset(self.chosen_key))  # S6
+    def _left_options(self):
+        key = self.answer_key
+        if key["left_options"] is None:
+            key["left_options"] = self._all_left_reductions(self.f0)
+        return key["left_options"]
 
-        self.final_schemas = self._drop_contained(self.schemas_with_key)  # S7
-        self.removed_schemas = self.schemas_with_key - self.final_schemas
+    def _right_options(self, selected_left):
+        cache = self.answer_key["right_options"]
+        if selected_left not in cache:
+            cache[selected_left] = self._all_right_reductions(selected_left)
+        return cache[selected_left]
 
     # ------------------------------------------------------------------ #
     # Instance generation
@@ -353,6 +405,7 @@ class SynthesisAlgorithmQuestion:
         fallback = None
         soft = None  # meets difficulty but multiple keys
         for _ in range(3000):
+            check_deadline()
             fds = self._generate_fds()
             if len(fds) < self.n_fd:
                 continue
@@ -591,12 +644,12 @@ class SynthesisAlgorithmQuestion:
         path = {}
 
         # Step 1 — left reduction (branching)
-        left_opts = self._all_left_reductions(self.f0)
+        left_opts = self._left_options()
         path["step_left"] = choose("step_left", left_opts, self._norm_fds(self.f1))
         sel_left = path["step_left"]["selected"]
 
         # Step 2 — right reduction from the selected left result (branching)
-        right_opts = self._all_right_reductions(sel_left)
+        right_opts = self._right_options(sel_left)
         path["step_right"] = choose(
             "step_right", right_opts, self._norm_fds(self._right_reduce(sel_left))
         )
@@ -2,6 +2,7 @@ import itertools
 import random
 import re
 
+from app.cost_policy import check_deadline
 from app.question_types.fp_tree_eval_helpers import (
     evaluate_fp_tree,
     parse_fp_tree_payload,
@@ -148,6 +149,7 @@ class UCCDiscoveryQuestion:
         )
 
         for _attempt in range(2000):
+            check_deadline()
             columns = []
 
             for _column_index in range(num_columns):
@@ -1,6 +1,7 @@
 import json
 
 from app.common import *
+from app.cost_policy import check_deadline
 
 
 # Per-difficulty configuration.
@@ -245,6 +246,7 @@ class WaitForGraphQuestion:
         fallback = None
 
         for _ in range(2000):
+            check_deadline()
             held, requests = self._random_state()
             edges = self._derive_edges(held, requests)
 
@@ -0,0 +1,193 @@
+"""Per-user request rate limiting.
+
+``RATE_LIMIT_BACKEND`` selects the implementation:
+
+* ``mongo`` - one ``find_one_and_update`` on ``rate_limit_counters`` per
+  request; exact across workers.
+* ``local`` - an in-process token bucket per user. Every
+  ``RATE_LIMIT_FLUSH_SECONDS`` a background task of the worker writes its
+  counts to the same counter documents in one bulk write and reads back the
+  totals, so a user
+  spreading requests over several workers is still caught, just up to one
+  flush interval late. Mongo write load scales with workers, not requests.
+"""
+
+import logging
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Tuple
+
+from mongoengine.connection import get_db
+from pymongo import ReturnDocument, UpdateOne
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local").lower()
+RATE_LIMIT_PER_MINUTE = max(1, int(os.getenv("RATE_LIMIT_PER_MINUTE", "30")))
+RATE_LIMIT_WINDOW_SECONDS = max(1, int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60")))
+# Bucket capacity as a multiple of RATE_LIMIT_PER_MINUTE.
+RATE_LIMIT_BURST = max(0.1, float(os.getenv("RATE_LIMIT_BURST", "1.0")))
+RATE_LIMIT_FLUSH_SECONDS = max(0.1, float(os.getenv("RATE_LIMIT_FLUSH_SECONDS", "5")))
+
+# (username, window start epoch) -> requests
+WindowCounts = Dict[Tuple[str, int], int]
+CounterStore = Callable[[WindowCounts], WindowCounts]
+
+
+def _window_start(epoch_seconds: float) -> int:
+    epoch_seconds = int(epoch_seconds)
+    return epoch_seconds - (epoch_seconds % RATE_LIMIT_WINDOW_SECONDS)
+
+
+def _counter_update(username: str, window_start: int, count: int) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    return (
+        {"_id": f"{username}:{window_start}"},
+        {
+            "$inc": {"count": count},
+            "$setOnInsert": {
+                "username": username,
+                "window_start": datetime.fromtimestamp(window_start, tz=timezone.utc),
+                "expires_at": datetime.fromtimestamp(window_start + 2 * RATE_LIMIT_WINDOW_SECONDS, tz=timezone.utc),
+            },
+        },
+    )
+
+
+def flush_counts_to_mongo(counts: WindowCounts) -> WindowCounts:
+    """Add ``counts`` to ``rate_limit_counters`` and return the resulting totals."""
+    counters = get_db()["rate_limit_counters"]
+    counters.bulk_write(
+        [UpdateOne(*_counter_update(username, window, count), upsert=True) for (username, window), count in counts.items()],
+        ordered=False,
+    )
+    ids = [f"{username}:{window}" for username, window in counts]
+    totals = {}
+    for doc in counters.find({"_id": {"$in": ids}}, {"count": 1}):
+        username, window = doc["_id"].rsplit(":", 1)
+        totals[(username, int(window))] = int(doc.get("count", 0))
+    return totals
+
+
+class MongoRateLimiter:
+    def __init__(self, limit: int = RATE_LIMIT_PER_MINUTE):
+        self.limit = limit
+        self.limited = 0
+
+    def hit(self, username: str) -> int | None:
+        """Count one request; return the Retry-After seconds if it is over the limit."""
+        now = time.time()
+        window = _window_start(now)
+        result = get_db()["rate_limit_counters"].find_one_and_update(
+            *_counter_update(username, window, 1),
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if int((result or {}).get("count", 0)) <= self.limit:
+            return None
+        self.limited += 1
+        return max(1, RATE_LIMIT_WINDOW_SECONDS - int(now - window))
+
+    def flush(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "mongo", "limited": self.limited}
+
+
+class LocalRateLimiter:
+    def __init__(
+        self,
+        counter_store: CounterStore = flush_counts_to_mongo,
+        limit: int = RATE_LIMIT_PER_MINUTE,
+        burst: float = RATE_LIMIT_BURST,
+    ):
+        self.counter_store = counter_store
+        self.limit = limit
+        self.capacity = max(1.0, limit * burst)
+        self.refill_per_second = limit / RATE_LIMIT_WINDOW_SECONDS
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._pending: WindowCounts = defaultdict(int)
+        self._blocked_until: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.limited = 0
+        self.flushes = 0
+        self.flush_errors = 0
+
+    def hit(self, username: str) -> int | None:
+        now = time.monotonic()
+        with self._lock:
+            blocked_until = self._blocked_until.get(username)
+            if blocked_until is not None:
+                if blocked_until > now:
+                    self.limited += 1
+                    return max(1, math.ceil(blocked_until - now))
+                del self._blocked_until[username]
+
+            tokens, updated_at = self._buckets.get(username, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+            if tokens < 1:
+                self._buckets[username] = (tokens, now)
+                self.limited += 1
+                return max(1, math.ceil((1 - tokens) / self.refill_per_second))
+
+            self._buckets[username] = (tokens - 1, now)
+            self._pending[(username, _window_start(time.time()))] += 1
+            return None
+
+    def flush(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        if not pending:
+            return
+
+        try:
+            totals = self.counter_store(pending)
+        except Exception:
+            # Keep the counts for the next attempt; local buckets still limit meanwhile.
+            logger.exception("Failed to flush rate limit counters")
+            self.flush_errors += 1
+            with self._lock:
+                for key, count in pending.items():
+                    self._pending[key] += count
+            return
+
+        self.flushes += 1
+        wall_now = time.time()
+        now = time.monotonic()
+        with self._lock:
+            for (username, window), total in totals.items():
+                if total > self.limit and window == _window_start(wall_now):
+                    # Over the limit across all workers: block here until the window ends.
+                    self._blocked_until[username] = now + (window + RATE_LIMIT_WINDOW_SECONDS - wall_now)
+            self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        idle = self.capacity / self.refill_per_second
+        for username in [u for u, (_, updated_at) in self._buckets.items() if now - updated_at > idle]:
+            del self._buckets[username]
+        for username in [u for u, until in self._blocked_until.items() if until <= now]:
+            del self._blocked_until[username]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "local",
+                "tracked_users": len(self._buckets),
+                "blocked_users": len(self._blocked_until),
+                "pending_counts": len(self._pending),
+                "limited": self.limited,
+                "flushes": self.flushes,
+                "flush_errors": self.flush_errors,
+            }
+
+
+def create_rate_limiter(backend: str = RATE_LIMIT_BACKEND, counter_store: CounterStore = flush_counts_to_mongo):
+    if backend == "mongo":
+        return MongoRateLimiter()
+    if backend == "local":
+        return LocalRateLimiter(counter_store)
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND '{backend}'")
@@ -1,20 +1,26 @@
 import os
 import secrets
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from hashlib import sha256
 
 from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from mongoengine.errors import NotUniqueError
 from mongoengine.connection import get_db
-from passlib.context import CryptContext
 from pydantic import BaseModel, Field
-from pymongo import ReturnDocument
+from pymongo.errors import ConnectionFailure
 
+from app.circuit_breaker import CircuitBreaker
+from app.errors import DependencyUnavailableError, PasswordHasherSaturatedError
+from app.models.session_model import Session
 from app.models.user_model import User
+from app.password_hashing import AUTH_HASH_RETRY_AFTER_SECONDS, password_hasher
+from app.rate_limit import RATE_LIMIT_PER_MINUTE, create_rate_limiter, flush_counts_to_mongo
+from app.session_cache import SessionCache
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 MIN_PASSWORD_LENGTH = int(os.getenv("AUTH_MIN_PASSWORD_LENGTH", "8"))
 ALLOW_PUBLIC_USER_CREATION = os.getenv("ALLOW_PUBLIC_USER_CREATION", "false").lower() == "true"
 ADMIN_API_TOKEN = os.getenv("ADMIN_API_TOKEN", "")
@@ -23,8 +29,6 @@ AUTH_SESSION_HOURS = int(os.getenv("AUTH_SESSION_HOURS", "12"))
 AUTH_COOKIE_SECURE = os.getenv("AUTH_COOKIE_SECURE", "false").lower() == "true"
 AUTH_COOKIE_SAMESITE = os.getenv("AUTH_COOKIE_SAMESITE", "lax")
 RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
-RATE_LIMIT_PER_MINUTE = max(1, int(os.getenv("RATE_LIMIT_PER_MINUTE", "30")))
-RATE_LIMIT_WINDOW_SECONDS = max(1, int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60")))
 
 
 class CreateUserRequest(BaseModel):
@@ -57,11 +61,27 @@ def ensure_rate_limit_indexes() -> None:
     counters = db["rate_limit_counters"]
     counters.create_index("expires_at", expireAfterSeconds=0)
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def ensure_session_indexes() -> None:
+    Session.ensure_indexes()
 
-def verify_password(plain: str, hashed: str) -> bool:
-    return pwd_context.verify(plain, hashed)
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except (PasswordHasherSaturatedError, DependencyUnavailableError) as e:
+        raise _hashing_unavailable(e)
+
+async def verify_password(plain: str, hashed: str) -> bool:
+    try:
+        return await password_hasher.verify(plain, hashed)
+    except (PasswordHasherSaturatedError, DependencyUnavailableError) as e:
+        raise _hashing_unavailable(e)
+
+def _hashing_unavailable(error: Exception) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(AUTH_HASH_RETRY_AFTER_SECONDS)},
+    )
 
 
 def _hash_session_token(token: str) -> str:
@@ -91,38 +111,83 @@ def _clear_session_cookie(response: Response) -> None:
     )
 
 
+def _load_session_versions(user_ids) -> dict:
+    cursor = User._get_collection().find({"_id": {"$in": list(user_ids)}}, {"session_version": 1})
+    return {doc["_id"]: doc.get("session_version", 0) for doc in cursor}
+
+
+# Auth needs Mongo on every cache miss; fail fast instead of waiting out server selection.
+mongo_breaker = CircuitBreaker("MongoDB", failure_types=(ConnectionFailure,))
+session_cache = SessionCache(partial(mongo_breaker.call, _load_session_versions))
+rate_limiter = create_rate_limiter(counter_store=partial(mongo_breaker.call, flush_counts_to_mongo))
+
+
+def _bump_session_version(user: User) -> None:
+    """Make every worker drop its cached sessions of ``user``."""
+    User.objects(id=user.id).update_one(inc__session_version=1)
+    session_cache.invalidate(user_id=user.id)
+
+
+def _end_session(token_hash: str, user: User) -> None:
+    Session.objects(token_hash=token_hash).delete()
+    session_cache.invalidate(token_hash=token_hash)
+    _bump_session_version(user)
+
+
+def _end_all_sessions(user: User) -> None:
+    Session.objects(user=user).delete()
+    _bump_session_version(user)
+
+
 def _create_session_for_user(user: User) -> str:
     token = secrets.token_urlsafe(48)
-    user.session_token_hash = _hash_session_token(token)
-    user.session_expires_at = _session_expiry_utc()
-    user.save()
+    Session(
+        token_hash=_hash_session_token(token),
+        user=user,
+        expires_at=_session_expiry_utc(),
+    ).save()
     return token
 
 
-def _get_user_from_session_token(session_token: str | None) -> User | None:
+def _get_user_from_session_token(session_token: str | None, use_cache: bool = True) -> User | None:
     if not session_token:
         return None
 
     token_hash = _hash_session_token(session_token)
-    user = User.objects(session_token_hash=token_hash).first()
-    if not user or not user.session_expires_at:
+    if use_cache:
+        cached = session_cache.get(token_hash)
+        if cached is not None:
+            return cached
+
+    return mongo_breaker.call(_load_session_user, token_hash)
+
+
+def _load_session_user(token_hash: str) -> User | None:
+    session = Session.objects(token_hash=token_hash).only("user", "expires_at").as_pymongo().first()
+    if not session:
         return None
 
-    now = datetime.now(timezone.utc)
-    expires_at = user.session_expires_at
+    # The TTL monitor only runs about once a minute, so expiry is still checked here.
+    expires_at = session["expires_at"]
     if expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
+    if expires_at <= datetime.now(timezone.utc):
+        return None
 
-    if expires_at <= now:
-        user.session_token_hash = None
-        user.session_expires_at = None
-        user.save()
+    user = User.objects(id=session["user"]).first()
+    if not user:
         return None
 
+    session_cache.put(token_hash, user, expires_at)
     return user
 
 
 def require_authenticated_user(request: Request) -> User:
+    """Resolve the session user, possibly from the session cache.
+
+    The returned document may be shared with concurrent requests; handlers that
+    modify the user must depend on ``require_current_user`` instead.
+    """
     session_token = request.cookies.get(AUTH_SESSION_COOKIE_NAME)
     user = _get_user_from_session_token(session_token)
     if not user:
@@ -130,6 +195,14 @@ def require_authenticated_user(request: Request) -> User:
     return user
 
 
+def require_current_user(request: Request) -> User:
+    session_token = request.cookies.get(AUTH_SESSION_COOKIE_NAME)
+    user = _get_user_from_session_token(session_token, use_cache=False)
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication required")
+    return user
+
+
 def require_password_changed(user: User = Depends(require_authenticated_user)) -> User:
     _enforce_user_rate_limit(user.username)
     if user.must_change_password:
@@ -140,84 +213,65 @@ def _enforce_user_rate_limit(username: str) -> None:
     if not RATE_LIMIT_ENABLED:
         return
 
-    now = datetime.now(timezone.utc)
-    epoch_seconds = int(now.timestamp())
-    bucket_start_epoch = epoch_seconds - (epoch_seconds % RATE_LIMIT_WINDOW_SECONDS)
-    window_start = datetime.fromtimestamp(bucket_start_epoch, tz=timezone.utc)
-    expires_at = datetime.fromtimestamp(
-        bucket_start_epoch + (2 * RATE_LIMIT_WINDOW_SECONDS),
-        tz=timezone.utc,
-    )
-    counter_id = f"{username}:{bucket_start_epoch}"
-
-    db = get_db()
-    counters = db["rate_limit_counters"]
-    result = counters.find_one_and_update(
-        {"_id": counter_id},
-        {
-            "$inc": {"count": 1},
-            "$setOnInsert": {
-                "username": username,
-                "window_start": window_start,
-                "expires_at": expires_at,
-            },
-        },
-        upsert=True,
-        return_document=ReturnDocument.AFTER,
-    )
-
-    request_count = int((result or {}).get("count", 0))
-    if request_count <= RATE_LIMIT_PER_MINUTE:
+    retry_after_seconds = rate_limiter.hit(username)
+    if retry_after_seconds is None:
         return
 
-    retry_after_seconds = max(1, RATE_LIMIT_WINDOW_SECONDS - (epoch_seconds - bucket_start_epoch))
     raise HTTPException(
         status_code=429,
         detail=f"Rate limit exceeded: max {RATE_LIMIT_PER_MINUTE} requests per minute. Try again in {retry_after_seconds}s.",
         headers={"Retry-After": str(retry_after_seconds)},
     )
 
+def _check_admin_token(x_admin_token: str | None, disabled_detail: str) -> None:
+    if not ADMIN_API_TOKEN:
+        raise HTTPException(status_code=503, detail=disabled_detail)
+
+    if x_admin_token != ADMIN_API_TOKEN:
+        raise HTTPException(status_code=403, detail="Missing or invalid admin token")
+
+
 def _require_admin_token(x_admin_token: str | None) -> None:
     if ALLOW_PUBLIC_USER_CREATION:
         return
 
-    if not ADMIN_API_TOKEN:
-        raise HTTPException(status_code=503, detail="User creation is disabled")
+    _check_admin_token(x_admin_token, "User creation is disabled")
 
-    if x_admin_token != ADMIN_API_TOKEN:
-        raise HTTPException(status_code=403, detail="Missing or invalid admin token")
+
+def require_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    _check_admin_token(x_admin_token, "Admin endpoints are disabled")
 
 
 @router.post("/create_user")
-def create_user(payload: CreateUserRequest, x_admin_token: str | None = Header(default=None)):
+async def create_user(payload: CreateUserRequest, x_admin_token: str | None = Header(default=None)):
     _require_admin_token(x_admin_token)
     username = payload.username.strip()
     password = payload.password
 
-    if User.objects(username=username).first():
+    if await run_in_threadpool(mongo_breaker.call, lambda: User.objects(username=username).first()):
         raise HTTPException(status_code=400, detail="User already exists")
 
     user = User(
         username=username,
-        password=hash_password(password),
+        password=await hash_password(password),
         display_name=payload.display_name,
         must_change_password=True
     )
     try:
-        user.save()
+        await run_in_threadpool(mongo_breaker.call, user.save)
     except NotUniqueError:
         raise HTTPException(status_code=409, detail="User already exists")
     return {"message": "User created", "username": username}
 
 
 @router.post("/login")
-def login(payload: LoginRequest, response: Response):
+async def login(payload: LoginRequest, response: Response):
     username = payload.username.strip()
-    user = User.objects(username=username).first()
-    if not user or not verify_password(payload.password, user.password):
+    user = await run_in_threadpool(mongo_breaker.call, lambda: User.objects(username=username).first())
+    if not user or not await verify_password(payload.password, user.password):
         raise HTTPException(status_code=401, detail="Invalid username or password")
 
-    session_token = _create_session_for_user(user)
+    session_token = await run_in_threadpool(mongo_breaker.call, _create_session_for_user, user)
     _set_session_cookie(response, session_token)
 
     return {
@@ -237,26 +291,31 @@ def get_current_session(user: User = Depends(require_authenticated_user)):
 
 
 @router.post("/logout")
-def logout(response: Response, user: User = Depends(require_authenticated_user)):
-    user.session_token_hash = None
-    user.session_expires_at = None
-    user.save()
+def logout(request: Request, response: Response, user: User = Depends(require_current_user)):
+    mongo_breaker.call(_end_session, _hash_session_token(request.cookies.get(AUTH_SESSION_COOKIE_NAME)), user)
     _clear_session_cookie(response)
     return {"message": "Logged out"}
 
 
 @router.post("/change_password")
-def change_password(
+async def change_password(
     payload: ChangePasswordRequest,
     response: Response,
-    user: User = Depends(require_authenticated_user),
+    user: User = Depends(require_current_user),
 ):
-    if not verify_password(payload.old_password, user.password):
+    if not await verify_password(payload.old_password, user.password):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    user.password = hash_password(payload.new_password)
+    user.password = await hash_password(payload.new_password)
     user.must_change_password = False
-    session_token = _create_session_for_user(user)
+    session_token = await run_in_threadpool(mongo_breaker.call, _replace_sessions, user)
     _set_session_cookie(response, session_token)
 
     return {"message": "Password updated successfully"}
+
+
+def _replace_sessions(user: User) -> str:
+    user.save()
+    # A new password signs out every other device.
+    _end_all_sessions(user)
+    return _create_session_for_user(user)
@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+AUTH_SESSION_CACHE_ENABLED = os.getenv("AUTH_SESSION_CACHE_ENABLED", "true").lower() == "true"
+AUTH_SESSION_CACHE_TTL_SECONDS = max(1, int(os.getenv("AUTH_SESSION_CACHE_TTL_SECONDS", "60")))
+AUTH_SESSION_CACHE_MAX_ENTRIES = max(1, int(os.getenv("AUTH_SESSION_CACHE_MAX_ENTRIES", "10000")))
+AUTH_SESSION_VERSION_POLL_SECONDS = max(1, int(os.getenv("AUTH_SESSION_VERSION_POLL_SECONDS", "5")))
+
+logger = logging.getLogger(__name__)
+
+VersionLoader = Callable[[Iterable[Any]], Dict[Any, int]]
+
+
+class SessionCache:
+    """In-process ``session token hash -> user`` cache.
+
+    Entries live for a short TTL (never past the session expiry) and are dropped
+    explicitly on logout/password change in this worker. Other workers learn
+    about those changes through ``User.session_version``: every
+    ``poll_seconds`` a background task calls ``poll_versions``, which loads the
+    versions of all cached users in one batched query and evicts the entries
+    whose version moved. If that query fails, entries are kept until their TTL.
+    """
+
+    def __init__(
+        self,
+        version_loader: VersionLoader,
+        ttl_seconds: int = AUTH_SESSION_CACHE_TTL_SECONDS,
+        max_entries: int = AUTH_SESSION_CACHE_MAX_ENTRIES,
+        poll_seconds: int = AUTH_SESSION_VERSION_POLL_SECONDS,
+        enabled: bool = AUTH_SESSION_CACHE_ENABLED,
+    ):
+        self.version_loader = version_loader
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.poll_seconds = poll_seconds
+        self.enabled = enabled
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, token_hash: str) -> Any | None:
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(token_hash)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    del self._entries[token_hash]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token_hash)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token_hash: str, user: Any, session_expires_at: datetime) -> None:
+        if not self.enabled:
+            return
+
+        remaining = (session_expires_at - datetime.now(timezone.utc)).total_seconds()
+        expires_at = time.monotonic() + min(self.ttl_seconds, remaining)
+        with self._lock:
+            self._entries[token_hash] = (user, expires_at)
+            self._entries.move_to_end(token_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token_hash: str | None = None, user_id: Any = None) -> None:
+        with self._lock:
+            if token_hash is not None and self._entries.pop(token_hash, None) is not None:
+                self.invalidations += 1
+            if user_id is not None:
+                for key in [k for k, (user, _) in self._entries.items() if user.id == user_id]:
+                    del self._entries[key]
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def poll_versions(self) -> None:
+        with self._lock:
+            cached = {user.id: getattr(user, "session_version", 0) or 0 for user, _ in self._entries.values()}
+        if not cached:
+            return
+        try:
+            current = self.version_loader(list(cached))
+        except Exception:
+            logger.warning("Failed to poll session versions", exc_info=True)
+            return
+        stale = {user_id for user_id, version in cached.items() if current.get(user_id) != version}
+        with self._lock:
+            for key in [k for k, (user, _) in self._entries.items() if user.id in stale]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+            }
@@ -0,0 +1,25 @@
+import pytest
+
+from app.question_types.hungarian_method import HungarianMethodQuestion
+from app.question_types.levenshtein import LevenshteinQuestion
+from app.question_types.synthesis_algorithm import SynthesisAlgorithmQuestion
+
+
+@pytest.mark.parametrize("cls", [LevenshteinQuestion, HungarianMethodQuestion, SynthesisAlgorithmQuestion])
+def test_answer_key_is_built_once_on_first_evaluate(cls, monkeypatch):
+    builds = []
+    original = cls._build_answer_key
+
+    def counting_build(self):
+        builds.append(self)
+        return original(self)
+
+    monkeypatch.setattr(cls, "_build_answer_key", counting_build)
+    question = cls(seed=3)
+
+    question.generate()
+    assert builds == []
+
+    question.evaluate({})
+    question.evaluate({})
+    assert builds == [question]
@@ -0,0 +1,133 @@
+import threading
+
+import pandas as pd
+import pytest
+
+from app.cancellation import CancelToken, PreviewRegistry, cancellation_scope, check_cancelled, on_cancel
+from app.errors import QuestionCancelledError
+from app.question_types import sql_query_helper, sql_sqlite_helper
+from app.question_types.relational_algebra_helper import execute_relational_algebra
+from app.question_types.sql_result_cache import SqlResultCache
+
+LONG_RUNNING_SQL = (
+    "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 100000000) "
+    "SELECT COUNT(*) FROM n"
+)
+
+
+def test_newer_sequence_cancels_running_preview():
+    registry = PreviewRegistry()
+    first = registry.begin("editor", 1)
+
+    second = registry.begin("editor", 2)
+
+    assert first.cancelled and not second.cancelled
+    with pytest.raises(QuestionCancelledError):
+        registry.begin("editor", 1)
+    assert registry.stats() == {"active": 1, "superseded": 1, "stale": 1, "disconnected": 0}
+
+
+def test_finish_only_removes_own_token():
+    registry = PreviewRegistry()
+    first = registry.begin("editor", 1)
+    second = registry.begin("editor", 2)
+
+    registry.finish("editor", first)
+    assert registry.stats()["active"] == 1
+
+    registry.finish("editor", second)
+    assert registry.stats()["active"] == 0
+
+
+def test_callbacks_run_on_cancel_and_are_removed_after_the_block():
+    token = CancelToken()
+    calls = []
+
+    with cancellation_scope(token):
+        with on_cancel(lambda: calls.append("block")):
+            pass
+        check_cancelled()
+        token.cancel()
+        with pytest.raises(QuestionCancelledError):
+            check_cancelled()
+        with on_cancel(lambda: calls.append("late")):
+            pass
+
+    check_cancelled()
+    assert calls == ["late"]
+
+
+def test_mysql_kill_finishes_before_the_connection_is_released(monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    kills = []
+
+    def slow_kill(connection_id):
+        started.set()
+        release.wait(5)
+        kills.append(connection_id)
+
+    monkeypatch.setattr(sql_query_helper, "_kill_query", slow_kill)
+    token = CancelToken()
+    with cancellation_scope(token):
+        with sql_query_helper._kill_on_cancel(7):
+            token.cancel()
+            assert started.wait(5)
+            threading.Timer(0.05, release.set).start()
+        assert kills == [7]
+
+    # A callback popped by cancel() but run only after the block must not kill the next query.
+    late = CancelToken()
+    with cancellation_scope(late):
+        with sql_query_helper._kill_on_cancel(8):
+            callbacks = list(late._callbacks)
+    for callback in callbacks:
+        callback()
+    assert kills == [7]
+
+
+def test_sqlite_statement_is_interrupted():
+    token = CancelToken()
+    timer = threading.Timer(0.2, token.cancel)
+    timer.start()
+
+    with cancellation_scope(token), pytest.raises(QuestionCancelledError):
+        with sql_sqlite_helper.stream(LONG_RUNNING_SQL, timeout_seconds=30) as (_, rows):
+            list(rows)
+    timer.cancel()
+
+
+def test_waiters_retry_when_the_leader_is_cancelled():
+    cache = SqlResultCache()
+    leader_started = threading.Event()
+    release_leader = threading.Event()
+    results = []
+
+    def cancelled_leader():
+        leader_started.set()
+        release_leader.wait()
+        raise QuestionCancelledError("superseded")
+
+    def run_leader():
+        with pytest.raises(QuestionCancelledError):
+            cache.get_or_execute("key", cancelled_leader)
+
+    leader = threading.Thread(target=run_leader)
+    leader.start()
+    leader_started.wait()
+    waiter = threading.Thread(target=lambda: results.append(cache.get_or_execute("key", lambda: (["a"], [(1,)]))))
+    waiter.start()
+    while cache.stats()["coalesced"] == 0:
+        pass
+    release_leader.set()
+    leader.join()
+    waiter.join()
+
+    assert results == [(["a"], [(1,)])]
+
+
+def test_relational_algebra_stops_when_cancelled():
+    token = CancelToken()
+    token.cancel()
+
+    with cancellation_scope(token), pytest.raises(QuestionCancelledError):
+        execute_relational_algebra({"R": pd.DataFrame({"R.a": [1, 2]})}, "\\projection{R.a}(R)")
@@ -0,0 +1,77 @@
+import pytest
+
+from app.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _fail():
+    raise ConnectionError("down")
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("db", failure_types=(ConnectionError,), failure_threshold=2, reset_seconds=10, clock=clock)
+
+
+def test_opens_after_threshold_and_fails_fast(breaker):
+    calls = []
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == [] and breaker.stats()["rejected"] == 1
+
+
+def test_half_open_trial_closes_or_reopens(breaker, clock):
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(ConnectionError):
+        breaker.call(_fail)
+    assert breaker.state == OPEN
+
+    clock.now = 20
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == CLOSED and breaker.stats()["failures"] == 0
+
+
+def test_half_open_allows_a_single_trial(breaker, clock):
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            breaker.call(_fail)
+    clock.now = 10
+
+    def trial():
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: None)
+        return "trial"
+
+    assert breaker.call(trial) == "trial"
+    assert breaker.state == CLOSED
+
+
+def test_other_errors_do_not_count_as_failures(breaker):
+    for _ in range(3):
+        with pytest.raises(ValueError):
+            breaker.call(int, "not a number")
+
+    assert breaker.state == CLOSED
@@ -0,0 +1,31 @@
+import time
+
+import pytest
+
+from app.cost_policy import apply_cost_policy, check_deadline, deadline
+from app.errors import QuestionCostLimitError, QuestionDeadlineExceededError
+
+
+def test_out_of_range_points_are_rejected():
+    with pytest.raises(QuestionCostLimitError):
+        apply_cost_policy("tukey_fences", {"num_points": 100000})
+
+    with pytest.raises(QuestionCostLimitError):
+        apply_cost_policy("sigma_rule", {"num_points": "-3"})
+
+
+def test_clamped_parameters_and_passthrough():
+    assert apply_cost_policy("sigma_rule", {"num_points": 12, "dimensions": 7}) == {"num_points": 12, "dimensions": 2}
+    assert apply_cost_policy("sigma_rule", {"num_points": "random"}) == {"num_points": "random"}
+    assert apply_cost_policy("levenshtein", {"seed": 10**12}) == {"seed": 10**12}
+
+
+def test_check_deadline_only_fires_inside_expired_deadline():
+    check_deadline()
+
+    with deadline(0.001):
+        time.sleep(0.01)
+        with pytest.raises(QuestionDeadlineExceededError):
+            check_deadline()
+
+    check_deadline()
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from app import instance_store
+from app.instance_store import InstanceStore, _generator_sources, build_store, load_instance_stores
+from app.question_types.fp_grow import FPGrowthAlgorithmQuestion
+from app.question_types.wait_for_graph import WaitForGraphQuestion
+
+
+@pytest.fixture
+def store_dir(tmp_path):
+    yield tmp_path
+    load_instance_stores({}, tmp_path)
+
+
+def test_stored_instances_round_trip(store_dir):
+    path = build_store("wait_for_graph", store_dir, seed_count=3)
+    store = InstanceStore("wait_for_graph", WaitForGraphQuestion, path)
+    try:
+        for seed in (1, 2, 3):
+            built = WaitForGraphQuestion(seed=seed, difficulty="medium")
+            loaded = store.load({"seed": seed, "difficulty": "medium"})
+
+            assert loaded.generate() == built.generate()
+            assert isinstance(loaded.rng, random.Random)
+        assert store.load({"seed": 4, "difficulty": "medium"}) is None
+        assert store.stats()["hits"] == 3
+    finally:
+        store.close()
+
+
+def test_fingerprint_covers_imported_helper_modules():
+    sources = {path.name for path in _generator_sources(FPGrowthAlgorithmQuestion)}
+
+    assert {"fp_grow.py", "frequent_itemset_helper.py", "fp_tree_eval_helpers.py"} <= sources
+
+
+def test_stale_stores_are_ignored(store_dir, monkeypatch):
+    build_store("wait_for_graph", store_dir, seed_count=3)
+    generators = {"wait_for_graph": {"class": WaitForGraphQuestion}}
+
+    load_instance_stores(generators, store_dir)
+    assert "wait_for_graph" in instance_store.instance_store_stats()
+
+    monkeypatch.setattr(instance_store, "_generator_fingerprint", lambda cls: "helper changed")
+    load_instance_stores(generators, store_dir)
+    assert instance_store.instance_store_stats() == {}
+
+
+def test_unseeded_requests_draw_from_the_precomputed_seeds(store_dir):
+    build_store("wait_for_graph", store_dir, seed_count=5, first_seed=1)
+    load_instance_stores({"wait_for_graph": {"class": WaitForGraphQuestion}}, store_dir)
+
+    seeds = {instance_store.assign_precomputed_seed("wait_for_graph", {"difficulty": "easy"})["seed"] for _ in range(50)}
+
+    assert seeds <= set(range(1, 6))
+    assert instance_store.assign_precomputed_seed("wait_for_graph", {"seed": 99}) == {"seed": 99}
+    assert instance_store.load_precomputed_instance("wait_for_graph", {"seed": 99}) is None
@@ -0,0 +1,62 @@
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+APP_DIR = Path(__file__).resolve().parents[1] / "app"
+
+
+class FakeCollection:
+    def __init__(self, existing):
+        self.existing = set(existing)
+        self.inserted = []
+
+    def find(self, query, projection):
+        return [{"username": name} for name in query["username"]["$in"] if name in self.existing]
+
+    def insert_many(self, docs, ordered):
+        self.inserted.extend(docs)
+
+
+@pytest.fixture
+def manage_users(monkeypatch):
+    # The script runs from backend/app and imports its models as top-level modules.
+    monkeypatch.syspath_prepend(str(APP_DIR))
+    return importlib.import_module("manage_users")
+
+
+def _write_csv(tmp_path, lines):
+    path = tmp_path / "users.csv"
+    path.write_text("username,password,display_name\n" + "".join(f"{line}\n" for line in lines))
+    return path
+
+
+def test_bulk_add_skips_duplicates_and_existing_users(manage_users, monkeypatch, tmp_path, capsys):
+    collection = FakeCollection(existing={"bob"})
+    monkeypatch.setattr(manage_users.User, "_get_collection", classmethod(lambda cls: collection))
+    monkeypatch.setattr(manage_users, "ProcessPoolExecutor", ThreadPoolExecutor)
+    csv_file = _write_csv(
+        tmp_path,
+        ["alice,secret-1,Alice", "bob,secret-2,Bob", "alice,secret-3,Alice again", ",secret-4,", "carol,secret-5,"],
+    )
+
+    manage_users.bulk_add_from_csv(csv_file, jobs=2)
+
+    assert [doc["username"] for doc in collection.inserted] == ["alice", "carol"]
+    assert manage_users.pwd_context.verify("secret-1", collection.inserted[0]["password"])
+    output = capsys.readouterr().out
+    assert "[+] Created 2 user(s)" in output
+    assert "[!] Skipped 3 user(s):" in output
+    assert "bob: already exists" in output
+
+
+def test_bulk_add_without_new_users_starts_no_workers(manage_users, monkeypatch, tmp_path, capsys):
+    collection = FakeCollection(existing={"bob"})
+    monkeypatch.setattr(manage_users.User, "_get_collection", classmethod(lambda cls: collection))
+    monkeypatch.setattr(manage_users, "ProcessPoolExecutor", None)
+
+    manage_users.bulk_add_from_csv(_write_csv(tmp_path, ["bob,secret-2,Bob"]))
+
+    assert collection.inserted == []
+    assert "[+] Created 0 user(s)" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+import asyncio
+
+import pytest
+
+from app.errors import PasswordHasherSaturatedError
+from app.password_hashing import PasswordHasher
+
+
+def test_hash_round_trip_and_saturation():
+    hasher = PasswordHasher(max_workers=1, queue_size=0)
+
+    async def scenario():
+        hashed = await hasher.hash("correct horse")
+        assert await hasher.verify("correct horse", hashed)
+        assert not await hasher.verify("wrong horse", hashed)
+
+        first = asyncio.ensure_future(hasher.hash("one"))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordHasherSaturatedError):
+            await hasher.hash("two")
+        await first
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        hasher.shutdown()
+
+    stats = hasher.stats()
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["completed"] == 4
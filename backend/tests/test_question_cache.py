@@ -0,0 +1,60 @@
+from app.question_cache import QuestionInstanceCache, _estimate_size
+from app.question_types.levenshtein import LevenshteinQuestion
+
+
+def test_seeded_instances_are_built_once():
+    cache = QuestionInstanceCache(max_entries=8, ttl_seconds=60)
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return LevenshteinQuestion(seed=7, difficulty="easy")
+
+    first = cache.get_or_build("levenshtein", {"seed": 7, "difficulty": "easy"}, builder)
+    second = cache.get_or_build("levenshtein", {"difficulty": "easy", "seed": 7}, builder)
+
+    assert first is second
+    assert len(builds) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_unseeded_instance_is_cached_under_drawn_seed():
+    cache = QuestionInstanceCache(max_entries=8, ttl_seconds=60)
+    question = cache.get_or_build("levenshtein", {}, lambda: LevenshteinQuestion())
+
+    again = cache.get_or_build("levenshtein", {"seed": question.seed}, lambda: None)
+
+    assert again is question
+
+
+def test_entry_limit_evicts_least_recently_used():
+    cache = QuestionInstanceCache(max_entries=2, ttl_seconds=60)
+    for seed in (1, 2):
+        cache.get_or_build("levenshtein", {"seed": seed}, lambda seed=seed: LevenshteinQuestion(seed=seed))
+    cache.get_or_build("levenshtein", {"seed": 1}, lambda: None)
+    cache.get_or_build("levenshtein", {"seed": 3}, lambda: LevenshteinQuestion(seed=3))
+
+    assert cache.get(cache.make_key("levenshtein", {"seed": 2})) is None
+    assert cache.get(cache.make_key("levenshtein", {"seed": 1})) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+
+def test_byte_limit_evicts_entries():
+    cache = QuestionInstanceCache(max_entries=100, max_bytes=1, ttl_seconds=60)
+
+    cache.get_or_build("levenshtein", {"seed": 1}, lambda: LevenshteinQuestion(seed=1))
+
+    assert cache.stats()["entries"] == 0
+
+
+def test_byte_limit_keeps_most_recent_entries():
+    size = _estimate_size(LevenshteinQuestion(seed=1))
+    cache = QuestionInstanceCache(max_entries=100, max_bytes=int(size * 2.5), ttl_seconds=60)
+    for seed in (1, 2, 3):
+        cache.get_or_build("levenshtein", {"seed": seed}, lambda seed=seed: LevenshteinQuestion(seed=seed))
+
+    stats = cache.stats()
+    assert stats["bytes"] <= cache.max_bytes
+    assert stats["evictions"] >= 1
+    assert cache.get(cache.make_key("levenshtein", {"seed": 3})) is not None
@@ -0,0 +1,113 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import asynccontextmanager
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app import main, question_execution, question_service
+from app.cost_policy import check_deadline
+from app.errors import DependencyUnavailableError
+from app.question_cache import QuestionInstanceCache
+from app.question_execution import QuestionExecutor
+from app.question_types import sql_query_helper
+from app.question_types.hungarian_method import HungarianMethodQuestion
+from app.question_types.levenshtein import LevenshteinQuestion
+from app.question_types.sql_query import SqlQueryQuestion
+
+
+@pytest.fixture(autouse=True)
+def fresh_instance_cache(monkeypatch):
+    monkeypatch.setattr(question_service, "question_instance_cache", QuestionInstanceCache())
+
+
+def _evaluate_request(query: str, body) -> Request:
+    async def receive():
+        return {"type": "http.request", "body": json.dumps(body).encode(), "more_body": False}
+
+    scope = {"type": "http", "method": "POST", "path": "/", "query_string": query.encode(), "headers": []}
+    return Request(scope, receive)
+
+
+def test_each_execution_mode_returns_the_same_layout(monkeypatch):
+    executor = QuestionExecutor(max_workers=1)
+    kwargs = {"seed": 5}
+    layouts = []
+    try:
+        for mode in question_execution.EXECUTION_MODES:
+            monkeypatch.setattr(question_execution, "execution_mode", lambda type_name, mode=mode: mode)
+            result = asyncio.run(executor.run("hungarian_method", HungarianMethodQuestion, kwargs, "generate"))
+            layouts.append(result["layout"])
+    finally:
+        executor.shutdown()
+
+    assert layouts[0] == layouts[1] == layouts[2]
+    assert executor.calls == {"inline": 1, "thread": 1, "process": 1}
+
+
+def test_slow_evaluation_answers_503_and_stops(monkeypatch):
+    stopped = []
+
+    def slow_answer_key(self):
+        try:
+            while True:
+                check_deadline()
+                time.sleep(0.01)
+        except Exception as e:
+            stopped.append(e)
+            raise
+
+    monkeypatch.setattr(LevenshteinQuestion, "_build_answer_key", slow_answer_key)
+    monkeypatch.setattr(question_execution, "deadline_seconds", lambda type_name: 0.1)
+    monkeypatch.setattr(main, "question_generators", {"levenshtein": {"class": LevenshteinQuestion}})
+
+    with pytest.raises(HTTPException) as raised:
+        asyncio.run(main.evaluate_question("levenshtein", _evaluate_request("seed=1", {}), None))
+
+    assert raised.value.status_code == 503
+    deadline = time.monotonic() + 2
+    while not stopped and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stopped
+
+
+def test_broken_worker_pool_is_replaced():
+    executor = QuestionExecutor(max_workers=1)
+    try:
+        executor._get_pool().submit(os._exit, 1)
+        with pytest.raises(DependencyUnavailableError):
+            asyncio.run(executor.run("hungarian_method", HungarianMethodQuestion, {"seed": 5}, "generate"))
+
+        result = asyncio.run(executor.run("hungarian_method", HungarianMethodQuestion, {"seed": 5}, "generate"))
+    finally:
+        executor.shutdown()
+
+    assert result["seed"] == 5
+    assert executor.stats()["process_pool_restarts"] == 1
+
+
+def test_sqlite_backend_does_not_reserve_the_mysql_pool(monkeypatch):
+    reservations = []
+
+    @asynccontextmanager
+    async def reserve():
+        reservations.append(1)
+        yield
+
+    monkeypatch.setattr(question_execution.sql_pool, "reserve", reserve)
+    executor = QuestionExecutor(max_workers=0)
+    kwargs = {"seed": 1, "difficulty": "easy"}
+    statement = "SELECT name FROM country WHERE code = 'D'"
+
+    monkeypatch.setattr(sql_query_helper, "SQL_BACKEND", "sqlite")
+    preview = asyncio.run(executor.run("sql_query", SqlQueryQuestion, kwargs, "preview", {"statement": statement}))
+
+    assert preview["rows"] == [["Germany"]]
+    assert reservations == []
+
+    monkeypatch.setattr(sql_query_helper, "SQL_BACKEND", "mysql")
+    assert executor._uses_sql_pool("sql_query", "preview")
+    assert not executor._uses_sql_pool("sql_query", "generate")
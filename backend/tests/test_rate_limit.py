@@ -0,0 +1,63 @@
+from collections import Counter
+
+from app.rate_limit import LocalRateLimiter
+
+
+class FakeCounterStore:
+    def __init__(self):
+        self.totals = Counter()
+        self.calls = 0
+
+    def __call__(self, counts):
+        self.calls += 1
+        self.totals.update(counts)
+        return {key: self.totals[key] for key in counts}
+
+
+def test_bucket_allows_burst_then_limits():
+    limiter = LocalRateLimiter(FakeCounterStore(), limit=3, burst=1.0)
+
+    assert [limiter.hit("alice") for _ in range(3)] == [None, None, None]
+    retry_after = limiter.hit("alice")
+
+    assert retry_after is not None and retry_after >= 1
+    assert limiter.hit("bob") is None
+
+
+def test_flush_batches_counts_and_applies_global_totals():
+    store = FakeCounterStore()
+    worker_a = LocalRateLimiter(store, limit=4)
+    worker_b = LocalRateLimiter(store, limit=4)
+
+    for _ in range(3):
+        assert worker_a.hit("alice") is None
+        assert worker_b.hit("alice") is None
+    worker_a.flush()
+    worker_b.flush()
+
+    assert store.calls == 2
+    assert sum(store.totals.values()) == 6
+    assert worker_b.hit("alice") is not None
+
+
+def test_failed_flush_keeps_pending_counts():
+    store = FakeCounterStore()
+    limiter = LocalRateLimiter(store, limit=10)
+    limiter.hit("alice")
+
+    limiter.counter_store = lambda counts: (_ for _ in ()).throw(RuntimeError("mongo down"))
+    limiter.flush()
+    limiter.counter_store = store
+    limiter.flush()
+
+    assert sum(store.totals.values()) == 1
+
+
+def test_hits_never_wait_for_the_counter_store():
+    store = FakeCounterStore()
+    limiter = LocalRateLimiter(store, limit=100)
+
+    for _ in range(50):
+        limiter.hit("alice")
+
+    assert store.calls == 0 and limiter.stats()["pending_counts"] == 1
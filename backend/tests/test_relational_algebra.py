@@ -0,0 +1,213 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.question_types import relational_algebra_helper as helper
+from app.question_types.relational_algebra import EXERCISES
+from app.question_types.relational_algebra_helper import compile_predicate, execute_plan, join, selection
+from app.question_types.relational_algebra_optimizer import optimize
+from app.question_types.relational_algebra_plan import (
+    Difference,
+    Filter,
+    Join,
+    Product,
+    Projection,
+    Prune,
+    Relation,
+    RenameRelation,
+    Restore,
+    parse_plan,
+    plan_tree,
+)
+from app.question_types.schema_registry import schema_registry
+
+
+def _cross_join(df1, df2, predicate):
+    return selection(df1.merge(df2, how="cross"), predicate)
+
+
+@pytest.fixture
+def relations():
+    rng = np.random.default_rng(7)
+    r = pd.DataFrame(
+        {
+            "R.a": rng.integers(0, 5, 40),
+            "R.b": rng.choice(["x", "y", None], 40),
+            "R.c": np.where(rng.random(40) < 0.2, np.nan, rng.integers(0, 3, 40)),
+        },
+        index=rng.permutation(40) + 100,
+    )
+    s = pd.DataFrame(
+        {
+            "S.a": rng.integers(0, 5, 30),
+            "S.b": rng.choice(["x", "y", None], 30),
+            "S.c": np.where(rng.random(30) < 0.2, np.nan, rng.integers(0, 3, 30)),
+        }
+    )
+    return r, s
+
+
+@pytest.mark.parametrize(
+    "predicate",
+    [
+        "R.a = S.a",
+        "S.a = R.a",
+        "(R.a = S.a) AND (R.b = S.b)",
+        "(R.c = S.c) AND (R.a != S.a)",
+        "(R.a = S.a) AND (S.c > 1)",
+        "R.a < S.a",
+        "(R.a = S.a) OR (R.b = S.b)",
+    ],
+)
+def test_join_matches_cross_product_and_filter(relations, predicate):
+    r, s = relations
+
+    result = join(r, s, predicate)
+
+    pd.testing.assert_frame_equal(result, _cross_join(r, s, predicate))
+
+
+def test_hash_join_skips_the_cross_product(relations, monkeypatch):
+    r, s = relations
+    monkeypatch.setattr(helper, "RELALG_MAX_CROSS_PRODUCT_ROWS", 10)
+
+    assert len(join(r, s, "R.a = S.a")) > 0
+    with pytest.raises(ValueError, match="cross product"):
+        join(r, s, "R.a < S.a")
+
+
+def test_mismatched_key_types_fall_back_to_cross_product():
+    r = pd.DataFrame({"R.a": ["1", "2"]})
+    s = pd.DataFrame({"S.a": [1, 2]})
+
+    assert join(r, s, "R.a = S.a").empty
+
+
+def test_parse_plan_binds_prefix_operators_and_chains_joins_left_to_right():
+    plan = parse_plan(
+        r"\projection{R.a}(R)\join{R.a=S.a}(S)\diff{}(\_rename{T}(S))",
+        ["R", "S"],
+    )
+
+    assert plan == Difference(
+        Join(Projection(Relation("R"), ("R.a",)), Relation("S"), "R.a=S.a"),
+        RenameRelation(Relation("S"), "T"),
+    )
+    assert plan_tree(plan)["children"][0]["name"] == "join (R.a=S.a)"
+
+
+@pytest.mark.parametrize(
+    "statement, message",
+    [
+        ("Foo", 'Die Relation "Foo" existiert nicht.'),
+        (r"\selection{R.a=1}(R", "Klammern nach \\\\selection"),
+        (r"R\join{R.a=S.a}S", "Ungültiger Ausdruck"),
+        (r"\_rename{a,b,c}(R)", "RENAME-Operator"),
+        ("(" * 100 + "R" + ")" * 100, "zu komplex"),
+    ],
+)
+def test_parse_plan_rejects_invalid_statements(statement, message):
+    with pytest.raises(ValueError, match=message):
+        parse_plan(statement, ["R", "S"])
+
+
+def test_optimizer_pushes_selections_and_prunes_join_inputs(relations):
+    r, s = relations
+    dfs = {"R": r, "S": s}
+    plan = parse_plan(r"\projection{R.b}(\selection{(R.c=1)AND(S.b='x')}(R\join{R.a=S.a}(S)))", dfs)
+
+    optimized = optimize(plan, dfs)
+
+    assert optimized == Projection(
+        Product(
+            Prune(Filter(Relation("R"), ("df['R.c'] == 1",)), ("R.a", "R.b")),
+            Prune(Filter(Relation("S"), ("df['S.b'] == 'x'",)), ("S.a",)),
+            ("df['R.a'] == df['S.a']",),
+        ),
+        ("R.b",),
+    )
+    pd.testing.assert_frame_equal(
+        execute_plan(optimized, dfs).reset_index(drop=True), execute_plan(plan, dfs).reset_index(drop=True)
+    )
+
+
+def test_reordered_joins_keep_columns_and_row_order(relations):
+    r, s = relations
+    t = pd.DataFrame({"T.a": [3, 1, 3, 4], "T.d": ["p", "q", "r", "s"]})
+    dfs = {"R": r, "S": s, "T": t}
+    plan = parse_plan(r"R\join{R.a=S.a}(S)\join{(S.a=T.a)AND(R.c<=T.a)}(T)", dfs)
+
+    optimized = optimize(plan, dfs)
+
+    assert isinstance(optimized, Restore)
+    pd.testing.assert_frame_equal(
+        execute_plan(optimized, dfs).reset_index(drop=True), execute_plan(plan, dfs).reset_index(drop=True)
+    )
+
+
+def test_joins_without_hash_keys_are_not_reordered(relations):
+    r, s = relations
+    t = pd.DataFrame({"T.a": [3.0, 1.0, 3.0, 4.0]})
+    dfs = {"R": r, "S": s, "T": t}
+    plan = parse_plan(r"R\join{R.a=S.a}(S)\join{S.a=T.a}(T)", dfs)
+
+    optimized = optimize(plan, dfs)
+
+    assert not isinstance(optimized, Restore)
+    assert optimized.left.left == Relation("R") and optimized.right == Relation("T")
+    pd.testing.assert_frame_equal(
+        execute_plan(optimized, dfs).reset_index(drop=True), execute_plan(plan, dfs).reset_index(drop=True)
+    )
+
+
+def test_operator_errors_of_the_optimized_plan_are_not_retried(relations, monkeypatch):
+    r, s = relations
+    calls = []
+    original = helper._join
+
+    def counting_join(*args):
+        calls.append(args)
+        return original(*args)
+
+    monkeypatch.setattr(helper, "RELALG_MAX_CROSS_PRODUCT_ROWS", 10)
+    monkeypatch.setattr(helper, "_join", counting_join)
+
+    with pytest.raises(ValueError, match="cross product"):
+        helper.execute_relational_algebra({"R": r, "S": s}, r"R\join{R.a<S.a}(S)")
+
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize("exercise", EXERCISES, ids=[e["name"] for e in EXERCISES])
+def test_optimized_plans_agree_with_the_plans_as_written(exercise):
+    dfs = dict(schema_registry.get(exercise["schema"]).relations)
+    plan = parse_plan(helper.normalize(exercise["answer"]), dfs.keys())
+
+    optimized = execute_plan(optimize(plan, dfs), dfs)
+    written = execute_plan(plan, dfs)
+
+    pd.testing.assert_frame_equal(optimized.reset_index(drop=True), written.reset_index(drop=True))
+
+
+def test_optimizer_keeps_plans_it_cannot_type():
+    dfs = {"R": pd.DataFrame({"R.a": [1], "R.b": ["x"]})}
+
+    for statement in (r"\selection{R.b<1}(R)", r"R\join{R.a=R.a}(R)", r"\selection{1=1}(R)"):
+        plan = parse_plan(statement, dfs)
+        assert optimize(plan, dfs) is plan
+
+
+def test_compiled_predicates_are_cached_per_column_tuple(relations):
+    r, _ = relations
+    columns = tuple(r.columns)
+
+    compiled = compile_predicate("(R.a>1)AND(R.b='x')", columns)
+    hits = compile_predicate.cache_info().hits
+    filtered = selection(r, "(R.a>1)AND(R.b='x')")
+
+    assert compile_predicate.cache_info().hits == hits + 1
+    assert compiled.text == "(df['R.a']>1)&(df['R.b']=='x')"
+    pd.testing.assert_frame_equal(filtered, r[compiled.mask(r)])
+    assert compile_predicate("R.a>1", ("R.a",)) is not compile_predicate("R.a>1", ("R.a", "R.b"))
+    with pytest.raises(ValueError, match="Ungültiges Selektionsprädikat"):
+        compile_predicate("R.a>", columns)
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from app.question_types import relational_algebra_helper as helper
+from app.question_types.relational_algebra_helper import execute_relational_algebra
+from app.question_types.relational_algebra_memo import PlanMemo
+from app.question_types.relational_algebra_plan import Relation, RenameRelation, Selection, parse_plan, plan_digests
+
+DFS = {
+    "R": pd.DataFrame({"R.a": [1, 2, 3], "R.b": ["x", "y", "z"]}),
+    "S": pd.DataFrame({"S.a": [1, 1, 3], "S.c": [10, 20, 30]}),
+}
+
+
+def test_digests_cover_operator_arguments_and_schema():
+    plan = parse_plan(r"\selection{S.c>10}(R\join{R.a=S.a}(S))", DFS)
+    edited = parse_plan(r"\selection{S.c>20}(R\join{R.a=S.a}(S))", DFS)
+
+    digests, edited_digests = plan_digests(plan, "uni"), plan_digests(edited, "uni")
+
+    assert digests[id(plan.child)] == edited_digests[id(edited.child)]
+    assert digests[id(plan)] != edited_digests[id(edited)]
+    assert digests[id(plan)] != plan_digests(plan, "other")[id(plan)]
+    # Equal tuples of different operators must not collide.
+    assert plan_digests(Selection(Relation("R"), "N"), "uni") != plan_digests(RenameRelation(Relation("R"), "N"), "uni")
+
+
+def test_previewed_subtrees_are_reused_across_edits(monkeypatch):
+    memo = PlanMemo(max_bytes=1024 * 1024)
+    monkeypatch.setattr(helper, "relalg_memo", memo)
+    joined, _ = execute_relational_algebra(DFS, r"R\join{R.a = S.a}(S)", "uni")
+    calls = []
+    monkeypatch.setattr(helper, "_join", lambda *args: calls.append(args))
+
+    first, _ = execute_relational_algebra(DFS, r"\projection{R.b}(\selection{S.c>10}(R\join{R.a=S.a}(S)))", "uni")
+    second, tree = execute_relational_algebra(DFS, r"\projection{R.b}(\selection{S.c>20}(R\join{R.a=S.a}(S)))", "uni")
+
+    assert len(joined) == 3 and calls == []
+    assert first["R.b"].tolist() == ["x", "z"] and second["R.b"].tolist() == ["z"]
+    assert tree["children"][0]["children"][0]["name"] == "join (R.a=S.a)"
+    again, _ = execute_relational_algebra(DFS, r"\projection{R.b}(\selection{S.c>20}(R\join{R.a=S.a}(S)))", "uni")
+    assert again is second
+
+
+def test_results_over_the_row_limit_are_not_memoized(monkeypatch):
+    memo = PlanMemo(max_bytes=1024 * 1024)
+    monkeypatch.setattr(helper, "relalg_memo", memo)
+    monkeypatch.setattr(helper, "RELALG_MAX_RESULT_ROWS", 2)
+
+    with pytest.raises(ValueError, match=helper.TOO_MANY_ROWS_MESSAGE):
+        execute_relational_algebra(DFS, r"R\join{R.a = S.a}(S)", "uni")
+
+    assert memo.stats()["entries"] == 0
+
+
+def test_memo_is_bounded_by_result_bytes():
+    frame = pd.DataFrame({"a": range(10)})
+    size = int(frame.memory_usage(deep=True).sum())
+    memo = PlanMemo(max_bytes=2 * size)
+
+    memo.put(b"too big", pd.DataFrame({"a": range(1000)}))
+    for key in (b"1", b"2", b"3"):
+        memo.put(key, frame)
+
+    assert memo.get(b"too big") is None and memo.get(b"1") is None
+    assert memo.get(b"3") is frame
+    assert memo.stats()["bytes"] == 2 * size and memo.stats()["evictions"] == 1
@@ -0,0 +1,21 @@
+import pickle
+
+from app.question_types.relational_algebra import RelationalAlgebra
+from app.question_types.schema_registry import schema_registry
+
+
+def test_questions_share_the_registry_frames():
+    first = RelationalAlgebra(seed=1)
+    second = RelationalAlgebra(seed=2)
+
+    assert first.dfs["Studierende"] is second.dfs["Studierende"]
+    assert "dfs" not in pickle.loads(pickle.dumps(first)).__dict__
+
+
+def test_schema_grid_is_precomputed_and_copied():
+    schema = schema_registry.get("university")
+    tables = schema.preview()
+    tables[0]["rows"].clear()
+
+    assert all(len(table["rows"]) == 2 for table in schema.preview())
+    assert [table["title"] for table in tables] == list(schema.relations)
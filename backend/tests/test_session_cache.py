@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from app.session_cache import SessionCache
+
+
+def _user(user_id, version=0):
+    return SimpleNamespace(id=user_id, session_version=version)
+
+
+def _expires(hours=1):
+    return datetime.now(timezone.utc) + timedelta(hours=hours)
+
+
+def test_cached_session_is_served_until_invalidated():
+    cache = SessionCache(lambda ids: {}, ttl_seconds=60, poll_seconds=3600)
+    user = _user(1)
+    cache.put("token", user, _expires())
+
+    assert cache.get("token") is user
+
+    cache.invalidate(user_id=1)
+    assert cache.get("token") is None
+
+
+def test_expired_session_is_not_served():
+    cache = SessionCache(lambda ids: {}, ttl_seconds=60, poll_seconds=3600)
+    cache.put("token", _user(1), _expires(hours=-1))
+
+    assert cache.get("token") is None
+
+
+def test_version_poll_drops_sessions_changed_elsewhere():
+    versions = {1: 0, 2: 0}
+    polls = []
+
+    def load_versions(ids):
+        polls.append(sorted(ids))
+        return {user_id: versions[user_id] for user_id in ids}
+
+    cache = SessionCache(load_versions, ttl_seconds=60, poll_seconds=1)
+    cache.put("a", _user(1), _expires())
+    cache.put("b", _user(2), _expires())
+
+    versions[1] = 1
+    cache.poll_versions()
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+    assert polls == [[1, 2]]
+
+
+def test_failed_version_poll_keeps_sessions():
+    def load_versions(ids):
+        raise ConnectionError("mongo down")
+
+    cache = SessionCache(load_versions, ttl_seconds=60, poll_seconds=1)
+    user = _user(1)
+    cache.put("a", user, _expires())
+
+    cache.poll_versions()
+
+    assert cache.get("a") is user
@@ -0,0 +1,67 @@
+import pytest
+
+from app.question_types import sql_query_helper
+from app.question_types.sql_admission import (
+    AdmissionController,
+    PlanEstimate,
+    mysql_plan_estimate,
+)
+from app.question_types.sql_lexer import normalize_statement
+from app.question_types.sql_result_cache import SqlResultCache
+
+
+@pytest.fixture
+def admission(monkeypatch):
+    controller = AdmissionController(enabled=True, max_rows=1_000_000, max_cost=1_000_000)
+    monkeypatch.setattr(sql_query_helper, "SQL_BACKEND", "sqlite")
+    monkeypatch.setattr(sql_query_helper, "sql_admission", controller)
+    monkeypatch.setattr(sql_query_helper, "sql_result_cache", SqlResultCache(enabled=False))
+    return controller
+
+
+def _run(statement):
+    with sql_query_helper.stream_for_compare(statement) as (columns, rows):
+        return columns, list(rows)
+
+
+def test_mysql_plan_estimate_multiplies_nested_loops():
+    plan = {
+        "query_block": {
+            "cost_info": {"query_cost": "4521.10"},
+            "nested_loop": [
+                {"table": {"table_name": "c", "rows_examined_per_scan": 195, "rows_produced_per_join": 195}},
+                {"table": {"table_name": "s", "rows_examined_per_scan": 3051, "rows_produced_per_join": 594945}},
+            ],
+        }
+    }
+
+    assert mysql_plan_estimate(plan) == PlanEstimate(rows=195 + 195 * 3051, cost=4521.10)
+
+
+def test_normalize_statement_keeps_literals():
+    assert normalize_statement("SELECT  Name\n FROM city -- note\n WHERE name = 'Berlin';") == (
+        "select name from city where name = 'Berlin'"
+    )
+
+
+def test_comma_join_is_admitted_by_cost(admission):
+    _, rows = _run("SELECT c.name, k.name FROM city c, country k WHERE c.country = k.code AND k.code = 'D'")
+    assert len(rows) > 0
+
+    with pytest.raises(ValueError, match="too expensive"):
+        _run("SELECT COUNT(*) FROM city a, city b, country k")
+    assert admission.stats()["rejected"] == 1
+
+
+def test_plans_are_cached_by_normalized_statement(admission):
+    _run("SELECT name FROM country WHERE code = 'D'")
+    _run("select name\n  from country where code = 'D';")
+
+    stats = admission.stats()
+    assert (stats["misses"], stats["hits"]) == (1, 1)
+
+
+def test_comma_join_rejected_without_admission(admission):
+    admission.enabled = False
+    with pytest.raises(ValueError, match="comma-separated"):
+        _run("SELECT * FROM city, country")
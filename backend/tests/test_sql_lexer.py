@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from app.question_types import sql_query_helper
+from app.question_types.sql_lexer import normalize_statement, significant, tokenize
+
+
+@pytest.fixture
+def strict_sql_limits(monkeypatch):
+    monkeypatch.setattr(sql_query_helper.sql_admission, "enabled", False)
+
+
+def test_tokens_round_trip_and_hide_keywords_in_literals():
+    sql = "SELECT 'from a, b' AS x, `join` -- join\nFROM t /* , join */ WHERE y = \"a,b\""
+
+    tokens = tokenize(sql)
+
+    assert "".join(token.text for token in tokens) == sql
+    assert [token.keyword for token in significant(tokens) if token.keyword] == ["select", "as", "x", "from", "t", "where", "y"]
+
+
+@pytest.mark.parametrize(
+    "sql, expected",
+    [
+        ("SELECT a, b FROM t WHERE x IN (1, 2)", False),
+        ("SELECT a FROM t JOIN u USING (k1, k2) ORDER BY a, b", False),
+        ("SELECT EXTRACT(YEAR FROM d), b FROM t", False),
+        ("SELECT (SELECT MAX(x) FROM u), b FROM t", False),
+        ("SELECT a FROM t, u", True),
+        ("SELECT a FROM (SELECT 1 AS a) s, u", True),
+        ("SELECT a FROM t WHERE a IN (SELECT b FROM u, v)", True),
+    ],
+)
+def test_comma_join_detection(sql, expected):
+    assert sql_query_helper._has_comma_separated_from_relations(significant(tokenize(sql))) is expected
+
+
+def test_validation_is_linear_in_statement_length(strict_sql_limits):
+    sql = "SELECT a FROM t WHERE " + " OR ".join(f"(a = {i} AND b IN ({i}, {i + 1}))" for i in range(20000))
+
+    started = time.perf_counter()
+    sql_query_helper._validate_sql_limits(sql)
+
+    assert time.perf_counter() - started < 2
+    with pytest.raises(ValueError, match="joins"):
+        sql_query_helper._validate_sql_limits("SELECT 1 FROM t" + " JOIN t USING (a)" * 6)
+
+
+def test_normalization_keeps_spaces_in_literals_and_identifiers():
+    spaced = "SELECT  `first  name`\nFROM City -- note\nWHERE name = 'New  York' ;"
+
+    assert normalize_statement(spaced) == "select `first  name` from city where name = 'New  York'"
+    assert normalize_statement(spaced) != normalize_statement(spaced.replace("'New  York'", "'New York'"))
+
+
+def test_double_minus_is_only_a_comment_before_whitespace():
+    assert [token.kind for token in tokenize("1--1")] == ["number", "symbol", "symbol", "number"]
+    assert normalize_statement("SELECT 1--1") == "select 1--1"
+    assert normalize_statement("SELECT 1-- 1") == normalize_statement("SELECT 1--") == "select 1"
+    assert sql_query_helper._cache_key("SELECT 1--1") != sql_query_helper._cache_key("SELECT 1")
+
+
+def test_sqlite_backend_evaluates_double_minus_like_mysql(monkeypatch):
+    monkeypatch.setattr(sql_query_helper, "SQL_BACKEND", "sqlite")
+
+    with sql_query_helper.stream_for_compare("SELECT 1--1 -- comment") as (columns, rows):
+        assert (columns, list(rows)) == (["1--1"], [(2,)])
+
+
+def test_result_cache_key_is_the_statement_as_typed():
+    assert sql_query_helper._cache_key("SELECT a+1 FROM t") != sql_query_helper._cache_key("SELECT a + 1 FROM t")
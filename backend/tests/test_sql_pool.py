@@ -0,0 +1,91 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.question_types.sql_pool import SqlPool, SqlPoolExhaustedError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def test_reservations_queue_in_arrival_order():
+    pool = SqlPool(size=1, max_waiters=4, acquire_timeout=1)
+    order = []
+
+    async def action(name, hold):
+        async with pool.reserve():
+            order.append(name)
+            await asyncio.sleep(hold)
+
+    async def main():
+        first = asyncio.create_task(action("first", 0.05))
+        await asyncio.sleep(0)
+        others = [asyncio.create_task(action(name, 0)) for name in ("second", "third")]
+        await asyncio.sleep(0)
+        assert pool.stats()["queued"] == 2
+        await asyncio.gather(first, *others)
+
+    asyncio.run(main())
+
+    assert order == ["first", "second", "third"]
+    assert pool.stats()["reserved"] == 0 and pool.stats()["acquired"] == 3
+
+
+def test_full_queue_rejects_and_slow_slot_times_out():
+    pool = SqlPool(size=1, max_waiters=1, acquire_timeout=0.05)
+
+    async def queued():
+        async with pool.reserve():
+            pass
+
+    async def main():
+        async with pool.reserve():
+            waiter = asyncio.create_task(queued())
+            await asyncio.sleep(0)
+            with pytest.raises(SqlPoolExhaustedError):
+                async with pool.reserve():
+                    pass
+            with pytest.raises(SqlPoolExhaustedError):
+                await waiter
+
+    asyncio.run(main())
+
+    stats = pool.stats()
+    assert (stats["rejected"], stats["timeouts"], stats["reserved"], stats["queued"]) == (1, 1, 0, 0)
+
+
+def test_threads_wait_for_a_returned_connection():
+    pool = SqlPool(size=1, max_waiters=2, acquire_timeout=2)
+    borrowed = []
+
+    def borrow():
+        with pool.connection(FakeConnection) as conn:
+            borrowed.append(conn)
+
+    with pool.connection(FakeConnection) as first:
+        waiter = threading.Thread(target=borrow)
+        waiter.start()
+        while pool.stats()["waiting"] == 0:
+            time.sleep(0.001)
+    waiter.join()
+
+    assert first.closed and borrowed[0].closed
+    assert pool.stats()["in_use"] == 0 and pool.stats()["acquired"] == 2
+
+
+def test_connection_wait_times_out():
+    pool = SqlPool(size=1, max_waiters=2, acquire_timeout=0.01)
+
+    with pool.connection(FakeConnection):
+        with pytest.raises(SqlPoolExhaustedError):
+            with pool.connection(FakeConnection):
+                pass
+
+    assert pool.stats()["timeouts"] == 1 and pool.stats()["in_use"] == 0
@@ -0,0 +1,36 @@
+import itertools
+
+from app.question_types.sql_query import ExpectedResult, _fingerprint, matches_expected
+
+
+def _expected(rows, ordered, column_count=2):
+    row_count, fingerprint = _fingerprint(rows, ordered)
+    return ExpectedResult(column_count, row_count, ordered, fingerprint)
+
+
+def test_unordered_fingerprint_ignores_row_order_but_not_multiplicity():
+    expected = _expected([("a", "1"), ("b", "2"), ("b", "2")], ordered=False)
+
+    assert matches_expected(["x", "y"], [("b", 2), ("a", 1), ("b", 2)], expected)
+    assert not matches_expected(["x", "y"], [("a", 1), ("a", 1), ("b", 2)], expected)
+    assert not matches_expected(["x"], [("a", 1), ("b", 2), ("b", 2)], expected)
+
+
+def test_ordered_fingerprint_rejects_swapped_rows_and_nulls_match_empty_strings():
+    expected = _expected([("a", ""), ("b", "2")], ordered=True)
+
+    assert matches_expected(["x", "y"], [("a", None), ("b", 2)], expected)
+    assert not matches_expected(["x", "y"], [("b", 2), ("a", None)], expected)
+
+
+def test_comparison_stops_reading_after_mismatch():
+    expected = _expected([("a", "1"), ("b", "2")], ordered=False)
+    consumed = []
+
+    def endless_rows():
+        for i in itertools.count():
+            consumed.append(i)
+            yield ("a", i)
+
+    assert not matches_expected(["x", "y"], endless_rows(), expected)
+    assert len(consumed) == 3
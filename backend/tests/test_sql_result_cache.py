@@ -0,0 +1,82 @@
+import threading
+import time
+
+import pytest
+
+from app.cancellation import CancelToken, cancellation_scope
+from app.errors import QuestionCancelledError
+from app.question_types import sql_query_helper
+from app.question_types.sql_result_cache import SqlResultCache
+
+
+def test_graded_statement_reuses_the_previewed_result(monkeypatch):
+    cache = SqlResultCache(max_bytes=1024 * 1024)
+    monkeypatch.setattr(sql_query_helper, "SQL_BACKEND", "sqlite")
+    monkeypatch.setattr(sql_query_helper, "sql_result_cache", cache)
+
+    first = sql_query_helper.execute_preview_page("SELECT name FROM country WHERE code = 'D' LIMIT 5")
+    first["rows"].append(["mutated"])
+    graded = "\n  SELECT name FROM country WHERE code = 'D' LIMIT 5 "
+    with sql_query_helper.stream_for_compare(graded) as (columns, rows):
+        rows = list(rows)
+
+    assert (columns, rows) == (["Name"], [("Germany",)])
+    assert (cache.stats()["entries"], cache.stats()["hits"]) == (1, 1)
+
+
+def test_concurrent_identical_statements_execute_once():
+    cache = SqlResultCache(max_bytes=1024 * 1024)
+    calls = []
+
+    def execute():
+        calls.append(1)
+        time.sleep(0.2)
+        return ["a"], [(1,)]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_execute("k", execute))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [(["a"], [(1,)])] * 5
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_errors_are_not_cached_and_bytes_are_bounded():
+    cache = SqlResultCache(max_bytes=600)
+
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        cache.get_or_execute("bad", failing)
+    assert cache.get_or_execute("bad", lambda: (["a"], [(1,)])) == (["a"], [(1,)])
+
+    for key in range(5):
+        cache.get_or_execute(key, lambda: (["a"], [("x" * 100,)]))
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 600
+    assert stats["evictions"] > 0
+
+
+def test_waiting_callers_stop_on_cancellation_and_after_the_wait_bound():
+    cache = SqlResultCache(max_bytes=1024 * 1024, wait_seconds=0.2)
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: cache.get_or_execute("k", lambda: (release.wait(5), (["a"], [(1,)]))[1]))
+    leader.start()
+    time.sleep(0.05)
+
+    token = CancelToken()
+    token.cancel()
+    with cancellation_scope(token), pytest.raises(QuestionCancelledError):
+        cache.get_or_execute("k", lambda: (["b"], [(2,)]))
+
+    assert cache.get_or_execute("k", lambda: (["b"], [(2,)])) == (["b"], [(2,)])
+    assert cache.stats()["wait_timeouts"] == 1
+
+    release.set()
+    leader.join()
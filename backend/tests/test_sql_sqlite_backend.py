@@ -0,0 +1,65 @@
+import json
+
+import pytest
+
+from app.question_types import sql_query_helper
+from app.question_types.sql_query import EXERCISES_PATH, SqlQueryQuestion
+
+with open(EXERCISES_PATH, "r", encoding="utf-8") as f:
+    EXERCISES = json.load(f)["exercises"]
+
+
+@pytest.fixture(autouse=True)
+def sqlite_backend(monkeypatch):
+    monkeypatch.setattr(sql_query_helper, "SQL_BACKEND", "sqlite")
+
+
+def _run(statement):
+    with sql_query_helper.stream_for_compare(statement) as (columns, rows):
+        return columns, list(rows)
+
+
+@pytest.mark.parametrize("exercise", EXERCISES, ids=[e["name"] for e in EXERCISES])
+def test_reference_answers_match_expected_results(exercise):
+    question = SqlQueryQuestion(difficulty=exercise["difficulty"], exercise_name=exercise["name"])
+
+    result = question.evaluate({"0": exercise["answer"]})
+
+    assert result["0"]["correct"] is True
+
+
+def test_mysql_division_and_functions():
+    columns, rows = _run("SELECT 7 DIV 2, 7 / 2, CONCAT('a', 1), IF(1 > 0, 'y', 'n')")
+
+    assert columns == ["7 DIV 2", "7 / 2", "CONCAT('a', 1)", "IF(1 > 0, 'y', 'n')"]
+    assert [str(value) for value in rows[0]] == ["3", "3.5000", "a1", "y"]
+
+
+@pytest.mark.parametrize("statement", ["DELETE FROM country", "CREATE TABLE t (a INT)", "PRAGMA table_info(country)"])
+def test_writes_are_rejected(statement):
+    with pytest.raises(ValueError):
+        _run(statement)
+
+
+def test_preview_pages_push_limit_into_statement():
+    question = SqlQueryQuestion(difficulty=EXERCISES[0]["difficulty"], exercise_name=EXERCISES[0]["name"])
+
+    first = question.preview("SELECT name FROM city ORDER BY name", limit=2)
+    last = question.preview("SELECT name FROM city ORDER BY name", offset=3050, limit=2)
+
+    assert first["rows"] == [["Aachen"], ["Aalborg"]]
+    assert (first["total_rows"], first["total_rows_exact"], first["next_offset"]) == (3051, True, 2)
+    assert last["rows"] == [["Zwolle"]] and last["next_offset"] is None
+
+
+@pytest.mark.parametrize(
+    "statement, body",
+    [
+        ("SELECT name FROM city; -- done", "SELECT name FROM city"),
+        ("SELECT name FROM city LIMIT 5", None),
+        ("SELECT a FROM t WHERE b IN (SELECT b FROM u LIMIT 3)", "SELECT a FROM t WHERE b IN (SELECT b FROM u LIMIT 3)"),
+        ("SHOW TABLES", None),
+    ],
+)
+def test_statement_body_for_limit_pushdown(statement, body):
+    assert sql_query_helper._statement_body(statement) == body
@@ -1881,6 +1881,7 @@ export default function LayoutRenderer({
   userInput = {},
   showExpected = false,
   reactiveTables = {},
+  onLoadMoreRows,
   registerFieldId = null,
   openLinksInNewTab = false,
 }) {
@@ -2327,7 +2328,15 @@ export default function LayoutRenderer({
       case "reactive_table": {
         const listenId = el.listenTo; // e.g. "0"
         const data = reactiveTables?.[listenId] || {};
-        const { columns = [], rows = [], total_rows = rows.length, error, status } = data;
+        const {
+          columns = [],
+          rows = [],
+          total_rows = rows.length,
+          total_rows_exact = true,
+          next_offset = null,
+          error,
+          status,
+        } = data;
 
         return (
           <div key={idx} className="card mb-4 shadow-sm">
@@ -2336,8 +2345,11 @@ export default function LayoutRenderer({
                 {el.label || el.title || "Result"}
               </h5>
 
-              {!error && status === "ready" && el.id === "sql_preview" && (
-                <p className="text-muted small mb-2">Anzahl Zeilen: {total_rows}</p>
+              {!error && (status === "ready" || status === "loadingMore") && el.id === "sql_preview" && (
+                <p className="text-muted small mb-2">
+                  Anzahl Zeilen: {total_rows_exact ? total_rows : `mindestens ${total_rows}`}
+                  {rows.length < total_rows && ` (${rows.length} angezeigt)`}
+                </p>
               )}
 
               {status === "loading" && (
@@ -2378,6 +2390,17 @@ export default function LayoutRenderer({
                   </table>
                 </div>
               )}
+
+              {!error && next_offset != null && onLoadMoreRows && (
+                <button
+                  type="button"
+                  className="btn btn-outline-secondary btn-sm mt-2"
+                  disabled={status === "loadingMore"}
+                  onClick={() => onLoadMoreRows(listenId)}
+                >
+                  {status === "loadingMore" ? "Lade..." : "Weitere Zeilen laden"}
+                </button>
+              )}
             </div>
           </div>
         );
@@ -22,6 +22,9 @@ export default function QuestionPage({ onSessionExpired }) {
   const [requestError, setRequestError] = useState("");
 
   const viewFieldIdsRef = useRef({}); // { [viewName]: Set<string> }
+  // Lets the backend cancel a preview that a newer keystroke has superseded.
+  const previewEditorIdRef = useRef(Math.random().toString(36).slice(2));
+  const previewSequenceRef = useRef(0);
 
   const registerFieldIdForView = (viewName, fieldId) => {
     const v = String(viewName);
@@ -125,8 +128,10 @@ export default function QuestionPage({ onSessionExpired }) {
     }
 
     let cancelled = false;
+    const controller = new AbortController();
 
     const timeoutId = setTimeout(() => {
+      previewSequenceRef.current += 1;
       setRequestError("");
       setReactiveTables((prev) => ({
         ...prev,
@@ -137,7 +142,12 @@ export default function QuestionPage({ onSessionExpired }) {
         method: "POST",
         credentials: "include",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ statement: stmt }),
+        body: JSON.stringify({
+          statement: stmt,
+          editor: `${previewEditorIdRef.current}:0`,
+          sequence: previewSequenceRef.current,
+        }),
+        signal: controller.signal,
       })
         .then(async (res) => {
           if (!res.ok) {
@@ -163,6 +173,9 @@ export default function QuestionPage({ onSessionExpired }) {
               columns: data.columns || [],
               rows: data.rows || [],
               total_rows: Number.isFinite(data.total_rows) ? data.total_rows : (data.rows || []).length,
+              total_rows_exact: data.total_rows_exact !== false,
+              next_offset: Number.isFinite(data.next_offset) ? data.next_offset : null,
+              statement: stmt,
               tree: data.tree || null,
               error: data.error || null,
               status: "ready",
@@ -170,7 +183,7 @@ export default function QuestionPage({ onSessionExpired }) {
           }));
         })
         .catch((err) => {
-          if (cancelled) return;
+          if (cancelled || err?.name === "AbortError") return;
           console.error("Preview error:", err);
           setRequestError(err?.message || "Vorschau fehlgeschlagen.");
           setReactiveTables((prev) => ({
@@ -190,9 +203,69 @@ export default function QuestionPage({ onSessionExpired }) {
     return () => {
       cancelled = true;
       clearTimeout(timeoutId);
+      controller.abort();
     };
   }, [formData["0"], question, type, requestQueryString]);
 
+  const loadMoreRows = (listenId) => {
+    const current = reactiveTables[listenId];
+    if (!current || current.status !== "ready" || current.next_offset == null) return;
+
+    const { statement, next_offset: offset } = current;
+    setReactiveTables((prev) => ({
+      ...prev,
+      [listenId]: { ...prev[listenId], status: "loadingMore" },
+    }));
+
+    fetch(`${API_URL}/question/${type}/preview${requestQueryString}`, {
+      method: "POST",
+      credentials: "include",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ statement, offset }),
+    })
+      .then(async (res) => {
+        if (!res.ok) {
+          if (res.status === 401) {
+            onSessionExpired?.();
+            throw new Error("Session expired. Please sign in again.");
+          }
+          if (res.status === 429) {
+            throw new Error(getRateLimitMessage(res));
+          }
+          const data = await res.json().catch(() => ({}));
+          throw new Error(data?.detail || `HTTP ${res.status}`);
+        }
+        return res.json();
+      })
+      .then((data) => {
+        setReactiveTables((prev) => {
+          const table = prev[listenId];
+          // The statement changed while the page was loading.
+          if (!table || table.statement !== statement || table.rows.length !== offset) return prev;
+          return {
+            ...prev,
+            [listenId]: {
+              ...table,
+              rows: [...table.rows, ...(data.rows || [])],
+              total_rows: Number.isFinite(data.total_rows) ? data.total_rows : table.total_rows,
+              total_rows_exact: data.total_rows_exact !== false,
+              next_offset: Number.isFinite(data.next_offset) ? data.next_offset : null,
+              error: data.error || null,
+              status: "ready",
+            },
+          };
+        });
+      })
+      .catch((err) => {
+        console.error("Preview error:", err);
+        setRequestError(err?.message || "Vorschau fehlgeschlagen.");
+        setReactiveTables((prev) => ({
+          ...prev,
+          [listenId]: { ...prev[listenId], status: "ready" },
+        }));
+      });
+  };
+
   const handleChange = (id, value) => {
     setRequestError("");
     setFormData((prev) => ({ ...prev, [id]: value }));
@@ -295,6 +368,7 @@ export default function QuestionPage({ onSessionExpired }) {
                 userInput={formData}
                 showExpected={status === "showingResults"}
                 reactiveTables={reactiveTables}
+                onLoadMoreRows={loadMoreRows}
                 registerFieldId={(fieldId) => registerFieldIdForView(viewName, fieldId)}
                 openLinksInNewTab={isExternalExercise}
               />